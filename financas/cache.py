@@ -0,0 +1,288 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Uma conexão por arquivo em cada processo, compartilhada por todas as instâncias
+# do backend: o Django cria uma instância por thread (por greenlet no gevent)
+_conexoes = {}
+_herdadas = []
+_trava = threading.Lock()
+
+def _apos_fork():
+    """Descarta no processo filho as conexões e a trava herdadas do pai."""
+    global _trava
+    # Fechar no filho uma conexão aberta no pai pode liberar travas do pai no arquivo
+    _herdadas.extend(_conexoes.values())
+    _conexoes.clear()
+    _trava = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+class SQLiteCache(BaseCache):
+    """
+    Backend de cache em um arquivo SQLite compartilhado pelos workers.
+    
+    Todos os processos da mesma máquina leem e gravam o mesmo arquivo (em
+    modo WAL), de modo que um valor calculado por um worker serve aos demais.
+    Inteiros são gravados nativamente para que incr() e add() sejam atômicos
+    entre processos; os demais valores são serializados com pickle.
+    
+    Cada processo mantém uma única conexão por arquivo, usada sob uma trava;
+    close() a fecha e a próxima operação a reabre sem repetir a criação da
+    tabela. Em WAL leituras não esperam gravações, e a espera por outra
+    gravação é limitada a ESPERA_BLOQUEIO segundos, pois no gevent ela
+    bloqueia o worker inteiro.
+    
+    Uso em settings.CACHES:
+        'BACKEND': 'financas.cache.SQLiteCache',
+        'LOCATION': '/caminho/para/cache.sqlite3',
+    """
+    
+    # Probabilidade de executar a limpeza de expirados a cada gravação
+    PROBABILIDADE_LIMPEZA = 0.01
+    # Espera máxima, em segundos, pela trava de escrita de outro processo
+    ESPERA_BLOQUEIO = 2
+    
+    # Arquivos cuja tabela já foi criada neste processo (ou no pai)
+    _preparados = set()
+    
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._caminho = location
+    
+    def _abrir(self):
+        """Abre uma conexão com o arquivo, criando diretório e tabela na primeira vez."""
+        if self._caminho not in self._preparados:
+            diretorio = os.path.dirname(self._caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+        
+        conexao = sqlite3.connect(
+            self._caminho, timeout=self.ESPERA_BLOQUEIO, isolation_level=None, check_same_thread=False
+        )
+        conexao.execute('PRAGMA synchronous=NORMAL')
+        if self._caminho not in self._preparados:
+            # journal_mode=WAL fica gravado no arquivo
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL'
+                ') WITHOUT ROWID'
+            )
+            self._preparados.add(self._caminho)
+        return conexao
+    
+    @contextmanager
+    def _conexao(self):
+        """Fornece a conexão do processo, aberta sob demanda, com a trava adquirida."""
+        with _trava:
+            conexao = _conexoes.get(self._caminho)
+            if conexao is None:
+                conexao = _conexoes[self._caminho] = self._abrir()
+            yield conexao
+    
+    @staticmethod
+    def _serializar(valor):
+        # bool é subclasse de int, mas precisa voltar como bool
+        if type(valor) is int and -2 ** 63 <= valor < 2 ** 63:
+            return valor
+        return pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+    
+    @staticmethod
+    def _desserializar(valor):
+        if isinstance(valor, int):
+            return valor
+        return pickle.loads(valor)
+    
+    def _chave(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+    
+    def _limpar_expirados(self, conexao):
+        """Remove entradas expiradas e, acima de MAX_ENTRIES, descarta uma fração das que expiram antes."""
+        conexao.execute('DELETE FROM cache WHERE expira IS NOT NULL AND expira <= ?', (time.time(),))
+        total = conexao.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            excedente = total // self._cull_frequency if self._cull_frequency else total
+            conexao.execute(
+                'DELETE FROM cache WHERE chave IN ('
+                'SELECT chave FROM cache ORDER BY expira IS NULL, expira LIMIT ?'
+                ')',
+                (excedente,)
+            )
+    
+    def _gravar(self, conexao, linhas):
+        conexao.executemany(
+            'INSERT INTO cache (chave, valor, expira) VALUES (?, ?, ?) '
+            'ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira',
+            linhas
+        )
+        if random.random() < self.PROBABILIDADE_LIMPEZA:
+            self._limpar_expirados(conexao)
+    
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            cursor = conexao.execute(
+                'INSERT INTO cache (chave, valor, expira) VALUES (?, ?, ?) '
+                'ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira '
+                'WHERE cache.expira IS NOT NULL AND cache.expira <= ?',
+                (chave, self._serializar(value), self.get_backend_timeout(timeout), time.time())
+            )
+            return cursor.rowcount > 0
+    
+    def get(self, key, default=None, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            linha = conexao.execute(
+                'SELECT valor FROM cache WHERE chave = ? AND (expira IS NULL OR expira > ?)',
+                (chave, time.time())
+            ).fetchone()
+        if linha is None:
+            return default
+        return self._desserializar(linha[0])
+    
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self._chave(key, version)
+        linha = (chave, self._serializar(value), self.get_backend_timeout(timeout))
+        with self._conexao() as conexao:
+            self._gravar(conexao, [linha])
+    
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            cursor = conexao.execute(
+                'UPDATE cache SET expira = ? WHERE chave = ? AND (expira IS NULL OR expira > ?)',
+                (self.get_backend_timeout(timeout), chave, time.time())
+            )
+            return cursor.rowcount > 0
+    
+    def delete(self, key, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            cursor = conexao.execute('DELETE FROM cache WHERE chave = ?', (chave,))
+            return cursor.rowcount > 0
+    
+    def has_key(self, key, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            linha = conexao.execute(
+                'SELECT 1 FROM cache WHERE chave = ? AND (expira IS NULL OR expira > ?)',
+                (chave, time.time())
+            ).fetchone()
+        return linha is not None
+    
+    def incr(self, key, delta=1, version=None):
+        chave = self._chave(key, version)
+        with self._conexao() as conexao:
+            linha = conexao.execute(
+                "UPDATE cache SET valor = valor + ? "
+                "WHERE chave = ? AND (expira IS NULL OR expira > ?) AND typeof(valor) = 'integer' "
+                "RETURNING valor",
+                (delta, chave, time.time())
+            ).fetchone()
+        if linha is None:
+            raise ValueError("Key '%s' not found" % key)
+        return linha[0]
+    
+    def get_many(self, keys, version=None):
+        chaves = {self._chave(key, version): key for key in keys}
+        valores = []
+        lista = list(chaves)
+        agora = time.time()
+        with self._conexao() as conexao:
+            # Respeita o limite de variáveis por consulta do SQLite
+            for inicio in range(0, len(lista), 500):
+                parte = lista[inicio:inicio + 500]
+                valores.extend(conexao.execute(
+                    'SELECT chave, valor FROM cache WHERE chave IN (%s) AND (expira IS NULL OR expira > ?)'
+                    % ', '.join('?' * len(parte)),
+                    (*parte, agora)
+                ))
+        return {chaves[chave]: self._desserializar(valor) for chave, valor in valores}
+    
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expira = self.get_backend_timeout(timeout)
+        linhas = [
+            (self._chave(key, version), self._serializar(value), expira)
+            for key, value in data.items()
+        ]
+        with self._conexao() as conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                self._gravar(conexao, linhas)
+            except BaseException:
+                conexao.execute('ROLLBACK')
+                raise
+            conexao.execute('COMMIT')
+        return []
+    
+    def delete_many(self, keys, version=None):
+        chaves = [(self._chave(key, version),) for key in keys]
+        with self._conexao() as conexao:
+            conexao.executemany('DELETE FROM cache WHERE chave = ?', chaves)
+    
+    def delete_prefix(self, prefix, version=None):
+        """
+        Remove todas as entradas cuja chave começa com o prefixo informado.
+        
+        Usa um intervalo sobre a chave primária, sem varrer a tabela.
+        
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        inicio = self.make_key(prefix, version=version)
+        fim = inicio[:-1] + chr(ord(inicio[-1]) + 1)
+        with self._conexao() as conexao:
+            cursor = conexao.execute(
+                'DELETE FROM cache WHERE chave >= ? AND chave < ?', (inicio, fim)
+            )
+            return cursor.rowcount
+    
+    def clear(self):
+        with self._conexao() as conexao:
+            conexao.execute('DELETE FROM cache')
+    
+    def close(self, **kwargs):
+        """Fecha a conexão do processo com o arquivo; a próxima operação a reabre."""
+        with _trava:
+            conexao = _conexoes.pop(self._caminho, None)
+        if conexao is not None:
+            conexao.close()
+
+def excluir_prefixo(backend, prefixo):
+    """
+    Remove do cache todas as entradas cuja chave começa com o prefixo.
+    
+    Suporta o SQLiteCache (intervalo na chave primária) e o RedisCache do
+    Django (SCAN + DEL, sem bloquear o servidor como KEYS).
+    
+    Returns:
+        int or None: Entradas removidas, ou None se o backend não suporta a operação
+    """
+    if hasattr(backend, 'delete_prefix'):
+        return backend.delete_prefix(prefixo)
+    
+    from django.core.cache.backends.redis import RedisCache
+    if isinstance(backend, RedisCache):
+        cliente = backend._cache.get_client(write=True)
+        removidas = 0
+        chaves = []
+        for chave in cliente.scan_iter(match=backend.make_key(prefixo) + '*', count=1000):
+            chaves.append(chave)
+            if len(chaves) >= 1000:
+                removidas += cliente.delete(*chaves)
+                chaves = []
+        if chaves:
+            removidas += cliente.delete(*chaves)
+        return removidas
+    
+    return None
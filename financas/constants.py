@@ -36,6 +36,15 @@ class TipoTransacao:
     def is_expense_type(cls, tipo):
         """Verifica se o tipo representa uma despesa/saída."""
         return tipo in cls.get_expense_types()
+    
+    @classmethod
+    def sinal(cls, tipo):
+        """Retorna o sinal do tipo no saldo: 1 para receitas, -1 para despesas/saídas."""
+        if tipo == cls.RECEITA:
+            return 1
+        if cls.is_expense_type(tipo):
+            return -1
+        return 0
 
 # Configurações de formatação
 class FormatConfig:
@@ -75,7 +84,48 @@ class PaginationConfig:
     """Configurações para paginação de listas."""
     DEFAULT_PAGE_SIZE = 10
     MAX_PAGE_SIZE = 100
+    TRANSACOES_PAGE_SIZE = 20
+    # Salt da assinatura dos cursores de paginação por chave (data, id)
+    CURSOR_SALT = 'financas.paginacao.cursor'
+    
+# Configurações de relatórios
+class RelatorioConfig:
+    """Limites das séries enviadas aos gráficos de relatórios."""
+    PONTOS_EVOLUCAO_PADRAO = 366
+    PONTOS_EVOLUCAO_MINIMO = 3
+    PONTOS_EVOLUCAO_MAXIMO = 2000
+
+# Configurações de busca textual
+class BuscaConfig:
+    """Parâmetros da busca indexada em descrição e responsável das transações."""
+    # Termos mais curtos que um trigrama não usam o índice
+    TAMANHO_MINIMO_INDEXADO = 3
+    LIMITE_RESULTADOS = 20
+    CONFIGURACAO_TEXTO = 'portuguese'
+
+# Configurações de cache
+class CacheConfig:
+    """Chaves e tempos de expiração (em segundos) das entradas de cache."""
+    FECHAMENTO_STATUS_PENDENTE_TIMEOUT = 300
+    # Todas as chaves de um tenant começam com TENANT_KEY
+    TENANT_KEY = 'tenant:{tenant_id}:'
+    PERIODO_FECHADO_KEY = TENANT_KEY + 'periodo_fechado:{agregado}:{conta_id}:{ano}-{mes:02d}'
+    TENANT_VERSAO_KEY = TENANT_KEY + 'versao'
+    TENANT_PREFIXO_KEY = TENANT_KEY + 'v{versao}:'
+    TENANT_DADOS_KEY = TENANT_PREFIXO_KEY + '{nome}:{partes}'
+    TENANT_DADOS_TIMEOUT = 3600
     
+    # Recálculo único: só um worker recalcula uma chave ausente ou vencida
+    CALCULO_TRAVA_KEY = '{chave}:calculando'
+    CALCULO_TRAVA_TIMEOUT = 60
+    CALCULO_ESPERA_MAXIMA = 10
+    # Por quanto tempo após vencer um valor ainda pode ser servido durante o recálculo
+    VALOR_VENCIDO_TIMEOUT = 300
+    
+    # Cache HTTP (privado, no navegador) dos widgets do dashboard
+    DASHBOARD_WIDGET_MAX_AGE = 30
+    DASHBOARD_WIDGET_STALE = 60
+
 # Configurações de validação
 class ValidationConfig:
     """Configurações para validações."""
@@ -84,6 +134,18 @@ class ValidationConfig:
     MIN_DESCRICAO_LENGTH = 3
     MIN_NOME_CONTA_LENGTH = 2
     
+# Configurações de importação de planilhas
+class ImportacaoConfig:
+    """Parâmetros da importação de transações por planilha."""
+    TAMANHO_LOTE = 1000
+    MAX_ERROS = 50
+    MAX_RESPONSAVEL_LENGTH = 100
+    # Testados em ordem; dd/mm/aaaa tem prioridade
+    FORMATOS_DATA = [
+        '%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%Y.%m.%d',
+        '%m/%d/%Y', '%m-%d-%Y', '%m.%d.%Y', '%Y-%m-%d %H:%M:%S',
+    ]
+
 # Status de operações
 class OperationStatus:
     """Status de operações do sistema."""
@@ -0,0 +1,145 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+
+def _inicializar_worker():
+    """Prepara o Django em cada processo do pool (necessário no método spawn)."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _fechar_faixa(tenants, mes, ano, tenants_por_lote):
+    """
+    Fecha o mês para uma faixa de tenants (executado em um processo do pool).
+    
+    Args:
+        tenants (list): IDs dos tenants da faixa
+        mes (int): Mês a fechar
+        ano (int): Ano a fechar
+        tenants_por_lote (int): Tenants por consulta de cálculo
+    
+    Returns:
+        dict: Tenants da faixa, tenants em andamento em outra execução,
+            fechamentos gravados, tempos por tenant e duração
+    """
+    from financas.services import FechamentoService
+    
+    resultado = FechamentoService.fechar_mes(
+        mes, ano, tenant_ids=tenants, tenants_por_lote=tenants_por_lote
+    )
+    
+    return {
+        'tenants': tenants,
+        'em_andamento': resultado['em_andamento'],
+        'fechamentos': len(resultado['fechamentos']),
+        'por_tenant': resultado['tenants'],
+        'duracao_ms': resultado['duracao_ms'],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa o fechamento mensal de todos os tenants fora do ciclo de requisições. '
+        'Feito para o cron (ex.: "30 0 1 * * python manage.py executar_fechamentos"); '
+        'só processa tenants com contas ainda sem fechamento no mês, então uma execução '
+        'interrompida continua de onde parou e execuções diárias alcançam contas novas.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mes',
+            type=int,
+            help='Mês a fechar (padrão: mês anterior)'
+        )
+        parser.add_argument(
+            '--ano',
+            type=int,
+            help='Ano a fechar (padrão: ano do mês anterior)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos paralelos (padrão: número de CPUs; SQLite usa sempre 1)'
+        )
+        parser.add_argument(
+            '--tenants-por-faixa',
+            type=int,
+            default=500,
+            help='Quantidade de tenants por faixa de trabalho (padrão: 500)'
+        )
+    
+    def handle(self, *args, **options):
+        from financas.services import FechamentoService
+        
+        inicio = time.monotonic()
+        
+        mes, ano = options['mes'], options['ano']
+        if (mes is None) != (ano is None):
+            raise CommandError('Informe --mes e --ano juntos.')
+        if mes is None:
+            mes, ano = FechamentoService.mes_anterior()
+        elif not 1 <= mes <= 12:
+            raise CommandError('Mês inválido.')
+        
+        faixas = self._montar_faixas(mes, ano, options['tenants_por_faixa'])
+        if not faixas:
+            self.stdout.write(self.style.SUCCESS(f'✓ Fechamento {mes:02d}/{ano}: nenhuma conta pendente'))
+            return
+        
+        workers = max(1, options['workers'])
+        if connection.vendor == 'sqlite':
+            workers = 1
+        
+        parametros = (mes, ano, options['tenants_por_faixa'])
+        resultados = []
+        
+        if workers == 1 or len(faixas) <= 1:
+            for faixa in faixas:
+                resultados.append(_fechar_faixa(faixa, *parametros))
+        else:
+            # Conexões não podem ser compartilhadas com processos filhos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+                futuros = [pool.submit(_fechar_faixa, faixa, *parametros) for faixa in faixas]
+                for futuro in as_completed(futuros):
+                    resultados.append(futuro.result())
+        
+        fechamentos = sum(r['fechamentos'] for r in resultados)
+        em_andamento = [t for r in resultados for t in r['em_andamento']]
+        duracao_ms = int((time.monotonic() - inicio) * 1000)
+        
+        if options['verbosity'] >= 2:
+            for resultado in resultados:
+                for tenant_id, tempos in resultado['por_tenant'].items():
+                    self.stdout.write(
+                        f'  tenant {tenant_id}: {tempos["contas"]} contas em {tempos["duracao_ms"]}ms'
+                    )
+        
+        if em_andamento:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(em_andamento)} tenants em andamento em outra execução; '
+                    'execute novamente para concluí-los'
+                )
+            )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Fechamento {mes:02d}/{ano}: {fechamentos} contas em {len(faixas)} faixas '
+                f'({workers} workers) em {duracao_ms}ms'
+            )
+        )
+    
+    def _montar_faixas(self, mes, ano, tenants_por_faixa):
+        """Divide os tenants com contas ainda não fechadas em faixas com o mesmo número de tenants."""
+        from financas.services import FechamentoService
+        
+        tenants = FechamentoService.listar_tenants_pendentes(mes, ano)
+        return [tenants[i:i + tenants_por_faixa] for i in range(0, len(tenants), tenants_por_faixa)]
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from financas.services import FechamentoService
+
+class Command(BaseCommand):
+    help = (
+        'Gera a cadeia de fechamentos mensais de um intervalo de meses passados '
+        '(ex.: após importar o histórico de um tenant). Fechamentos existentes são preservados.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inicio',
+            required=True,
+            help='Primeiro mês no formato AAAA-MM'
+        )
+        parser.add_argument(
+            '--fim',
+            help='Último mês no formato AAAA-MM (padrão: mês anterior)'
+        )
+        parser.add_argument(
+            '--tenant',
+            type=int,
+            action='append',
+            dest='tenants',
+            help='Tenant a processar (pode ser repetido). Padrão: todos os tenants.'
+        )
+        parser.add_argument(
+            '--tenants-por-lote',
+            type=int,
+            default=500,
+            help='Tenants por lote de consultas (padrão: 500)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tamanho dos lotes de inserção (padrão: 1000)'
+        )
+    
+    def handle(self, *args, **options):
+        inicio = self._ler_mes(options['inicio'], '--inicio')
+        
+        mes_anterior, ano_anterior = FechamentoService.mes_anterior()
+        ultimo_mes_fechavel = datetime(ano_anterior, mes_anterior, 1).date()
+        fim = self._ler_mes(options['fim'], '--fim') if options['fim'] else ultimo_mes_fechavel
+        
+        if fim > ultimo_mes_fechavel:
+            raise CommandError('Apenas meses encerrados podem ser fechados retroativamente.')
+        if inicio > fim:
+            raise CommandError('--inicio deve ser anterior ou igual a --fim.')
+        
+        resultado = FechamentoService.gerar_retroativos(
+            inicio, fim,
+            tenant_ids=options['tenants'],
+            tenants_por_lote=options['tenants_por_lote'],
+            batch_size=options['batch_size'],
+        )
+        
+        if options['verbosity'] >= 2:
+            for tenant_id, tempos in resultado['tenants'].items():
+                self.stdout.write(
+                    f'  tenant {tenant_id}: {tempos["fechamentos"]} fechamentos em {tempos["duracao_ms"]}ms'
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {resultado["fechamentos"]} fechamentos gerados de {inicio:%m/%Y} a {fim:%m/%Y} '
+                f'em {resultado["duracao_ms"]}ms'
+            )
+        )
+    
+    def _ler_mes(self, valor, opcao):
+        """Converte AAAA-MM no primeiro dia do mês."""
+        try:
+            return datetime.strptime(valor, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'{opcao} deve estar no formato AAAA-MM.')
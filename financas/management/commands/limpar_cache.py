@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from financas.services import CacheTenant
+
+class Command(BaseCommand):
+    help = 'Remove do cache compartilhado as entradas de um ou mais tenants, ou o cache inteiro'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=int,
+            action='append',
+            dest='tenants',
+            help='ID do tenant (pode ser repetido). Padrão: todo o cache.'
+        )
+    
+    def handle(self, *args, **options):
+        if not options['tenants']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('✓ Cache limpo'))
+            return
+        
+        for tenant_id in options['tenants']:
+            removidas = CacheTenant.limpar(tenant_id)
+            if removidas is None:
+                self.stdout.write(f'Tenant {tenant_id}: versão incrementada (o backend não exclui por prefixo)')
+            else:
+                self.stdout.write(f'Tenant {tenant_id}: {removidas} entradas removidas')
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Cache de {len(options["tenants"])} tenants limpo'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from financas.models import FechamentoMensal
+from financas.services import FechamentoService
+
+class Command(BaseCommand):
+    help = (
+        'Reabre o fechamento de um mês corrigido: recalcula o mês e propaga a diferença '
+        'de saldo aos fechamentos posteriores de cada conta'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--mes', type=int, required=True, help='Mês corrigido (1-12)')
+        parser.add_argument('--ano', type=int, required=True, help='Ano corrigido')
+        parser.add_argument(
+            '--conta',
+            type=int,
+            action='append',
+            dest='contas',
+            help='ID da conta (pode ser repetido). Padrão: todas as contas fechadas no mês.'
+        )
+    
+    def handle(self, *args, **options):
+        mes, ano = options['mes'], options['ano']
+        if not 1 <= mes <= 12:
+            raise CommandError('Mês inválido.')
+        
+        contas = options['contas'] or list(
+            FechamentoMensal._base_manager.filter(mes=mes, ano=ano).values_list('conta_id', flat=True)
+        )
+        
+        reabertos = 0
+        for conta_id in contas:
+            try:
+                resultado = FechamentoService.reabrir(conta_id, mes, ano)
+            except FechamentoMensal.DoesNotExist:
+                self.stderr.write(f'Conta {conta_id} não tem fechamento em {mes:02d}/{ano}')
+                continue
+            
+            reabertos += 1
+            self.stdout.write(
+                f'Conta {conta_id}: diferença {resultado["diferenca"]}, '
+                f'{resultado["posteriores"]} fechamentos posteriores ajustados'
+            )
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Fechamento {mes:02d}/{ano} reaberto para {reabertos} contas'))
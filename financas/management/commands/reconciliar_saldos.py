@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+CAMPOS_RELATORIO = [
+    'conta_id', 'tenant_id', 'saldo_registrado', 'saldo_calculado',
+    'saldo_snapshot', 'diferenca_saldo', 'diferenca_snapshot',
+]
+
+
+def _inicializar_worker():
+    """Prepara o Django em cada processo do pool (necessário no método spawn)."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _reconciliar_faixa(faixa, chunk_size, corrigir, batch_size):
+    """
+    Reconcilia as contas de uma faixa de tenants (executado em um processo do pool).
+    
+    Args:
+        faixa (tuple): (tenant inicial, tenant final); (None, None) para contas sem tenant
+        chunk_size (int): Contas por consulta
+        corrigir (bool): Se deve corrigir as divergências encontradas
+        batch_size (int): Contas por UPDATE de correção
+    
+    Returns:
+        dict: Faixa, contas verificadas, divergências, correções e duração
+    """
+    from financas.models import Conta
+    from financas.services import SaldoService
+    
+    inicio = time.monotonic()
+    tenant_inicial, tenant_final = faixa
+    
+    if tenant_inicial is None:
+        contas = Conta._base_manager.filter(tenant_id__isnull=True)
+    else:
+        contas = Conta._base_manager.filter(tenant_id__gte=tenant_inicial, tenant_id__lte=tenant_final)
+    
+    divergencias = list(SaldoService.divergencias_saldo(contas, chunk_size=chunk_size))
+    
+    saldos_corrigidos, snapshots_reconstruidos = 0, 0
+    if corrigir and divergencias:
+        saldos_corrigidos, snapshots_reconstruidos = SaldoService.corrigir_divergencias(
+            divergencias, batch_size=batch_size
+        )
+    
+    return {
+        'faixa': faixa,
+        'contas': contas.count(),
+        'divergencias': divergencias,
+        'saldos_corrigidos': saldos_corrigidos,
+        'snapshots_reconstruidos': snapshots_reconstruidos,
+        'duracao_ms': int((time.monotonic() - inicio) * 1000),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconcilia Conta.saldo e o snapshot diário com o razão de transações de todos os tenants. '
+        'Emite um relatório de divergências (JSON Lines ou CSV) e, com --corrigir, ajusta em lotes.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos paralelos (padrão: número de CPUs; SQLite usa sempre 1)'
+        )
+        parser.add_argument(
+            '--tenants-por-faixa',
+            type=int,
+            default=500,
+            help='Quantidade de tenants por faixa de trabalho (padrão: 500)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Contas lidas por consulta (padrão: 2000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Contas por UPDATE de correção (padrão: 500)'
+        )
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Corrige as divergências encontradas'
+        )
+        parser.add_argument(
+            '--formato',
+            choices=['jsonl', 'csv'],
+            default='jsonl',
+            help='Formato do relatório (padrão: jsonl)'
+        )
+        parser.add_argument(
+            '--saida',
+            help='Arquivo do relatório (padrão: saída padrão)'
+        )
+    
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        faixas = self._montar_faixas(options['tenants_por_faixa'])
+        
+        workers = max(1, options['workers'])
+        if connection.vendor == 'sqlite':
+            workers = 1
+        
+        parametros = (options['chunk_size'], options['corrigir'], options['batch_size'])
+        resultados = []
+        
+        if workers == 1 or len(faixas) <= 1:
+            for faixa in faixas:
+                resultados.append(_reconciliar_faixa(faixa, *parametros))
+        else:
+            # Conexões não podem ser compartilhadas com processos filhos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+                futuros = [pool.submit(_reconciliar_faixa, faixa, *parametros) for faixa in faixas]
+                for futuro in as_completed(futuros):
+                    resultados.append(futuro.result())
+        
+        divergencias = sorted(
+            (d for resultado in resultados for d in resultado['divergencias']),
+            key=lambda d: d['conta_id']
+        )
+        
+        resumo = {
+            'tipo': 'resumo',
+            'faixas': len(faixas),
+            'workers': workers,
+            'contas_verificadas': sum(r['contas'] for r in resultados),
+            'divergencias': len(divergencias),
+            'saldos_corrigidos': sum(r['saldos_corrigidos'] for r in resultados),
+            'snapshots_reconstruidos': sum(r['snapshots_reconstruidos'] for r in resultados),
+            'duracao_ms': int((time.monotonic() - inicio) * 1000),
+        }
+        
+        self._escrever_relatorio(divergencias, resumo, options['formato'], options['saida'])
+    
+    def _montar_faixas(self, tenants_por_faixa):
+        """Divide os tenants existentes em faixas contíguas com o mesmo número de tenants."""
+        from financas.models import Conta
+        
+        tenants = list(
+            Conta._base_manager.exclude(tenant_id__isnull=True)
+            .order_by('tenant_id')
+            .values_list('tenant_id', flat=True)
+            .distinct()
+        )
+        
+        faixas = [
+            (tenants[i], tenants[min(i + tenants_por_faixa, len(tenants)) - 1])
+            for i in range(0, len(tenants), tenants_por_faixa)
+        ]
+        
+        if Conta._base_manager.filter(tenant_id__isnull=True).exists():
+            faixas.append((None, None))
+        
+        return faixas
+    
+    def _escrever_relatorio(self, divergencias, resumo, formato, saida):
+        """Escreve o relatório de divergências e o resumo no formato escolhido."""
+        arquivo = open(saida, 'w', newline='', encoding='utf-8') if saida else self.stdout
+        
+        try:
+            if formato == 'csv':
+                writer = csv.DictWriter(arquivo, fieldnames=CAMPOS_RELATORIO)
+                writer.writeheader()
+                for divergencia in divergencias:
+                    writer.writerow({campo: divergencia[campo] for campo in CAMPOS_RELATORIO})
+                # No CSV o resumo vai para stderr para não misturar formatos
+                self.stderr.write(json.dumps(resumo))
+            else:
+                for divergencia in divergencias:
+                    linha = {'tipo': 'divergencia'}
+                    linha.update({campo: divergencia[campo] for campo in CAMPOS_RELATORIO})
+                    arquivo.write(json.dumps(linha, default=str) + '\n')
+                arquivo.write(json.dumps(resumo) + '\n')
+        finally:
+            if saida:
+                arquivo.close()
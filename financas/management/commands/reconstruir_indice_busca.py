@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from financas.services import BuscaTransacaoService
+
+class Command(BaseCommand):
+    help = (
+        'Recria os índices de busca textual das transações (FTS5 no SQLite, GIN no PostgreSQL). '
+        'Necessário no SQLite depois de migrações que recriam a tabela de transações e descartam os triggers.'
+    )
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            backend = BuscaTransacaoService.instalar(connection)
+        
+        if backend is None:
+            raise CommandError(f'O banco {connection.vendor} não suporta os índices de busca; a busca usará icontains')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Índice de busca de transações reconstruído ({backend})')
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from financas.services import ResumoMensalService
+
+class Command(BaseCommand):
+    help = 'Reconstrói o cubo de agregados mensais (ResumoMensal) a partir das transações'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conta',
+            type=int,
+            action='append',
+            dest='contas',
+            help='ID da conta a reconstruir (pode ser repetido). Padrão: todas as contas.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tamanho dos lotes de inserção (padrão: 1000)'
+        )
+    
+    def handle(self, *args, **options):
+        celulas = ResumoMensalService.reconstruir(
+            conta_ids=options['contas'],
+            batch_size=options['batch_size']
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Cubo mensal reconstruído: {celulas} células gravadas')
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from financas.services import SaldoService
+
+class Command(BaseCommand):
+    help = 'Reconstrói o snapshot diário de saldos (SaldoDiario) a partir das transações'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conta',
+            type=int,
+            action='append',
+            dest='contas',
+            help='ID da conta a reconstruir (pode ser repetido). Padrão: todas as contas.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tamanho dos lotes de inserção (padrão: 1000)'
+        )
+    
+    def handle(self, *args, **options):
+        linhas = SaldoService.reconstruir_saldos_diarios(
+            conta_ids=options['contas'],
+            batch_size=options['batch_size']
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Snapshot diário reconstruído: {linhas} linhas gravadas')
+        )
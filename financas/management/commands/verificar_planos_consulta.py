@@ -0,0 +1,223 @@
+import random
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+# Varredura completa de uma tabela no plano (PostgreSQL / SQLite)
+SEQ_SCAN_POSTGRES = re.compile(r'Seq Scan on (\w+)')
+SEQ_SCAN_SQLITE = re.compile(r'\bSCAN (\w+)(?! USING)')
+
+
+def _consultas_quentes():
+    """
+    Monta as consultas mais frequentes da aplicação, executadas pelos próprios serviços.
+    
+    Devem ser chamadas com connection.tenant_id apontando para o tenant gerado.
+    
+    Returns:
+        list: Pares (nome, função sem argumentos que executa a consulta)
+    """
+    from financas.constants import TipoTransacao
+    from financas.models import DespesaParcelada, FechamentoMensal, ParcelaPlanejada, Transacao
+    from financas.services import CategoriaService, RelatorioService, TransacaoService
+    
+    fim = Transacao.objects.aggregate(ultima=Max('data'))['ultima']
+    inicio = fim.replace(day=1)
+    meio = Transacao.objects.order_by('-data', '-id')[Transacao.objects.count() // 2]
+    amostra = Transacao.objects.filter(despesa_parcelada__isnull=False).first()
+    periodo = {'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()}
+    
+    return [
+        ('listagem_primeira_pagina', lambda: TransacaoService.paginar_por_cursor(
+            TransacaoService.listar_transacoes_com_filtros()
+        )),
+        ('listagem_pagina_profunda', lambda: TransacaoService.paginar_por_cursor(
+            TransacaoService.listar_transacoes_com_filtros(),
+            TransacaoService.codificar_cursor(meio, 'proximo')
+        )),
+        ('extrato_conta', lambda: list(
+            Transacao.objects.filter(conta_id=meio.conta_id, data__gte=inicio, data__lte=fim).order_by('-data')
+        )),
+        ('totalizadores_periodo', lambda: TransacaoService.calcular_totalizadores(
+            TransacaoService.listar_transacoes_com_filtros(**periodo)
+        )),
+        ('despesas_por_categoria', lambda: CategoriaService.totais_por_categoria(
+            (inicio, fim), tipos=TipoTransacao.get_expense_types(), excluir_parceladas=True
+        )),
+        ('transacoes_da_categoria', lambda: TransacaoService.paginar_por_cursor(
+            TransacaoService.listar_transacoes_com_filtros(categoria_id=str(meio.categoria_id))
+        )),
+        ('parcelas_da_despesa', lambda: list(
+            Transacao.objects.filter(despesa_parcelada_id=amostra.despesa_parcelada_id)
+        )),
+        ('serie_temporal_diaria', lambda: RelatorioService.serie_temporal(
+            fim - timedelta(days=90), fim, 'diario', {'excluir_parceladas': True}
+        )),
+        ('fechamentos_do_mes', lambda: list(
+            FechamentoMensal.objects.filter(ano=inicio.year, mes=inicio.month)
+        )),
+        ('parcelas_a_vencer', lambda: list(
+            ParcelaPlanejada.objects.filter(pago=False, data_vencimento__lte=fim + timedelta(days=30))
+            .order_by('data_vencimento')[:20]
+        )),
+        ('despesas_parceladas_recentes', lambda: list(DespesaParcelada.objects.order_by('-criada_em')[:20])),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos, executa EXPLAIN nas consultas mais frequentes e falha se alguma '
+        'fizer varredura sequencial em Transacao, FechamentoMensal, ParcelaPlanejada ou DespesaParcelada. '
+        'Os dados gerados são descartados ao final.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenants',
+            type=int,
+            default=5,
+            help='Tenants gerados; as consultas rodam no primeiro (padrão: 5)'
+        )
+        parser.add_argument(
+            '--transacoes',
+            type=int,
+            default=20000,
+            help='Transações geradas por tenant (padrão: 20000)'
+        )
+        parser.add_argument(
+            '--verbose-planos',
+            action='store_true',
+            help='Exibe o plano completo de cada consulta'
+        )
+    
+    def handle(self, *args, **options):
+        from financas.models import DespesaParcelada, FechamentoMensal, ParcelaPlanejada, Transacao
+        
+        tabelas = {
+            model._meta.db_table
+            for model in (Transacao, FechamentoMensal, ParcelaPlanejada, DespesaParcelada)
+        }
+        postgres = connection.vendor == 'postgresql'
+        tenant_anterior = getattr(connection, 'tenant_id', None)
+        falhas = []
+        
+        try:
+            with transaction.atomic():
+                tenant_id = self._gerar_dados(options['tenants'], options['transacoes'])
+                
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                    if postgres:
+                        # Com seqscan desligado o planejador só o escolhe quando nenhum
+                        # índice serve, então o resultado não depende do volume gerado
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                
+                connection.tenant_id = tenant_id
+                for nome, executar in _consultas_quentes():
+                    with CaptureQueriesContext(connection) as capturadas:
+                        executar()
+                    
+                    for consulta in capturadas.captured_queries:
+                        plano = self._explain(consulta['sql'], postgres)
+                        padrao = SEQ_SCAN_POSTGRES if postgres else SEQ_SCAN_SQLITE
+                        varridas = sorted(set(padrao.findall(plano)) & tabelas)
+                        
+                        if varridas:
+                            falhas.append((nome, varridas, consulta['sql']))
+                            self.stdout.write(self.style.ERROR(f'✗ {nome}: varredura sequencial em {", ".join(varridas)}'))
+                        else:
+                            self.stdout.write(f'✓ {nome}')
+                        if options['verbose_planos'] or varridas:
+                            self.stdout.write(plano)
+                
+                transaction.set_rollback(True)
+        finally:
+            connection.tenant_id = tenant_anterior
+        
+        if falhas:
+            raise CommandError(
+                f'{len(falhas)} consulta(s) com varredura sequencial: '
+                + ', '.join(sorted({nome for nome, _, _ in falhas}))
+            )
+        
+        self.stdout.write(self.style.SUCCESS('✓ Nenhuma consulta quente faz varredura sequencial'))
+    
+    @staticmethod
+    def _explain(sql, postgres):
+        """Retorna o plano de uma consulta já com os parâmetros interpolados."""
+        with connection.cursor() as cursor:
+            cursor.execute(('EXPLAIN ' if postgres else 'EXPLAIN QUERY PLAN ') + sql)
+            linhas = cursor.fetchall()
+        # No SQLite o detalhe é a última coluna; no PostgreSQL, a única
+        return '\n'.join(str(linha[-1]) for linha in linhas)
+    
+    def _gerar_dados(self, tenants, transacoes_por_tenant):
+        """
+        Insere contas, categorias, transações, despesas parceladas, parcelas e fechamentos sintéticos.
+        
+        Args:
+            tenants (int): Quantidade de tenants
+            transacoes_por_tenant (int): Transações por tenant
+        
+        Returns:
+            int: Tenant em que as consultas serão executadas
+        """
+        from financas.constants import TipoTransacao
+        from financas.models import (
+            Categoria, Conta, DespesaParcelada, FechamentoMensal, ParcelaPlanejada, Transacao
+        )
+        
+        aleatorio = random.Random(42)
+        primeiro = (Transacao._base_manager.aggregate(maior=Max('tenant_id'))['maior'] or 0) + 1
+        hoje = date.today()
+        tipos = [TipoTransacao.RECEITA] + list(TipoTransacao.get_expense_types())
+        
+        for tenant_id in range(primeiro, primeiro + tenants):
+            contas = Conta._base_manager.bulk_create([
+                Conta(nome=f'Conta {i}', tenant_id=tenant_id) for i in range(5)
+            ])
+            categorias = Categoria._base_manager.bulk_create([
+                Categoria(nome=f'Categoria {i}', tenant_id=tenant_id) for i in range(20)
+            ])
+            despesas = DespesaParcelada._base_manager.bulk_create([
+                DespesaParcelada(
+                    descricao=f'Parcelada {i}', valor_total=Decimal('1200.00'), categoria=aleatorio.choice(categorias),
+                    numero_parcelas=12, data_primeira_parcela=hoje - timedelta(days=aleatorio.randint(0, 720)),
+                    conta=aleatorio.choice(contas), parcelas_geradas=True, tenant_id=tenant_id,
+                )
+                for i in range(transacoes_por_tenant // 100)
+            ])
+            ParcelaPlanejada._base_manager.bulk_create([
+                ParcelaPlanejada(
+                    despesa_parcelada=despesa, numero_parcela=numero,
+                    data_vencimento=despesa.data_primeira_parcela + timedelta(days=30 * (numero - 1)),
+                    valor=Decimal('100.00'), pago=numero < 6, tenant_id=tenant_id,
+                )
+                for despesa in despesas for numero in range(1, 13)
+            ], batch_size=1000)
+            Transacao._base_manager.bulk_create([
+                Transacao(
+                    data=hoje - timedelta(days=aleatorio.randint(0, 1095)),
+                    descricao=f'Transação {i}',
+                    valor=Decimal(aleatorio.randint(100, 500000)) / 100,
+                    categoria=aleatorio.choice(categorias),
+                    tipo=aleatorio.choice(tipos),
+                    conta=aleatorio.choice(contas),
+                    despesa_parcelada=aleatorio.choice(despesas) if despesas and i % 10 == 0 else None,
+                    tenant_id=tenant_id,
+                )
+                for i in range(transacoes_por_tenant)
+            ], batch_size=1000)
+            FechamentoMensal._base_manager.bulk_create([
+                FechamentoMensal(conta=conta, mes=mes, ano=ano, tenant_id=tenant_id)
+                for conta in contas
+                for ano in range(hoje.year - 2, hoje.year + 1)
+                for mes in range(1, 13)
+            ], batch_size=1000)
+        
+        return primeiro
@@ -251,6 +251,9 @@ class TenantMiddleware(MiddlewareMixin):
             delattr(connection, 'tenant_id')
         if hasattr(connection, 'schema_name'):
             delattr(connection, 'schema_name')
+        # Índice de meses fechados vale apenas durante a requisição
+        if hasattr(connection, 'periodos_fechados'):
+            delattr(connection, 'periodos_fechados')
         
         # Se usuário está autenticado, definir o tenant
         if hasattr(request, 'user') and request.user.is_authenticated:
@@ -307,5 +310,8 @@ class TenantMiddleware(MiddlewareMixin):
             delattr(connection, 'tenant_id')
         if hasattr(connection, 'schema_name'):
             delattr(connection, 'schema_name')
+        # Índice de meses fechados vale apenas durante a requisição
+        if hasattr(connection, 'periodos_fechados'):
+            delattr(connection, 'periodos_fechados')
         
         return response
\ No newline at end of file
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-17 06:59
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Max, Q, Sum
+
+
+def popular_saldos_diarios(apps, schema_editor):
+    """Popula o snapshot diário com o saldo acumulado de cada conta por dia."""
+    Transacao = apps.get_model('financas', 'Transacao')
+    SaldoDiario = apps.get_model('financas', 'SaldoDiario')
+    
+    movimentos = Transacao.objects.values('conta_id', 'data').annotate(
+        receitas=Sum('valor', filter=Q(tipo='receita')),
+        despesas=Sum('valor', filter=Q(tipo__in=['despesa', 'saida'])),
+        tenant=Max('tenant_id'),
+    ).order_by('conta_id', 'data')
+    
+    linhas = []
+    conta_atual = None
+    saldo = Decimal('0.00')
+    for movimento in movimentos.iterator():
+        if movimento['conta_id'] != conta_atual:
+            conta_atual = movimento['conta_id']
+            saldo = Decimal('0.00')
+        saldo += (movimento['receitas'] or Decimal('0.00')) - (movimento['despesas'] or Decimal('0.00'))
+        linhas.append(SaldoDiario(
+            conta_id=conta_atual,
+            data=movimento['data'],
+            saldo=saldo,
+            tenant_id=movimento['tenant'],
+        ))
+    
+    SaldoDiario.objects.bulk_create(linhas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0019_ensure_tenant_id_fechamentomensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(help_text='Dia de referência do saldo')),
+                ('saldo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Saldo acumulado da conta ao final do dia', max_digits=10)),
+                ('tenant_id', models.IntegerField(blank=True, db_index=True, help_text='ID do tenant (usuário) para isolamento de dados', null=True)),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='financas.conta')),
+            ],
+            options={
+                'verbose_name': 'Saldo Diário',
+                'verbose_name_plural': 'Saldos Diários',
+                'ordering': ['conta', 'data'],
+                'unique_together': {('conta', 'data')},
+            },
+        ),
+        migrations.RunPython(popular_saldos_diarios, migrations.RunPython.noop),
+    ]
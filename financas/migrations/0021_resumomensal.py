@@ -0,0 +1,77 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:06
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import BooleanField, Case, Count, Max, Sum, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def popular_resumos_mensais(apps, schema_editor):
+    """Popula o cubo mensal a partir das transações existentes."""
+    Transacao = apps.get_model('financas', 'Transacao')
+    ResumoMensal = apps.get_model('financas', 'ResumoMensal')
+    
+    agregados = Transacao.objects.annotate(
+        ano_ref=ExtractYear('data'),
+        mes_ref=ExtractMonth('data'),
+        parcelada_ref=Case(
+            When(despesa_parcelada__isnull=False, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    ).values(
+        'conta_id', 'categoria_id', 'tipo', 'ano_ref', 'mes_ref', 'parcelada_ref'
+    ).annotate(
+        soma=Sum('valor'),
+        contagem=Count('id'),
+        tenant=Max('tenant_id'),
+    ).order_by()
+    
+    ResumoMensal.objects.bulk_create([
+        ResumoMensal(
+            conta_id=linha['conta_id'],
+            categoria_id=linha['categoria_id'],
+            tipo=linha['tipo'],
+            ano=linha['ano_ref'],
+            mes=linha['mes_ref'],
+            parcelada=linha['parcelada_ref'],
+            total=linha['soma'] or Decimal('0.00'),
+            quantidade=linha['contagem'],
+            tenant_id=linha['tenant'],
+        )
+        for linha in agregados.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0020_saldodiario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa'), ('saida', 'Saída')], max_length=10)),
+                ('ano', models.IntegerField(help_text='Ano de referência')),
+                ('mes', models.IntegerField(help_text='Mês de referência (1-12)')),
+                ('parcelada', models.BooleanField(default=False, help_text='Transações vinculadas a despesas parceladas')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Soma dos valores das transações', max_digits=14)),
+                ('quantidade', models.IntegerField(default=0, help_text='Quantidade de transações')),
+                ('tenant_id', models.IntegerField(blank=True, db_index=True, help_text='ID do tenant (usuário) para isolamento de dados', null=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to='financas.categoria')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to='financas.conta')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal',
+                'verbose_name_plural': 'Resumos Mensais',
+                'ordering': ['ano', 'mes', 'conta', 'categoria', 'tipo'],
+                'indexes': [models.Index(fields=['tenant_id', 'ano', 'mes'], name='resumo_tenant_periodo_idx')],
+                'unique_together': {('conta', 'categoria', 'tipo', 'ano', 'mes', 'parcelada')},
+            },
+        ),
+        migrations.RunPython(popular_resumos_mensais, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0021_resumomensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravaFechamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='Tenant e período travados', max_length=100, unique=True)),
+                ('dono', models.CharField(help_text='Identificador da execução que detém a trava', max_length=36)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Trava de Fechamento',
+                'verbose_name_plural': 'Travas de Fechamento',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financas', '0022_travafechamento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='despesaparcelada',
+            index=models.Index(fields=['tenant_id', '-criada_em'], name='despesa_parc_tenant_criada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesaparcelada',
+            index=models.Index(fields=['tenant_id', 'conta'], name='despesa_parc_tenant_conta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fechamentomensal',
+            index=models.Index(fields=['tenant_id', 'ano', 'mes'], name='fechamento_tenant_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parcelaplanejada',
+            index=models.Index(fields=['tenant_id', 'pago', 'data_vencimento'], name='parcela_tenant_vencimento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tenant_id', 'data', 'id'], name='transacao_tenant_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tenant_id', 'data', 'tipo'], name='transacao_tenant_data_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tenant_id', 'conta', 'data'], name='transacao_tenant_conta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tenant_id', 'categoria', 'data'], name='transacao_tenant_categ_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tenant_id', 'despesa_parcelada'], name='transacao_tenant_parcel_idx'),
+        ),
+    ]
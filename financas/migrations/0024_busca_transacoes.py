@@ -0,0 +1,100 @@
+# Generated manually to create the transaction search indexes
+
+from django.db import DatabaseError, migrations
+
+# DDL congelada nesta migração: BuscaTransacaoService.instalar (usado pelo
+# comando reconstruir_indice_busca) pode evoluir sem alterar o histórico
+POSTGRES_CRIAR = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "CREATE INDEX IF NOT EXISTS transacao_busca_texto_idx ON financas_transacao USING gin (("
+    "to_tsvector('portuguese', coalesce(financas_transacao.descricao, '') || ' ' || "
+    "coalesce(financas_transacao.responsavel, ''))))",
+    # icontains gera UPPER(coluna::text) LIKE UPPER(...), servido por estes índices
+    'CREATE INDEX IF NOT EXISTS transacao_busca_descricao_trgm_idx '
+    'ON financas_transacao USING gin ((UPPER(descricao::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS transacao_busca_responsavel_trgm_idx '
+    'ON financas_transacao USING gin ((UPPER(responsavel::text)) gin_trgm_ops)',
+]
+
+POSTGRES_REMOVER = [
+    'DROP INDEX IF EXISTS transacao_busca_texto_idx',
+    'DROP INDEX IF EXISTS transacao_busca_descricao_trgm_idx',
+    'DROP INDEX IF EXISTS transacao_busca_responsavel_trgm_idx',
+]
+
+SQLITE_TABELA = (
+    "CREATE VIRTUAL TABLE financas_transacao_busca USING fts5(descricao, responsavel, "
+    "content='financas_transacao', content_rowid='id', tokenize='{tokenizador}')"
+)
+
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER financas_transacao_busca_ai AFTER INSERT ON financas_transacao BEGIN "
+    "INSERT INTO financas_transacao_busca(rowid, descricao, responsavel) "
+    "VALUES (new.id, new.descricao, new.responsavel); "
+    "END",
+    "CREATE TRIGGER financas_transacao_busca_ad AFTER DELETE ON financas_transacao BEGIN "
+    "INSERT INTO financas_transacao_busca(financas_transacao_busca, rowid, descricao, responsavel) "
+    "VALUES ('delete', old.id, old.descricao, old.responsavel); "
+    "END",
+    "CREATE TRIGGER financas_transacao_busca_au AFTER UPDATE OF descricao, responsavel ON financas_transacao BEGIN "
+    "INSERT INTO financas_transacao_busca(financas_transacao_busca, rowid, descricao, responsavel) "
+    "VALUES ('delete', old.id, old.descricao, old.responsavel); "
+    "INSERT INTO financas_transacao_busca(rowid, descricao, responsavel) "
+    "VALUES (new.id, new.descricao, new.responsavel); "
+    "END",
+    "INSERT INTO financas_transacao_busca(financas_transacao_busca) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    'DROP TRIGGER IF EXISTS financas_transacao_busca_ai',
+    'DROP TRIGGER IF EXISTS financas_transacao_busca_ad',
+    'DROP TRIGGER IF EXISTS financas_transacao_busca_au',
+    'DROP TABLE IF EXISTS financas_transacao_busca',
+]
+
+
+def criar_indices_busca(apps, schema_editor):
+    """Cria o índice FTS5 (SQLite) ou os índices GIN de texto e trigramas (PostgreSQL)."""
+    vendor = schema_editor.connection.vendor
+    
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            for sql in POSTGRES_CRIAR:
+                cursor.execute(sql)
+        elif vendor == 'sqlite':
+            for sql in SQLITE_REMOVER:
+                cursor.execute(sql)
+            # remove_diacritics no tokenizador de trigramas exige SQLite 3.45+;
+            # sem FTS5 com trigramas a busca continua usando icontains
+            for tokenizador in ('trigram remove_diacritics 1', 'trigram'):
+                try:
+                    cursor.execute(SQLITE_TABELA.format(tokenizador=tokenizador))
+                except DatabaseError:
+                    continue
+                for sql in SQLITE_TRIGGERS:
+                    cursor.execute(sql)
+                break
+
+
+def remover_indices_busca(apps, schema_editor):
+    """Remove os índices criados por criar_indices_busca."""
+    vendor = schema_editor.connection.vendor
+    
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            for sql in POSTGRES_REMOVER:
+                cursor.execute(sql)
+        elif vendor == 'sqlite':
+            for sql in SQLITE_REMOVER:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('financas', '0023_indices_tenant'),
+    ]
+    
+    operations = [
+        migrations.RunPython(criar_indices_busca, remover_indices_busca),
+    ]
@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
+from datetime import date, timedelta
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
@@ -411,6 +412,14 @@ class Transacao(models.Model):
     
     class Meta:
         ordering = ['-data']
+        # Toda consulta passa pelo TenantManager, então tenant_id abre cada índice
+        indexes = [
+            models.Index(fields=['tenant_id', 'data', 'id'], name='transacao_tenant_data_id_idx'),
+            models.Index(fields=['tenant_id', 'data', 'tipo'], name='transacao_tenant_data_tipo_idx'),
+            models.Index(fields=['tenant_id', 'conta', 'data'], name='transacao_tenant_conta_idx'),
+            models.Index(fields=['tenant_id', 'categoria', 'data'], name='transacao_tenant_categ_idx'),
+            models.Index(fields=['tenant_id', 'despesa_parcelada'], name='transacao_tenant_parcel_idx'),
+        ]
         verbose_name = 'Transação'
         verbose_name_plural = 'Transações'
 
@@ -512,6 +521,10 @@ class DespesaParcelada(models.Model):
     
     class Meta:
         ordering = ['-criada_em']
+        indexes = [
+            models.Index(fields=['tenant_id', '-criada_em'], name='despesa_parc_tenant_criada_idx'),
+            models.Index(fields=['tenant_id', 'conta'], name='despesa_parc_tenant_conta_idx'),
+        ]
 
 class Meta(models.Model):
     nome = models.CharField(max_length=100)
@@ -579,12 +592,15 @@ class Conta(models.Model):
     
     def atualizar_saldo(self):
         """
-        Atualiza o saldo da conta baseado em todas as transações.
+        Recalcula o saldo da conta a partir de todas as transações.
+        
+        No fluxo normal o saldo é mantido de forma incremental pelos signals
+        (ver SaldoService); este método é o caminho explícito de reparo.
         
         Returns:
             Decimal: O novo saldo da conta
         """
-        from django.db.models import Sum
+        from django.db.models import Sum, Q
         import logging
         
         logger = logging.getLogger(__name__)
@@ -592,17 +608,14 @@ class Conta(models.Model):
         try:
             # Considerar todas as transações
             saldo_base = Decimal('0.00')
-            transacoes_query = self.transacao_set.all()
-            
-            # Calcular receitas (todas as transações, independente do status pago)
-            receitas = transacoes_query.filter(
-                tipo=TipoTransacao.RECEITA
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
             
-            # Calcular despesas (todas as transações, independente do status pago)
-            despesas = transacoes_query.filter(
-                tipo=TipoTransacao.DESPESA
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+            # Receitas e despesas (independente do status pago) em uma única agregação
+            totais = self.transacao_set.aggregate(
+                receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+                despesas=Sum('valor', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+            )
+            receitas = totais['receitas'] or Decimal('0.00')
+            despesas = totais['despesas'] or Decimal('0.00')
             
             # Calcular novo saldo
             novo_saldo = saldo_base + receitas - despesas
@@ -626,6 +639,74 @@ class Conta(models.Model):
             logger.error(f"Erro ao atualizar saldo da conta {self.nome}: {str(e)}")
             raise CustomValidationError(f"Erro ao atualizar saldo: {str(e)}")
 
+# Snapshot do saldo acumulado por conta e dia
+class SaldoDiario(models.Model):
+    """
+    Saldo acumulado de uma conta ao final de um dia com movimentação.
+    
+    As linhas são esparsas: existe uma linha apenas para os dias em que a conta
+    teve transações. O saldo em uma data qualquer é o da linha mais recente com
+    data menor ou igual à data consultada (ver SaldoService.saldo_em).
+    """
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, related_name='saldos_diarios')
+    data = models.DateField(help_text="Dia de referência do saldo")
+    saldo = models.DecimalField(
+        max_digits=FormatConfig.MAX_DIGITS,
+        decimal_places=FormatConfig.DECIMAL_PLACES,
+        default=Decimal('0.00'),
+        help_text="Saldo acumulado da conta ao final do dia"
+    )
+    tenant_id = models.IntegerField(null=True, blank=True, help_text="ID do tenant (usuário) para isolamento de dados", db_index=True)
+    
+    objects = TenantManager()
+    
+    class Meta:
+        ordering = ['conta', 'data']
+        unique_together = [('conta', 'data')]
+        verbose_name = 'Saldo Diário'
+        verbose_name_plural = 'Saldos Diários'
+    
+    def __str__(self):
+        return f"{self.conta.nome} - {self.data.strftime(FormatConfig.DATE_FORMAT)} - Saldo: {FormatConfig.CURRENCY_SYMBOL} {self.saldo}"
+
+# Cubo de agregados mensais das transações
+class ResumoMensal(models.Model):
+    """
+    Soma e quantidade de transações por (tenant, conta, categoria, tipo, ano, mês).
+    
+    Mantido pelos mesmos signals que mantêm os saldos (ver ResumoMensalService).
+    O campo parcelada separa as transações vinculadas a despesas parceladas,
+    que a maioria das telas exclui dos totais.
+    """
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, related_name='resumos_mensais')
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='resumos_mensais')
+    tipo = models.CharField(max_length=10, choices=TipoTransacao.CHOICES)
+    ano = models.IntegerField(help_text="Ano de referência")
+    mes = models.IntegerField(help_text="Mês de referência (1-12)")
+    parcelada = models.BooleanField(default=False, help_text="Transações vinculadas a despesas parceladas")
+    total = models.DecimalField(
+        max_digits=FormatConfig.MAX_DIGITS + 4,
+        decimal_places=FormatConfig.DECIMAL_PLACES,
+        default=Decimal('0.00'),
+        help_text="Soma dos valores das transações"
+    )
+    quantidade = models.IntegerField(default=0, help_text="Quantidade de transações")
+    tenant_id = models.IntegerField(null=True, blank=True, help_text="ID do tenant (usuário) para isolamento de dados", db_index=True)
+    
+    objects = TenantManager()
+    
+    class Meta:
+        ordering = ['ano', 'mes', 'conta', 'categoria', 'tipo']
+        unique_together = [('conta', 'categoria', 'tipo', 'ano', 'mes', 'parcelada')]
+        indexes = [
+            models.Index(fields=['tenant_id', 'ano', 'mes'], name='resumo_tenant_periodo_idx'),
+        ]
+        verbose_name = 'Resumo Mensal'
+        verbose_name_plural = 'Resumos Mensais'
+    
+    def __str__(self):
+        return f"{self.conta.nome} - {self.categoria.nome} - {self.tipo} - {self.mes}/{self.ano}: {FormatConfig.CURRENCY_SYMBOL} {self.total}"
+
 # Modelo para armazenar o fechamento mensal automático
 class FechamentoMensal(models.Model):
     """
@@ -670,6 +751,9 @@ class FechamentoMensal(models.Model):
     class Meta:
         ordering = ['ano', 'mes', 'conta']
         unique_together = [('conta', 'mes', 'ano')]
+        indexes = [
+            models.Index(fields=['tenant_id', 'ano', 'mes'], name='fechamento_tenant_periodo_idx'),
+        ]
         verbose_name = 'Fechamento Mensal'
         verbose_name_plural = 'Fechamentos Mensais'
     
@@ -679,10 +763,10 @@ class FechamentoMensal(models.Model):
     @classmethod
     def realizar_fechamento_automatico(cls):
         """
-        Realiza o fechamento automático para todas as contas.
+        Realiza o fechamento automático para todas as contas de todos os tenants.
         Deve ser chamado no dia 1 de cada mês.
         """
-        from django.db.models import Sum
+        from .services import FechamentoService
         import logging
         
         logger = logging.getLogger(__name__)
@@ -701,66 +785,32 @@ class FechamentoMensal(models.Model):
             mes_fechamento = hoje.month - 1
             ano_fechamento = hoje.year
         
-        # Calcular período de fechamento
-        data_inicio = date(ano_fechamento, mes_fechamento, 1)
-        if mes_fechamento == 12:
-            data_fim = date(ano_fechamento + 1, 1, 1) - timedelta(days=1)
-        else:
-            data_fim = date(ano_fechamento, mes_fechamento + 1, 1) - timedelta(days=1)
+        # Fechamento set-based de todas as contas (contas já fechadas são ignoradas)
+        resultado = FechamentoService.fechar_mes(mes_fechamento, ano_fechamento)
         
-        # Processar cada conta
-        contas = Conta.objects.all()
-        fechamentos_realizados = []
-        
-        for conta in contas:
-            # Verificar se já existe fechamento para esta conta/mês/ano
-            if cls.objects.filter(conta=conta, mes=mes_fechamento, ano=ano_fechamento).exists():
-                logger.info(f"Fechamento já existe para {conta.nome} - {mes_fechamento}/{ano_fechamento}")
-                continue
-            
-            # Buscar transações do período
-            transacoes = Transacao.objects.filter(
-                conta=conta,
-                data__gte=data_inicio,
-                data__lte=data_fim
-            )
-            
-            # Calcular receitas e despesas
-            receitas = transacoes.filter(tipo=TipoTransacao.RECEITA).aggregate(
-                total=Sum('valor'))['total'] or Decimal('0.00')
-            despesas = transacoes.filter(tipo=TipoTransacao.DESPESA).aggregate(
-                total=Sum('valor'))['total'] or Decimal('0.00')
-            
-            # Buscar fechamento anterior para saldo inicial
-            fechamento_anterior = cls.objects.filter(
-                conta=conta
-            ).filter(
-                models.Q(ano__lt=ano_fechamento) | 
-                models.Q(ano=ano_fechamento, mes__lt=mes_fechamento)
-            ).order_by('-ano', '-mes').first()
-            
-            saldo_inicial = fechamento_anterior.saldo_final if fechamento_anterior else Decimal('0.00')
-            saldo_final = saldo_inicial + receitas - despesas
-            
-            # Criar fechamento
-            fechamento = cls.objects.create(
-                conta=conta,
-                mes=mes_fechamento,
-                ano=ano_fechamento,
-                saldo_inicial=saldo_inicial,
-                total_receitas=receitas,
-                total_despesas=despesas,
-                saldo_final=saldo_final,
-                data_inicio_periodo=data_inicio,
-                data_fim_periodo=data_fim,
-                data_fechamento=timezone.now(),
-                fechado=True
-            )
-            
-            fechamentos_realizados.append(fechamento)
-            logger.info(f"Fechamento automático realizado: {conta.nome} - {mes_fechamento}/{ano_fechamento}")
+        # Outra execução detém a trava de todos os tenants pendentes: não esperar nem recalcular
+        if resultado['em_andamento'] and not resultado['fechamentos']:
+            logger.info(f"Fechamento de {mes_fechamento}/{ano_fechamento} em andamento em outra execução")
+            return False, "Fechamento em andamento."
         
-        return True, fechamentos_realizados
+        return True, resultado['fechamentos']
+
+class TravaFechamento(models.Model):
+    """
+    Trava de fechamento por tenant e período, usada quando o banco não
+    oferece advisory locks (SQLite). A linha existe enquanto o fechamento
+    está em andamento; travas antigas são consideradas abandonadas.
+    """
+    chave = models.CharField(max_length=100, unique=True, help_text="Tenant e período travados")
+    dono = models.CharField(max_length=36, help_text="Identificador da execução que detém a trava")
+    criado_em = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Trava de Fechamento'
+        verbose_name_plural = 'Travas de Fechamento'
+    
+    def __str__(self):
+        return self.chave
 
 class ParcelaPlanejada(models.Model):
     """
@@ -781,6 +831,9 @@ class ParcelaPlanejada(models.Model):
     class Meta:
         ordering = ['numero_parcela']
         unique_together = [('despesa_parcelada', 'numero_parcela')]
+        indexes = [
+            models.Index(fields=['tenant_id', 'pago', 'data_vencimento'], name='parcela_tenant_vencimento_idx'),
+        ]
         verbose_name = 'Parcela Planejada'
         verbose_name_plural = 'Parcelas Planejadas'
     
@@ -839,9 +892,7 @@ class ParcelaPlanejada(models.Model):
         self.transacao_pagamento = transacao
         self.save()
         
-        # Atualizar saldo da conta
-        self.conta.atualizar_saldo()
-        
+        # O saldo da conta já foi ajustado pelo signal da transação
         return transacao
     
     def marcar_como_nao_pago(self):
@@ -855,9 +906,7 @@ class ParcelaPlanejada(models.Model):
         self.data_pagamento = None
         self.transacao_pagamento = None
         self.save()
-        
-        # Atualizar saldo da conta
-        self.conta.atualizar_saldo()
+        # O estorno no saldo da conta é feito pelo signal de exclusão da transação
 
 
 class PasswordResetToken(models.Model):
@@ -5,17 +5,33 @@ separando-a das views e models para melhor organização e testabilidade.
 """
 
 from decimal import Decimal
-from django.db import transaction
-from django.db.models import Sum, Q
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection, transaction, DatabaseError, IntegrityError
+from django.db.models import (
+    Sum, Q, F, Max, Count, Case, When, Value, BooleanField, DecimalField, OuterRef, Subquery, Exists, FilteredRelation,
+    FloatField
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncDay, TruncWeek, TruncMonth, TruncYear
 from django.utils import timezone
-from .utils import validar_data_futura, get_data_atual_brasil
+from .utils import validar_data_futura, get_data_atual_brasil, invalidar_periodos_fechados, periodos_fechados
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
+import json
 import logging
+import re
 import time
+import uuid
 
-from .models import Conta, Transacao
-from .constants import TipoTransacao, ErrorMessages, SuccessMessages
+from .models import Conta, Transacao, SaldoDiario, ResumoMensal, FechamentoMensal, TravaFechamento
+from .constants import (
+    TipoTransacao, ErrorMessages, SuccessMessages, FormatConfig, CacheConfig, PaginationConfig, BuscaConfig,
+    ImportacaoConfig
+)
 
 # Definir exceções localmente para evitar problemas de importação
 class ContaServiceError(Exception):
@@ -155,97 +171,2546 @@ class ContaService:
         start_time = time.time()
         
         try:
-            conta = Conta.objects.get(id=conta_id)
+            resumos = ContaService.obter_resumos_financeiros([conta_id], mes, ano)
+            if int(conta_id) not in resumos:
+                raise Conta.DoesNotExist
+            
+            resumo = resumos[int(conta_id)]
+            conta = resumo['conta']
+            receitas = resumo['receitas']
+            despesas = resumo['despesas']
+            movimento_mes = resumo['movimento_mes']
+            
+            # Log estruturado de sucesso
+            duration_ms = int((time.time() - start_time) * 1000)
+            logger.log_operation(
+                level=logging.INFO,
+                operation='GET_FINANCIAL_SUMMARY',
+                entity_type='Conta',
+                entity_id=conta_id,
+                message=f"Resumo financeiro gerado para conta {conta.nome} - {resumo['periodo']}",
+                duration_ms=duration_ms,
+                periodo=resumo['periodo'],
+                receitas=float(receitas),
+                despesas=float(despesas),
+                movimento_mes=float(movimento_mes),
+                total_transacoes=resumo['total_transacoes']
+            )
+            
+            return resumo
+            
+        except Conta.DoesNotExist:
+            logger.log_error(
+                operation='GET_FINANCIAL_SUMMARY',
+                error=f"Conta com ID {conta_id} não encontrada",
+                entity_type='Conta',
+                entity_id=conta_id,
+                error_code='CONTA_NOT_FOUND'
+            )
+            raise ContaServiceError(ErrorMessages.CONTA_INEXISTENTE)
+        except Exception as e:
+            logger.log_error(
+                operation='GET_FINANCIAL_SUMMARY',
+                error=e,
+                entity_type='Conta',
+                entity_id=conta_id,
+                error_code='UNEXPECTED_ERROR'
+            )
+            raise ContaServiceError(f"Erro ao gerar resumo: {str(e)}")
+    
+    @staticmethod
+    def obter_resumos_financeiros(conta_ids=None, mes=None, ano=None):
+        """
+        Obtém o resumo financeiro de várias contas em uma única consulta.
+        
+        Receitas, despesas e quantidade de transações do período vêm de uma
+        agregação condicional agrupada por conta (LEFT JOIN filtrado, de modo
+        que contas sem movimento também aparecem); o saldo anterior vem do
+        snapshot diário via subconsulta na mesma query. Como o movimento do
+        período, o saldo anterior exclui despesas parceladas: o movimento
+        parcelado dos meses anteriores (lido do cubo mensal) é descontado do
+        snapshot, de modo que saldo_atual = saldo_anterior + movimento_mes.
+        
+        Args:
+            conta_ids (list, optional): IDs das contas; por padrão todas as contas do tenant
+            mes (int, optional): Mês para filtrar (1-12)
+            ano (int, optional): Ano para filtrar
+        
+        Returns:
+            dict: Mapa {conta_id: resumo} com as mesmas chaves de obter_resumo_financeiro
+        """
+        start_time = time.time()
+        
+        # Se não especificado, usar mês/ano atual
+        if mes is None or ano is None:
+            hoje = get_data_atual_brasil()
+            mes = mes or hoje.month
+            ano = ano or hoje.year
+        
+        inicio = date(ano, mes, 1)
+        fim = inicio + relativedelta(months=1)
+        
+        saldo_anterior = SaldoDiario._base_manager.filter(
+            conta_id=OuterRef('pk'), data__lt=inicio
+        ).order_by('-data').values('saldo')[:1]
+        
+        # O snapshot inclui as despesas parceladas; o resumo as exclui, como no período
+        parceladas_anteriores = ResumoMensal._base_manager.filter(
+            Q(ano__lt=ano) | Q(ano=ano, mes__lt=mes),
+            conta_id=OuterRef('pk'),
+            parcelada=True,
+        ).order_by().values('conta_id').annotate(
+            movimento=Sum(Case(
+                When(tipo=TipoTransacao.RECEITA, then=F('total')),
+                When(tipo__in=TipoTransacao.get_expense_types(), then=-F('total')),
+                default=Value(Decimal('0.00')),
+                output_field=DecimalField(
+                    max_digits=FormatConfig.MAX_DIGITS,
+                    decimal_places=FormatConfig.DECIMAL_PLACES
+                ),
+            ))
+        ).values('movimento')
+        
+        contas = Conta.objects.all()
+        if conta_ids is not None:
+            contas = contas.filter(id__in=conta_ids)
+        
+        # Transações do período (EXCLUINDO despesas parceladas)
+        contas = contas.annotate(
+            movimento=FilteredRelation(
+                'transacao',
+                condition=Q(
+                    transacao__data__gte=inicio,
+                    transacao__data__lt=fim,
+                    transacao__despesa_parcelada__isnull=True,
+                )
+            )
+        ).annotate(
+            total_receitas=Sum('movimento__valor', filter=Q(movimento__tipo=TipoTransacao.RECEITA)),
+            total_despesas=Sum('movimento__valor', filter=Q(movimento__tipo__in=TipoTransacao.get_expense_types())),
+            total_transacoes=Count('movimento__id'),
+            saldo_anterior=Subquery(saldo_anterior),
+            parceladas_anteriores=Subquery(parceladas_anteriores),
+        )
+        
+        resumos = {}
+        for conta in contas:
+            receitas = conta.total_receitas or Decimal('0.00')
+            despesas = conta.total_despesas or Decimal('0.00')
+            anterior = (
+                (conta.saldo_anterior or Decimal('0.00'))
+                - (conta.parceladas_anteriores or Decimal('0.00'))
+            )
+            movimento_mes = receitas - despesas
+            
+            resumos[conta.id] = {
+                'conta': conta,
+                'periodo': f"{mes:02d}/{ano}",
+                'receitas': receitas,
+                'despesas': despesas,
+                'movimento_mes': movimento_mes,
+                'saldo_anterior': anterior,
+                'saldo_atual': anterior + movimento_mes,
+                'total_transacoes': conta.total_transacoes,
+            }
+        
+        duration_ms = int((time.time() - start_time) * 1000)
+        logger.info(
+            f"Resumos financeiros gerados para {len(resumos)} conta(s) - "
+            f"{mes:02d}/{ano} ({duration_ms}ms)"
+        )
+        
+        return resumos
+
+class _InvalidacaoPendente:
+    """Callback on_commit que invalida, uma vez cada, os tenants alterados na transação."""
+    
+    def __init__(self):
+        self.tenant_ids = set()
+    
+    def __call__(self):
+        for tenant_id in self.tenant_ids:
+            CacheTenant.invalidar(tenant_id)
+
+class CacheTenant:
+    """
+    Cache de resultados por tenant com chave versionada.
+    
+    Cada tenant tem um contador de versão que entra em todas as suas chaves.
+    Os signals de Transacao, Conta, Categoria e FechamentoMensal (e as
+    escritas em massa que não disparam signals) incrementam o contador no
+    commit: a invalidação é um único INCR, O(1) e exata. As entradas da
+    versão anterior nunca mais são lidas e expiram pelo próprio timeout
+    (todas as chaves versionadas têm validade; ver TENANT_DADOS_TIMEOUT).
+    
+    O cálculo de uma chave ausente ou vencida é feito por um único worker;
+    os demais servem o valor vencido, se houver, ou aguardam o resultado.
+    """
+    
+    @staticmethod
+    def tenant_atual():
+        """Retorna o tenant definido na conexão pelo TenantMiddleware."""
+        return getattr(connection, 'tenant_id', None)
+    
+    @staticmethod
+    def versao(tenant_id):
+        """
+        Retorna a versão atual dos dados de um tenant.
+        
+        A versão inicial é derivada do relógio, de modo que um contador
+        removido do cache nunca volte a um valor já usado.
+        """
+        chave = CacheConfig.TENANT_VERSAO_KEY.format(tenant_id=tenant_id)
+        versao = cache.get(chave)
+        if versao is None:
+            cache.add(chave, time.time_ns(), timeout=None)
+            versao = cache.get(chave)
+        return versao
+    
+    @staticmethod
+    def invalidar(tenant_id):
+        """
+        Incrementa a versão dos dados de um tenant, invalidando todas as suas entradas.
+        
+        Custa um único INCR por escrita; as entradas da versão anterior não são
+        excluídas aqui (no Redis isso exigiria SCAN + DEL) e expiram pelo timeout.
+        """
+        chave = CacheConfig.TENANT_VERSAO_KEY.format(tenant_id=tenant_id)
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, time.time_ns(), timeout=None)
+    
+    @staticmethod
+    def invalidar_no_commit(tenant_id):
+        """
+        Invalida o tenant quando a transação atual for confirmada (imediatamente em autocommit).
+        
+        Os tenants de uma mesma transação são acumulados em um único callback
+        on_commit, de modo que um lote de escritas incrementa a versão de cada
+        tenant uma só vez. O callback é procurado na fila da conexão: se um
+        rollback o descartou, um novo é registrado.
+        """
+        conexao = transaction.get_connection()
+        if not conexao.in_atomic_block:
+            CacheTenant.invalidar(tenant_id)
+            return
+        
+        pendente = next(
+            (funcao for _, funcao, _ in conexao.run_on_commit if isinstance(funcao, _InvalidacaoPendente)),
+            None
+        )
+        if pendente is None:
+            pendente = _InvalidacaoPendente()
+            transaction.on_commit(pendente)
+        pendente.tenant_ids.add(tenant_id)
+    
+    @staticmethod
+    def limpar(tenant_id):
+        """
+        Remove todas as entradas de cache de um tenant, inclusive os agregados de meses fechados.
+        
+        Returns:
+            int or None: Entradas removidas, ou None se o backend não exclui por prefixo
+                (nesse caso apenas a versão é incrementada)
+        """
+        from .cache import excluir_prefixo
+        removidas = excluir_prefixo(cache, CacheConfig.TENANT_KEY.format(tenant_id=tenant_id))
+        if removidas is None:
+            CacheTenant.invalidar(tenant_id)
+        return removidas
+    
+    @staticmethod
+    def chave(nome, *partes, tenant_id=None):
+        """
+        Monta a chave de um resultado na versão atual dos dados do tenant.
+        
+        Args:
+            nome (str): Nome do resultado
+            *partes: Demais componentes da chave
+            tenant_id (int, optional): Tenant. Padrão: tenant da conexão
+        
+        Returns:
+            str: Chave de cache
+        """
+        if tenant_id is None:
+            tenant_id = CacheTenant.tenant_atual()
+        return CacheConfig.TENANT_DADOS_KEY.format(
+            tenant_id=tenant_id,
+            versao=CacheTenant.versao(tenant_id),
+            nome=nome,
+            partes=':'.join(str(parte) for parte in partes),
+        )
+    
+    @staticmethod
+    def obter_ou_calcular(nome, calcular, *partes, tenant_id=None, timeout=CacheConfig.TENANT_DADOS_TIMEOUT):
+        """
+        Lê um resultado do cache do tenant ou o calcula e grava.
+        
+        Args:
+            nome (str): Nome do resultado (ex.: 'dashboard_modern')
+            calcular (callable): Função sem argumentos que produz o resultado
+            *partes: Demais componentes da chave (ex.: ano e mês)
+            tenant_id (int, optional): Tenant. Padrão: tenant da conexão
+            timeout (int): Validade em segundos; é por ela que entradas de versões
+                anteriores deixam o cache
+        
+        Returns:
+            object: Resultado em cache ou recém-calculado
+        """
+        chave = CacheTenant.chave(nome, *partes, tenant_id=tenant_id)
+        return CacheTenant.calcular_unico(chave, calcular, timeout)
+    
+    @staticmethod
+    def calcular_unico(chave, calcular, timeout):
+        """
+        Lê uma chave do cache, garantindo que só um worker a recalcule por vez.
+        
+        O valor é guardado com a data em que vence; depois dela continua no
+        cache por VALOR_VENCIDO_TIMEOUT segundos. Quem obtém a trava de cálculo
+        recalcula; os demais servem o valor vencido ou, se a chave não existe,
+        aguardam até CALCULO_ESPERA_MAXIMA segundos antes de calcular por conta
+        própria.
+        
+        Args:
+            chave (str): Chave do cache
+            calcular (callable): Função sem argumentos que produz o valor
+            timeout (int or None): Validade em segundos (None: não vence)
+        
+        Returns:
+            object: Valor em cache ou recém-calculado
+        """
+        entrada = cache.get(chave)
+        if entrada is not None and (entrada['vence_em'] is None or entrada['vence_em'] > time.time()):
+            return entrada['valor']
+        
+        trava = CacheConfig.CALCULO_TRAVA_KEY.format(chave=chave)
+        if cache.add(trava, 1, timeout=CacheConfig.CALCULO_TRAVA_TIMEOUT):
+            try:
+                valor = calcular()
+                CacheTenant._gravar_entrada(chave, valor, timeout)
+            finally:
+                cache.delete(trava)
+            return valor
+        
+        # Outro worker está recalculando
+        if entrada is not None:
+            return entrada['valor']
+        
+        limite = time.monotonic() + CacheConfig.CALCULO_ESPERA_MAXIMA
+        espera = 0.01
+        while time.monotonic() < limite:
+            time.sleep(espera)
+            espera = min(espera * 2, 0.25)
+            entrada = cache.get(chave)
+            if entrada is not None:
+                return entrada['valor']
+            if not cache.has_key(trava):
+                break
+        
+        # O cálculo do outro worker falhou ou demorou demais
+        valor = calcular()
+        CacheTenant._gravar_entrada(chave, valor, timeout)
+        return valor
+    
+    @staticmethod
+    def _gravar_entrada(chave, valor, timeout):
+        if timeout is None:
+            cache.set(chave, {'valor': valor, 'vence_em': None}, timeout=None)
+        else:
+            cache.set(
+                chave,
+                {'valor': valor, 'vence_em': time.time() + timeout},
+                timeout=timeout + CacheConfig.VALOR_VENCIDO_TIMEOUT,
+            )
+
+# Lote de saldo ativo no contexto atual (ContextVar isola threads e greenlets do gevent)
+_lote_saldo_atual = ContextVar('lote_saldo_atual', default=None)
+
+class LoteSaldo:
+    """
+    Acumula as alterações de saldo de um bloco de operações em massa.
+    
+    Cada escrita registra sua contribuição via transaction.on_commit, de modo
+    que escritas desfeitas por rollback (inclusive de savepoints internos) são
+    descartadas. Ao final, os deltas são aplicados uma única vez por conta
+    (e por dia no snapshot diário). Ver SaldoService.lote().
+    """
+    
+    def __init__(self):
+        self.deltas = {}
+        self.deltas_diarios = {}
+        self.deltas_resumo = {}
+        self.tenants = {}
+        self.contas_recalcular = set()
+    
+    def registrar(self, anterior, atual):
+        """Registra a alteração de uma transação para aplicação no commit."""
+        transaction.on_commit(lambda: self._acumular(anterior, atual))
+    
+    def registrar_muitos(self, estados):
+        """
+        Registra de uma vez transações criadas sem signals (ex.: bulk_create).
+        
+        Args:
+            estados (list): Estados de SaldoService.estado_transacao das novas transações
+        """
+        def acumular():
+            for estado in estados:
+                self._acumular(None, estado)
+        transaction.on_commit(acumular)
+    
+    def recalcular(self, *conta_ids):
+        """
+        Marca contas para recálculo completo no commit.
+        
+        Usado por operações que escrevem sem disparar signals, como
+        QuerySet.update().
+        """
+        transaction.on_commit(lambda: self.contas_recalcular.update(conta_ids))
+    
+    def _acumular(self, anterior, atual):
+        for conta_id, delta in SaldoService.calcular_deltas(anterior, atual).items():
+            self.deltas[conta_id] = self.deltas.get(conta_id, Decimal('0.00')) + delta
+        for chave, delta in SaldoService.calcular_deltas_diarios(anterior, atual).items():
+            self.deltas_diarios[chave] = self.deltas_diarios.get(chave, Decimal('0.00')) + delta
+        for chave, (total, quantidade) in ResumoMensalService.calcular_deltas(anterior, atual).items():
+            total_atual, quantidade_atual = self.deltas_resumo.get(chave, (Decimal('0.00'), 0))
+            self.deltas_resumo[chave] = (total_atual + total, quantidade_atual + quantidade)
+        for estado in (anterior, atual):
+            if estado:
+                self.tenants[estado['conta_id']] = estado.get('tenant_id')
+    
+    def aplicar(self):
+        """
+        Aplica os deltas acumulados: um UPDATE por conta, um por (conta, dia)
+        e um por célula do cubo mensal.
+        
+        Contas marcadas para recálculo são reagregadas e têm o snapshot e o
+        cubo reconstruídos, dispensando seus deltas.
+        
+        Escritas em massa não passam pela validação de mês fechado, então os
+        agregados em CachePeriodoFechado dos meses alterados (todos os meses
+        fechados, para as contas recalculadas) também são descartados.
+        """
+        deltas = {
+            conta_id: delta for conta_id, delta in self.deltas.items()
+            if delta and conta_id not in self.contas_recalcular
+        }
+        deltas_diarios = {
+            chave: delta for chave, delta in self.deltas_diarios.items()
+            if delta and chave[0] not in self.contas_recalcular
+        }
+        deltas_resumo = {
+            chave: delta for chave, delta in self.deltas_resumo.items()
+            if any(delta) and chave[0] not in self.contas_recalcular
+        }
+        
+        with transaction.atomic():
+            SaldoService.aplicar_deltas(deltas)
+            SaldoService.aplicar_deltas_diarios(deltas_diarios, self.tenants)
+            ResumoMensalService.aplicar_deltas(deltas_resumo, self.tenants)
+            
+            tenants = set(self.tenants.values())
+            contas_tenant = dict(self.tenants)
+            meses_alterados = {}
+            for conta_id, data in deltas_diarios:
+                meses_alterados.setdefault(conta_id, set()).add((data.year, data.month))
+            for conta_id, _, _, ano, mes, _ in deltas_resumo:
+                meses_alterados.setdefault(conta_id, set()).add((ano, mes))
+            
+            if self.contas_recalcular:
+                for conta in Conta._base_manager.filter(id__in=self.contas_recalcular):
+                    conta.atualizar_saldo()
+                    tenants.add(conta.tenant_id)
+                    contas_tenant[conta.id] = conta.tenant_id
+                SaldoService.reconstruir_saldos_diarios(list(self.contas_recalcular))
+                ResumoMensalService.reconstruir(list(self.contas_recalcular))
+                for conta_id, ano, mes in FechamentoMensal._base_manager.filter(
+                    conta_id__in=self.contas_recalcular
+                ).values_list('conta_id', 'ano', 'mes'):
+                    meses_alterados.setdefault(conta_id, set()).add((ano, mes))
+        
+        # Os saldos mudaram depois dos signals das transações
+        for tenant_id in tenants:
+            CacheTenant.invalidar(tenant_id)
+        for conta_id, meses in meses_alterados.items():
+            CachePeriodoFechado.invalidar(contas_tenant.get(conta_id), conta_id, sorted(meses))
+        
+        logger.info(
+            f"Lote de saldo aplicado - {len(deltas)} conta(s) por delta, "
+            f"{len(self.contas_recalcular)} conta(s) recalculada(s)"
+        )
+
+class SaldoService:
+    """
+    Serviço para manutenção incremental do saldo das contas.
+    
+    Em vez de reagregar todo o histórico da conta a cada escrita, aplica
+    apenas a variação (delta) causada pela transação alterada, usando
+    UPDATEs atômicos com F(). O recálculo completo continua disponível
+    em Conta.atualizar_saldo() / ContaService.atualizar_saldo_conta().
+    
+    O mesmo delta mantém o snapshot diário (SaldoDiario), que responde
+    "qual era o saldo em uma data" com uma única leitura indexada.
+    
+    Operações em massa devem rodar dentro de SaldoService.lote(), que
+    aplica os deltas uma única vez por conta no commit.
+    """
+    
+    
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Agrupa as atualizações de saldo de um bloco em um único ajuste por conta.
+        
+        Enquanto o bloco executa, os signals apenas acumulam os deltas; eles são
+        aplicados em um callback transaction.on_commit registrado na saída do
+        bloco. Lotes aninhados reutilizam o lote mais externo.
+        
+        Também pode ser usado como decorador (@SaldoService.lote()).
+        
+        Exemplo:
+            with SaldoService.lote():
+                for linha in linhas:
+                    Transacao.objects.create(...)
+        
+        Yields:
+            LoteSaldo: Lote ativo, que aceita recalcular() para escritas sem signals
+        """
+        lote = _lote_saldo_atual.get()
+        if lote is not None:
+            yield lote
+            return
+        
+        lote = LoteSaldo()
+        token = _lote_saldo_atual.set(lote)
+        try:
+            yield lote
+        finally:
+            _lote_saldo_atual.reset(token)
+            # Registrado mesmo em caso de erro: em autocommit as linhas já
+            # gravadas precisam do ajuste; sob atomic o rollback descarta o callback
+            transaction.on_commit(lote.aplicar)
+    
+    @staticmethod
+    def lote_ativo():
+        """
+        Retorna o lote de saldo ativo no contexto atual.
+        
+        Returns:
+            LoteSaldo: Lote ativo ou None
+        """
+        return _lote_saldo_atual.get()
+    
+    @staticmethod
+    def estado_transacao(transacao):
+        """
+        Extrai os campos de uma transação que influenciam o saldo.
+        
+        Args:
+            transacao (Transacao): Transação de origem
+        
+        Returns:
+            dict: conta_id, categoria_id, despesa_parcelada_id, tipo, valor, data e tenant_id
+        """
+        return {
+            'conta_id': transacao.conta_id,
+            'categoria_id': transacao.categoria_id,
+            'despesa_parcelada_id': transacao.despesa_parcelada_id,
+            'tipo': transacao.tipo,
+            'valor': transacao.valor,
+            'data': transacao.data,
+            'tenant_id': transacao.tenant_id,
+        }
+    
+    @staticmethod
+    def _movimentos(anterior, atual):
+        """Gera (estado, delta assinado) para os estados de uma alteração."""
+        for estado, fator in ((anterior, -1), (atual, 1)):
+            if not estado or estado.get('conta_id') is None:
+                continue
+            valor = Decimal(str(estado['valor'] or '0'))
+            yield estado, TipoTransacao.sinal(estado['tipo']) * valor * fator
+    
+    @staticmethod
+    def calcular_deltas(anterior, atual):
+        """
+        Calcula a variação de saldo por conta entre dois estados de uma transação.
+        
+        Uma criação tem apenas o estado atual, uma exclusão apenas o anterior e
+        uma edição ambos - o que cobre mudanças de valor, tipo e conta.
+        
+        Args:
+            anterior (dict, optional): Estado antes da escrita
+            atual (dict, optional): Estado depois da escrita
+        
+        Returns:
+            dict: Mapa {conta_id: Decimal} apenas com deltas diferentes de zero
+        """
+        deltas = {}
+        for estado, delta in SaldoService._movimentos(anterior, atual):
+            deltas[estado['conta_id']] = deltas.get(estado['conta_id'], Decimal('0.00')) + delta
+        
+        return {conta_id: delta for conta_id, delta in deltas.items() if delta}
+    
+    @staticmethod
+    def calcular_deltas_diarios(anterior, atual):
+        """
+        Calcula a variação de saldo por conta e dia entre dois estados de uma transação.
+        
+        Args:
+            anterior (dict, optional): Estado antes da escrita
+            atual (dict, optional): Estado depois da escrita
+        
+        Returns:
+            dict: Mapa {(conta_id, data): Decimal} apenas com deltas diferentes de zero
+        """
+        deltas = {}
+        for estado, delta in SaldoService._movimentos(anterior, atual):
+            chave = (estado['conta_id'], estado['data'])
+            deltas[chave] = deltas.get(chave, Decimal('0.00')) + delta
+        
+        return {chave: delta for chave, delta in deltas.items() if delta}
+    
+    @staticmethod
+    def aplicar_deltas(deltas):
+        """
+        Aplica deltas de saldo às contas com um UPDATE atômico por conta.
+        
+        Args:
+            deltas (dict): Mapa {conta_id: Decimal}
+        """
+        for conta_id, delta in deltas.items():
+            Conta._base_manager.filter(id=conta_id).update(saldo=F('saldo') + delta)
+    
+    @staticmethod
+    def aplicar_deltas_diarios(deltas, tenants=None):
+        """
+        Propaga deltas para o snapshot diário.
+        
+        Garante a linha do dia (partindo do saldo do dia anterior mais próximo)
+        e soma o delta nela e em todas as linhas posteriores da conta com um
+        único UPDATE por (conta, dia).
+        
+        Args:
+            deltas (dict): Mapa {(conta_id, data): Decimal}
+            tenants (dict, optional): Mapa {conta_id: tenant_id} para novas linhas
+        """
+        tenants = tenants or {}
+        snapshot = SaldoDiario._base_manager
+        
+        for (conta_id, data), delta in sorted(deltas.items()):
+            if not snapshot.filter(conta_id=conta_id, data=data).exists():
+                saldo_base = snapshot.filter(
+                    conta_id=conta_id, data__lt=data
+                ).order_by('-data').values_list('saldo', flat=True).first()
+                snapshot.get_or_create(
+                    conta_id=conta_id,
+                    data=data,
+                    defaults={
+                        'saldo': saldo_base or Decimal('0.00'),
+                        'tenant_id': tenants.get(conta_id),
+                    }
+                )
+            snapshot.filter(conta_id=conta_id, data__gte=data).update(saldo=F('saldo') + delta)
+    
+    @staticmethod
+    def registrar_alteracao(anterior, atual):
+        """
+        Atualiza os saldos, o snapshot diário e o cubo mensal afetados pela alteração de uma transação.
+        
+        Dentro de SaldoService.lote() a alteração é apenas acumulada no lote.
+        
+        Args:
+            anterior (dict, optional): Estado antes da escrita
+            atual (dict, optional): Estado depois da escrita
+        
+        Returns:
+            dict: Deltas aplicados por conta (vazio quando adiados para o lote)
+        """
+        lote = _lote_saldo_atual.get()
+        if lote is not None:
+            lote.registrar(anterior, atual)
+            return {}
+        
+        deltas = SaldoService.calcular_deltas(anterior, atual)
+        SaldoService.aplicar_deltas(deltas)
+        
+        tenants = {
+            estado['conta_id']: estado.get('tenant_id')
+            for estado in (anterior, atual) if estado
+        }
+        SaldoService.aplicar_deltas_diarios(
+            SaldoService.calcular_deltas_diarios(anterior, atual), tenants
+        )
+        ResumoMensalService.aplicar_deltas(
+            ResumoMensalService.calcular_deltas(anterior, atual), tenants
+        )
+        return deltas
+    
+    @staticmethod
+    def registrar_criacoes(transacoes):
+        """
+        Aplica o efeito de transações criadas em massa, que não disparam signals.
+        
+        Os saldos, o snapshot diário e o cubo mensal recebem um único ajuste
+        por conta (e por dia/célula) quando o bloco é confirmado.
+        
+        Args:
+            transacoes (list): Transações recém-criadas (ex.: retorno de bulk_create)
+        """
+        with SaldoService.lote() as lote:
+            lote.registrar_muitos([SaldoService.estado_transacao(transacao) for transacao in transacoes])
+    
+    @staticmethod
+    def saldo_em(conta_id, data):
+        """
+        Obtém o saldo de uma conta ao final de uma data.
+        
+        Args:
+            conta_id (int): ID da conta
+            data (date): Data de referência
+        
+        Returns:
+            Decimal: Saldo acumulado até a data (inclusive)
+        """
+        saldo = SaldoDiario._base_manager.filter(
+            conta_id=conta_id, data__lte=data
+        ).order_by('-data').values_list('saldo', flat=True).first()
+        return saldo if saldo is not None else Decimal('0.00')
+    
+    @staticmethod
+    def saldos_em(data, conta_ids=None):
+        """
+        Obtém o saldo de várias contas ao final de uma data em uma única consulta.
+        
+        Args:
+            data (date): Data de referência
+            conta_ids (list, optional): IDs das contas; por padrão todas as contas do tenant
+        
+        Returns:
+            dict: Mapa {conta_id: Decimal}
+        """
+        ultimo_saldo = SaldoDiario._base_manager.filter(
+            conta_id=OuterRef('pk'), data__lte=data
+        ).order_by('-data').values('saldo')[:1]
+        
+        contas = Conta.objects.all()
+        if conta_ids is not None:
+            contas = contas.filter(id__in=conta_ids)
+        
+        return {
+            conta['id']: conta['saldo_em'] if conta['saldo_em'] is not None else Decimal('0.00')
+            for conta in contas.annotate(saldo_em=Subquery(ultimo_saldo)).values('id', 'saldo_em')
+        }
+    
+    @staticmethod
+    def reconstruir_saldos_diarios(conta_ids=None, batch_size=1000):
+        """
+        Reconstrói o snapshot diário a partir das transações.
+        
+        Usa uma única agregação agrupada por (conta, dia) e acumula o saldo
+        em memória, gravando as linhas com bulk_create.
+        
+        Args:
+            conta_ids (list, optional): Restringe a reconstrução a estas contas
+            batch_size (int): Tamanho dos lotes do bulk_create
+        
+        Returns:
+            int: Quantidade de linhas gravadas
+        """
+        transacoes = Transacao._base_manager.all()
+        snapshot = SaldoDiario._base_manager.all()
+        if conta_ids is not None:
+            transacoes = transacoes.filter(conta_id__in=conta_ids)
+            snapshot = snapshot.filter(conta_id__in=conta_ids)
+        
+        movimentos = transacoes.values('conta_id', 'data').annotate(
+            receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+            despesas=Sum('valor', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+            tenant=Max('tenant_id'),
+        ).order_by('conta_id', 'data')
+        
+        linhas = []
+        conta_atual = None
+        saldo = Decimal('0.00')
+        for movimento in movimentos.iterator():
+            if movimento['conta_id'] != conta_atual:
+                conta_atual = movimento['conta_id']
+                saldo = Decimal('0.00')
+            saldo += (movimento['receitas'] or Decimal('0.00')) - (movimento['despesas'] or Decimal('0.00'))
+            linhas.append(SaldoDiario(
+                conta_id=conta_atual,
+                data=movimento['data'],
+                saldo=saldo,
+                tenant_id=movimento['tenant'],
+            ))
+        
+        with transaction.atomic():
+            snapshot.delete()
+            SaldoDiario._base_manager.bulk_create(linhas, batch_size=batch_size)
+        
+        logger.info(f"Snapshot diário reconstruído: {len(linhas)} linhas")
+        return len(linhas)
+    
+    @staticmethod
+    def divergencias_saldo(contas=None, chunk_size=2000):
+        """
+        Compara o saldo registrado de cada conta com o razão (ledger) de transações.
+        
+        Percorre as contas em blocos por chave (id > último id), cada bloco em uma
+        única consulta agrupada - LEFT JOIN com as transações, somas condicionais e
+        o último snapshot diário via subconsulta - lida com cursor de servidor
+        (QuerySet.iterator). Saldo registrado e razão saem do mesmo comando SQL,
+        portanto de um mesmo instante consistente.
+        
+        Args:
+            contas (QuerySet, optional): Contas a verificar; por padrão todas, sem filtro de tenant
+            chunk_size (int): Quantidade de contas por bloco
+        
+        Yields:
+            dict: Divergência com conta_id, tenant_id, saldo_registrado, saldo_calculado,
+                saldo_snapshot, diferenca_saldo e diferenca_snapshot
+        """
+        if contas is None:
+            contas = Conta._base_manager.all()
+        
+        ultimo_snapshot = SaldoDiario._base_manager.filter(
+            conta_id=OuterRef('pk')
+        ).order_by('-data').values('saldo')[:1]
+        
+        contas = contas.annotate(
+            receitas=Sum('transacao__valor', filter=Q(transacao__tipo=TipoTransacao.RECEITA)),
+            despesas=Sum('transacao__valor', filter=Q(transacao__tipo__in=TipoTransacao.get_expense_types())),
+            saldo_snapshot=Subquery(ultimo_snapshot),
+        ).values(
+            'id', 'tenant_id', 'saldo', 'receitas', 'despesas', 'saldo_snapshot'
+        ).order_by('id')
+        
+        ultimo_id = 0
+        while True:
+            lidas = 0
+            for conta in contas.filter(id__gt=ultimo_id)[:chunk_size].iterator(chunk_size=chunk_size):
+                lidas += 1
+                ultimo_id = conta['id']
+                
+                calculado = (conta['receitas'] or Decimal('0.00')) - (conta['despesas'] or Decimal('0.00'))
+                registrado = conta['saldo'] if conta['saldo'] is not None else Decimal('0.00')
+                snapshot = conta['saldo_snapshot'] if conta['saldo_snapshot'] is not None else Decimal('0.00')
+                
+                if registrado != calculado or snapshot != calculado:
+                    yield {
+                        'conta_id': conta['id'],
+                        'tenant_id': conta['tenant_id'],
+                        'saldo_registrado': registrado,
+                        'saldo_calculado': calculado,
+                        'saldo_snapshot': snapshot,
+                        'diferenca_saldo': calculado - registrado,
+                        'diferenca_snapshot': calculado - snapshot,
+                    }
+            
+            if lidas < chunk_size:
+                break
+    
+    @staticmethod
+    def corrigir_divergencias(divergencias, batch_size=500):
+        """
+        Corrige divergências encontradas por divergencias_saldo em lotes.
+        
+        O saldo é ajustado somando a diferença (saldo = saldo + diferença) com um
+        UPDATE ... CASE por lote, preservando deltas aplicados por escritas
+        concorrentes após a verificação. Contas com snapshot divergente têm o
+        snapshot diário reconstruído, também em lotes.
+        
+        Args:
+            divergencias (list): Divergências retornadas por divergencias_saldo
+            batch_size (int): Quantidade de contas por UPDATE
+        
+        Returns:
+            tuple: (saldos corrigidos, snapshots reconstruídos)
+        """
+        saldos = [d for d in divergencias if d['diferenca_saldo']]
+        for inicio in range(0, len(saldos), batch_size):
+            lote = saldos[inicio:inicio + batch_size]
+            Conta._base_manager.filter(id__in=[d['conta_id'] for d in lote]).update(
+                saldo=F('saldo') + Case(
+                    *[When(id=d['conta_id'], then=Value(d['diferenca_saldo'])) for d in lote],
+                    default=Value(Decimal('0.00')),
+                    output_field=DecimalField(
+                        max_digits=FormatConfig.MAX_DIGITS,
+                        decimal_places=FormatConfig.DECIMAL_PLACES
+                    ),
+                )
+            )
+        
+        snapshots = [d['conta_id'] for d in divergencias if d['diferenca_snapshot']]
+        for inicio in range(0, len(snapshots), batch_size):
+            SaldoService.reconstruir_saldos_diarios(snapshots[inicio:inicio + batch_size])
+        
+        # Correções são UPDATEs diretos, sem signals
+        for tenant_id in {d['tenant_id'] for d in divergencias}:
+            CacheTenant.invalidar(tenant_id)
+        
+        logger.info(
+            f"Divergências corrigidas - {len(saldos)} saldo(s), "
+            f"{len(snapshots)} snapshot(s) reconstruído(s)"
+        )
+        return len(saldos), len(snapshots)
+
+class ResumoMensalService:
+    """
+    Serviço do cubo de agregados mensais (ResumoMensal).
+    
+    Mantém soma e quantidade de transações por (conta, categoria, tipo, ano, mês)
+    a partir dos mesmos deltas usados para os saldos, e oferece a API de consulta
+    usada por dashboards, relatórios e fechamentos - cujo custo passa a depender
+    do número de meses e categorias, não do número de transações.
+    """
+    
+    @staticmethod
+    def calcular_deltas(anterior, atual):
+        """
+        Calcula a variação do cubo entre dois estados de uma transação.
+        
+        Args:
+            anterior (dict, optional): Estado antes da escrita
+            atual (dict, optional): Estado depois da escrita
+        
+        Returns:
+            dict: Mapa {(conta_id, categoria_id, tipo, ano, mes, parcelada): (total, quantidade)}
+                apenas com variações diferentes de zero
+        """
+        deltas = {}
+        for estado, fator in ((anterior, -1), (atual, 1)):
+            if not estado or estado.get('conta_id') is None or estado.get('categoria_id') is None:
+                continue
+            chave = (
+                estado['conta_id'],
+                estado['categoria_id'],
+                estado['tipo'],
+                estado['data'].year,
+                estado['data'].month,
+                estado.get('despesa_parcelada_id') is not None,
+            )
+            total, quantidade = deltas.get(chave, (Decimal('0.00'), 0))
+            deltas[chave] = (
+                total + Decimal(str(estado['valor'] or '0')) * fator,
+                quantidade + fator,
+            )
+        
+        return {chave: delta for chave, delta in deltas.items() if any(delta)}
+    
+    @staticmethod
+    def aplicar_deltas(deltas, tenants=None):
+        """
+        Aplica variações ao cubo com um UPDATE atômico por célula.
+        
+        Células inexistentes são criadas; células que ficam sem transações
+        são removidas.
+        
+        Args:
+            deltas (dict): Mapa retornado por calcular_deltas
+            tenants (dict, optional): Mapa {conta_id: tenant_id} para novas células
+        """
+        tenants = tenants or {}
+        cubo = ResumoMensal._base_manager
+        
+        for (conta_id, categoria_id, tipo, ano, mes, parcelada), (total, quantidade) in deltas.items():
+            celula = cubo.filter(
+                conta_id=conta_id, categoria_id=categoria_id, tipo=tipo,
+                ano=ano, mes=mes, parcelada=parcelada
+            )
+            if not celula.update(total=F('total') + total, quantidade=F('quantidade') + quantidade):
+                try:
+                    with transaction.atomic():
+                        cubo.create(
+                            conta_id=conta_id, categoria_id=categoria_id, tipo=tipo,
+                            ano=ano, mes=mes, parcelada=parcelada,
+                            total=total, quantidade=quantidade,
+                            tenant_id=tenants.get(conta_id),
+                        )
+                except IntegrityError:
+                    # Criada por uma escrita concorrente
+                    celula.update(total=F('total') + total, quantidade=F('quantidade') + quantidade)
+            elif quantidade < 0:
+                celula.filter(quantidade__lte=0).delete()
+    
+    @staticmethod
+    def reconstruir(conta_ids=None, batch_size=1000):
+        """
+        Reconstrói o cubo a partir das transações com uma única agregação agrupada.
+        
+        Args:
+            conta_ids (list, optional): Restringe a reconstrução a estas contas
+            batch_size (int): Tamanho dos lotes do bulk_create
+        
+        Returns:
+            int: Quantidade de células gravadas
+        """
+        transacoes = Transacao._base_manager.all()
+        cubo = ResumoMensal._base_manager.all()
+        if conta_ids is not None:
+            transacoes = transacoes.filter(conta_id__in=conta_ids)
+            cubo = cubo.filter(conta_id__in=conta_ids)
+        
+        agregados = transacoes.annotate(
+            ano_ref=ExtractYear('data'),
+            mes_ref=ExtractMonth('data'),
+            parcelada_ref=Case(
+                When(despesa_parcelada__isnull=False, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        ).values(
+            'conta_id', 'categoria_id', 'tipo', 'ano_ref', 'mes_ref', 'parcelada_ref'
+        ).annotate(
+            soma=Sum('valor'),
+            contagem=Count('id'),
+            tenant=Max('tenant_id'),
+        ).order_by()
+        
+        celulas = [
+            ResumoMensal(
+                conta_id=linha['conta_id'],
+                categoria_id=linha['categoria_id'],
+                tipo=linha['tipo'],
+                ano=linha['ano_ref'],
+                mes=linha['mes_ref'],
+                parcelada=linha['parcelada_ref'],
+                total=linha['soma'] or Decimal('0.00'),
+                quantidade=linha['contagem'],
+                tenant_id=linha['tenant'],
+            )
+            for linha in agregados.iterator()
+        ]
+        
+        with transaction.atomic():
+            cubo.delete()
+            ResumoMensal._base_manager.bulk_create(celulas, batch_size=batch_size)
+        
+        logger.info(f"Cubo mensal reconstruído: {len(celulas)} células")
+        return len(celulas)
+    
+    @staticmethod
+    def filtrar(inicio=None, fim=None, tipos=None, conta_ids=None, categoria_ids=None, excluir_parceladas=True):
+        """
+        Retorna as células do cubo do tenant atual que atendem aos filtros.
+        
+        Args:
+            inicio (date, optional): Primeiro mês do período (o dia é ignorado)
+            fim (date, optional): Último mês do período, inclusive (o dia é ignorado)
+            tipos (list, optional): Tipos de transação
+            conta_ids (list, optional): IDs das contas
+            categoria_ids (list, optional): IDs das categorias
+            excluir_parceladas (bool): Exclui transações de despesas parceladas
+        
+        Returns:
+            QuerySet: Células de ResumoMensal
+        """
+        celulas = ResumoMensal.objects.all()
+        if inicio is not None:
+            celulas = celulas.filter(Q(ano__gt=inicio.year) | Q(ano=inicio.year, mes__gte=inicio.month))
+        if fim is not None:
+            celulas = celulas.filter(Q(ano__lt=fim.year) | Q(ano=fim.year, mes__lte=fim.month))
+        if tipos is not None:
+            celulas = celulas.filter(tipo__in=tipos)
+        if conta_ids is not None:
+            celulas = celulas.filter(conta_id__in=conta_ids)
+        if categoria_ids is not None:
+            celulas = celulas.filter(categoria_id__in=categoria_ids)
+        if excluir_parceladas:
+            celulas = celulas.filter(parcelada=False)
+        return celulas
+    
+    @staticmethod
+    def totais(agrupar_por=(), **filtros):
+        """
+        Soma o cubo agrupando pelas dimensões informadas.
+        
+        Args:
+            agrupar_por (tuple): Campos de ResumoMensal (ex.: ('categoria_id',), ('ano', 'mes', 'tipo'))
+                ou lookups relacionados (ex.: 'categoria__nome')
+            **filtros: Filtros aceitos por filtrar()
+        
+        Returns:
+            QuerySet: Dicionários com os campos agrupados, total e quantidade
+                (sem agrupamento, um único dicionário com os totais gerais)
+        
+        Exemplo:
+            ResumoMensalService.totais(('categoria_id',), inicio=hoje, fim=hoje,
+                                       tipos=TipoTransacao.get_expense_types())
+        """
+        celulas = ResumoMensalService.filtrar(**filtros)
+        if not agrupar_por:
+            return celulas.aggregate(total=Sum('total'), quantidade=Sum('quantidade'))
+        return celulas.values(*agrupar_por).annotate(
+            total=Sum('total'), quantidade=Sum('quantidade')
+        ).order_by(*agrupar_por)
+
+class FechamentoService:
+    """
+    Motor de fechamento mensal set-based.
+    
+    Calcula os fechamentos de todas as contas de todos os tenants com consultas
+    agrupadas: os totais do mês vêm do cubo (ResumoMensal) e o saldo inicial é
+    encadeado do fechamento anterior da conta, ou do snapshot diário quando a
+    conta ainda não tem fechamentos. As linhas são gravadas com bulk_create.
+    """
+    
+    TEMPO_MAXIMO_TRAVA = timedelta(minutes=10)
+    
+    @staticmethod
+    def periodo(mes, ano):
+        """
+        Retorna o primeiro e o último dia de um mês.
+        
+        Args:
+            mes (int): Mês (1-12)
+            ano (int): Ano
+        
+        Returns:
+            tuple: (data_inicio, data_fim)
+        """
+        data_inicio = date(ano, mes, 1)
+        return data_inicio, data_inicio + relativedelta(months=1) - timedelta(days=1)
+    
+    @staticmethod
+    def mes_anterior(hoje=None):
+        """
+        Retorna o mês que deve ser fechado: o anterior à data informada.
+        
+        Args:
+            hoje (date, optional): Data de referência. Padrão: data atual no Brasil
+        
+        Returns:
+            tuple: (mes, ano)
+        """
+        hoje = hoje or get_data_atual_brasil()
+        anterior = hoje.replace(day=1) - timedelta(days=1)
+        return anterior.month, anterior.year
+    
+    @staticmethod
+    def status_fechamento(mes=None, ano=None):
+        """
+        Retorna o status do fechamento de um mês para o tenant da conexão.
+        
+        O status vem do banco (contas do tenant ainda sem FechamentoMensal no
+        mês), de modo que vale qualquer que seja o processo que fechou o mês,
+        inclusive o cron com um cache próprio. O resultado fica no cache
+        versionado do tenant: por FECHAMENTO_STATUS_PENDENTE_TIMEOUT segundos
+        enquanto há contas pendentes e até o fim do mês corrente quando concluído.
+        
+        Args:
+            mes (int, optional): Mês. Padrão: mês anterior
+            ano (int, optional): Ano. Padrão: ano do mês anterior
+        
+        Returns:
+            dict: {'mes', 'ano', 'concluido', 'contas_pendentes'}
+        """
+        if mes is None or ano is None:
+            mes, ano = FechamentoService.mes_anterior()
+        
+        tenant_id = CacheTenant.tenant_atual()
+        chave = CacheTenant.chave('fechamento:status', ano, mes, tenant_id=tenant_id)
+        status = cache.get(chave)
+        if status is None:
+            pendentes = Conta._base_manager.filter(tenant_id=tenant_id).exclude(
+                Exists(FechamentoMensal._base_manager.filter(conta_id=OuterRef('pk'), mes=mes, ano=ano))
+            ).count()
+            status = {'mes': mes, 'ano': ano, 'concluido': not pendentes, 'contas_pendentes': pendentes}
+            
+            validade = CacheConfig.FECHAMENTO_STATUS_PENDENTE_TIMEOUT
+            if status['concluido']:
+                # Contas criadas depois passam a ser pendentes no próximo fechamento
+                proximo_mes = timezone.localdate().replace(day=1) + relativedelta(months=1)
+                fim_mes = timezone.make_aware(datetime.combine(proximo_mes, datetime.min.time()))
+                validade = max(validade, int((fim_mes - timezone.now()).total_seconds()))
+            cache.set(chave, status, timeout=validade)
+        return status
+    
+    @staticmethod
+    def calcular_fechamentos(mes, ano, contas=None):
+        """
+        Calcula, sem gravar, os fechamentos das contas que ainda não têm o mês fechado.
+        
+        Usa uma única consulta: a soma das células do cubo do mês por conta, o
+        saldo final do fechamento anterior (subconsulta correlacionada ordenada
+        por ano/mês) e o saldo do snapshot na véspera do período como fallback.
+        
+        Args:
+            mes (int): Mês a fechar
+            ano (int): Ano a fechar
+            contas (QuerySet, optional): Contas consideradas. Padrão: todas as contas de todos os tenants
+        
+        Returns:
+            list: Instâncias de FechamentoMensal não salvas
+        """
+        data_inicio, data_fim = FechamentoService.periodo(mes, ano)
+        if contas is None:
+            contas = Conta._base_manager.all()
+        
+        fechamento_anterior = FechamentoMensal._base_manager.filter(
+            conta_id=OuterRef('pk')
+        ).filter(
+            Q(ano__lt=ano) | Q(ano=ano, mes__lt=mes)
+        ).order_by('-ano', '-mes').values('saldo_final')[:1]
+        
+        saldo_vespera = SaldoDiario._base_manager.filter(
+            conta_id=OuterRef('pk'), data__lt=data_inicio
+        ).order_by('-data').values('saldo')[:1]
+        
+        linhas = contas.exclude(
+            Exists(FechamentoMensal._base_manager.filter(conta_id=OuterRef('pk'), mes=mes, ano=ano))
+        ).annotate(
+            movimento=FilteredRelation(
+                'resumos_mensais',
+                condition=Q(resumos_mensais__ano=ano, resumos_mensais__mes=mes),
+            ),
+        ).values('id', 'tenant_id').annotate(
+            receitas=Sum('movimento__total', filter=Q(movimento__tipo=TipoTransacao.RECEITA)),
+            despesas=Sum('movimento__total', filter=Q(movimento__tipo__in=TipoTransacao.get_expense_types())),
+            saldo_fechamento_anterior=Subquery(fechamento_anterior),
+            saldo_vespera=Subquery(saldo_vespera),
+        ).order_by('id')
+        
+        agora = timezone.now()
+        fechamentos = []
+        for linha in linhas:
+            receitas = linha['receitas'] or Decimal('0.00')
+            despesas = linha['despesas'] or Decimal('0.00')
+            saldo_inicial = linha['saldo_fechamento_anterior']
+            if saldo_inicial is None:
+                saldo_inicial = linha['saldo_vespera'] or Decimal('0.00')
+            
+            fechamentos.append(FechamentoMensal(
+                conta_id=linha['id'],
+                mes=mes,
+                ano=ano,
+                saldo_inicial=saldo_inicial,
+                total_receitas=receitas,
+                total_despesas=despesas,
+                saldo_final=saldo_inicial + receitas - despesas,
+                data_inicio_periodo=data_inicio,
+                data_fim_periodo=data_fim,
+                data_fechamento=agora,
+                fechado=True,
+                tenant_id=linha['tenant_id'],
+            ))
+        
+        return fechamentos
+    
+    @staticmethod
+    def listar_tenants():
+        """Retorna os tenants que possuem contas, em ordem (None para contas sem tenant)."""
+        return list(
+            Conta._base_manager.order_by('tenant_id').values_list('tenant_id', flat=True).distinct()
+        )
+    
+    @staticmethod
+    def listar_tenants_pendentes(mes, ano):
+        """
+        Retorna, em ordem, os tenants com alguma conta ainda sem fechamento no mês.
+        
+        Derivado do banco a cada chamada: tenants e contas criados depois de
+        uma execução voltam a ser pendentes e uma execução interrompida
+        continua dos tenants que faltam.
+        
+        Args:
+            mes (int): Mês do fechamento
+            ano (int): Ano do fechamento
+        
+        Returns:
+            list: IDs dos tenants (None para contas sem tenant)
+        """
+        return list(
+            Conta._base_manager.exclude(
+                Exists(FechamentoMensal._base_manager.filter(conta_id=OuterRef('pk'), mes=mes, ano=ano))
+            ).order_by('tenant_id').values_list('tenant_id', flat=True).distinct()
+        )
+    
+    @staticmethod
+    def contas_dos_tenants(tenant_ids):
+        """
+        Retorna as contas de um conjunto de tenants, sem o filtro do tenant atual.
+        
+        Args:
+            tenant_ids (iterable): Tenants (None seleciona as contas sem tenant)
+        
+        Returns:
+            QuerySet: Contas dos tenants
+        """
+        tenant_ids = list(tenant_ids)
+        filtro = Q(tenant_id__in=[t for t in tenant_ids if t is not None])
+        if None in tenant_ids:
+            filtro |= Q(tenant_id__isnull=True)
+        return Conta._base_manager.filter(filtro)
+    
+    @staticmethod
+    def _chave_trava(tenant_id, mes, ano):
+        """Chave textual da trava de um tenant em um período."""
+        return f'fechamento:{tenant_id}:{ano}-{mes:02d}'
+    
+    @staticmethod
+    @contextmanager
+    def travar(tenant_ids, mes, ano):
+        """
+        Trava o fechamento do período para os tenants informados, sem esperar.
+        
+        No PostgreSQL usa pg_try_advisory_xact_lock (uma consulta para todo o
+        lote) dentro de uma transação que envolve o bloco, de modo que a trava
+        é liberada no commit, quando os fechamentos já estão visíveis. Nos
+        demais bancos grava linhas de TravaFechamento com uma chave única,
+        removidas ao final do bloco; travas mais antigas que
+        TEMPO_MAXIMO_TRAVA são tratadas como abandonadas.
+        
+        Args:
+            tenant_ids (list): Tenants a travar
+            mes (int): Mês do fechamento
+            ano (int): Ano do fechamento
+        
+        Yields:
+            set: Tenants travados por esta execução (os demais estão em andamento em outra)
+        """
+        chaves = {FechamentoService._chave_trava(t, mes, ano): t for t in tenant_ids}
+        
+        if connection.vendor == 'postgresql':
+            numericas = {
+                int.from_bytes(hashlib.blake2b(chave.encode(), digest_size=8).digest(), 'big', signed=True): tenant_id
+                for chave, tenant_id in chaves.items()
+            }
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT chave FROM unnest(%s::bigint[]) AS chave WHERE pg_try_advisory_xact_lock(chave)',
+                        [list(numericas)]
+                    )
+                    yield {numericas[linha[0]] for linha in cursor.fetchall()}
+            return
+        
+        dono = str(uuid.uuid4())
+        travas = TravaFechamento._base_manager
+        travas.filter(
+            chave__in=list(chaves), criado_em__lt=timezone.now() - FechamentoService.TEMPO_MAXIMO_TRAVA
+        ).delete()
+        travas.bulk_create(
+            [TravaFechamento(chave=chave, dono=dono) for chave in chaves],
+            ignore_conflicts=True
+        )
+        try:
+            yield {
+                chaves[chave]
+                for chave in travas.filter(chave__in=list(chaves), dono=dono).values_list('chave', flat=True)
+            }
+        finally:
+            travas.filter(dono=dono).delete()
+    
+    @staticmethod
+    def fechar_mes(mes, ano, tenant_ids=None, tenants_por_lote=500, batch_size=1000):
+        """
+        Fecha o mês para todas as contas de todos os tenants (ou dos tenants informados).
+        
+        Os tenants são processados em lotes; cada lote custa uma consulta de
+        cálculo e um bulk_create. É idempotente por (conta, mes, ano): contas já
+        fechadas são ignoradas e conflitos de inserções concorrentes descartados.
+        Cada tenant do lote é travado para o período (veja travar()); tenants
+        travados por outra execução não são recalculados e voltam em 'em_andamento'.
+        
+        Args:
+            mes (int): Mês a fechar
+            ano (int): Ano a fechar
+            tenant_ids (list, optional): Restringe o fechamento a estes tenants
+            tenants_por_lote (int): Tenants por consulta de cálculo
+            batch_size (int): Tamanho dos lotes do bulk_create
+        
+        Returns:
+            dict: Período, fechamentos gravados, tenants em andamento em outra
+                execução, duração total e, por tenant processado, contas fechadas
+                e duração (em ms) do lote em que foi processado
+        """
+        inicio = time.monotonic()
+        
+        todos_tenants = tenant_ids is None
+        if todos_tenants:
+            tenant_ids = FechamentoService.listar_tenants()
+        
+        fechamentos = []
+        tenants = {}
+        em_andamento = []
+        for i in range(0, len(tenant_ids), tenants_por_lote):
+            inicio_lote = time.monotonic()
+            lote = tenant_ids[i:i + tenants_por_lote]
+            
+            with FechamentoService.travar(lote, mes, ano) as travados:
+                # Tenants travados por outra execução ficam para ela
+                em_andamento.extend(t for t in lote if t not in travados)
+                
+                calculados = []
+                if travados:
+                    calculados = FechamentoService.calcular_fechamentos(
+                        mes, ano, contas=FechamentoService.contas_dos_tenants(travados)
+                    )
+                    FechamentoMensal._base_manager.bulk_create(
+                        calculados, batch_size=batch_size, ignore_conflicts=True
+                    )
+                    # bulk_create não dispara signals; no PostgreSQL o bloco é uma transação
+                    invalidar_periodos_fechados()
+                    for tenant_id in {fechamento.tenant_id for fechamento in calculados}:
+                        CacheTenant.invalidar_no_commit(tenant_id)
+                    fechamentos.extend(calculados)
+            
+            duracao_lote = int((time.monotonic() - inicio_lote) * 1000)
+            contas_por_tenant = {}
+            for fechamento in calculados:
+                contas_por_tenant[fechamento.tenant_id] = contas_por_tenant.get(fechamento.tenant_id, 0) + 1
+            for tenant_id in travados:
+                tenants[tenant_id] = {
+                    'contas': contas_por_tenant.get(tenant_id, 0),
+                    'duracao_ms': duracao_lote,
+                }
+        
+        resultado = {
+            'mes': mes,
+            'ano': ano,
+            'fechamentos': fechamentos,
+            'tenants': tenants,
+            'em_andamento': em_andamento,
+            'duracao_ms': int((time.monotonic() - inicio) * 1000),
+        }
+        logger.info(
+            f"Fechamento {mes:02d}/{ano}: {len(fechamentos)} contas de {len(tenants)} tenants "
+            f"em {resultado['duracao_ms']}ms"
+        )
+        return resultado
+    
+    @staticmethod
+    def gerar_retroativos(inicio, fim, tenant_ids=None, tenants_por_lote=500, batch_size=1000):
+        """
+        Gera a cadeia de fechamentos de um intervalo de meses passados.
+        
+        Feito para tenants que importaram histórico sem fechamentos. Cada lote
+        de tenants custa três leituras (saldo de partida, somas mensais do
+        cubo por conta e fechamentos já existentes) e um bulk_create: saldo
+        inicial e final de cada mês saem de uma soma acumulada em memória.
+        Fechamentos existentes são preservados e o saldo deles continua a cadeia.
+        Contas sem saldo de partida começam no primeiro mês com movimento.
+        
+        Args:
+            inicio (date): Primeiro mês (o dia é ignorado)
+            fim (date): Último mês, inclusive (o dia é ignorado)
+            tenant_ids (list, optional): Restringe a geração a estes tenants
+            tenants_por_lote (int): Tenants por lote de consultas
+            batch_size (int): Tamanho dos lotes do bulk_create
+        
+        Returns:
+            dict: Fechamentos gravados, duração total e, por tenant, fechamentos
+                gerados e duração (em ms) do lote em que foi processado
+        """
+        inicio_execucao = time.monotonic()
+        inicio, fim = inicio.replace(day=1), fim.replace(day=1)
+        
+        meses = []
+        mes_corrente = inicio
+        while mes_corrente <= fim:
+            meses.append((mes_corrente.year, mes_corrente.month))
+            mes_corrente += relativedelta(months=1)
+        
+        if tenant_ids is None:
+            tenant_ids = FechamentoService.listar_tenants()
+        
+        no_intervalo = (
+            (Q(ano__gt=inicio.year) | Q(ano=inicio.year, mes__gte=inicio.month)) &
+            (Q(ano__lt=fim.year) | Q(ano=fim.year, mes__lte=fim.month))
+        )
+        
+        total = 0
+        tenants = {}
+        for i in range(0, len(tenant_ids), tenants_por_lote):
+            inicio_lote = time.monotonic()
+            lote = tenant_ids[i:i + tenants_por_lote]
+            contas = FechamentoService.contas_dos_tenants(lote)
+            
+            # Saldo de partida: último fechamento antes do intervalo ou snapshot na véspera
+            partida = contas.annotate(
+                saldo_fechamento_anterior=Subquery(
+                    FechamentoMensal._base_manager.filter(
+                        conta_id=OuterRef('pk')
+                    ).filter(
+                        Q(ano__lt=inicio.year) | Q(ano=inicio.year, mes__lt=inicio.month)
+                    ).order_by('-ano', '-mes').values('saldo_final')[:1]
+                ),
+                saldo_vespera=Subquery(
+                    SaldoDiario._base_manager.filter(
+                        conta_id=OuterRef('pk'), data__lt=inicio
+                    ).order_by('-data').values('saldo')[:1]
+                ),
+            ).values_list('id', 'tenant_id', 'saldo_fechamento_anterior', 'saldo_vespera')
+            
+            # Receitas e despesas de cada conta/mês do intervalo em uma agregação do cubo
+            movimentos = {
+                (linha['conta_id'], linha['ano'], linha['mes']): (
+                    linha['receitas'] or Decimal('0.00'), linha['despesas'] or Decimal('0.00')
+                )
+                for linha in ResumoMensal._base_manager.filter(
+                    no_intervalo, conta__in=contas
+                ).values('conta_id', 'ano', 'mes').annotate(
+                    receitas=Sum('total', filter=Q(tipo=TipoTransacao.RECEITA)),
+                    despesas=Sum('total', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+                ).order_by()
+            }
+            
+            existentes = {
+                (conta_id, ano, mes): saldo_final
+                for conta_id, ano, mes, saldo_final in FechamentoMensal._base_manager.filter(
+                    no_intervalo, conta__in=contas
+                ).values_list('conta_id', 'ano', 'mes', 'saldo_final')
+            }
+            
+            agora = timezone.now()
+            gerados = []
+            for conta_id, tenant_id, saldo_fechamento_anterior, saldo_vespera in partida:
+                saldo = saldo_fechamento_anterior if saldo_fechamento_anterior is not None else saldo_vespera
+                
+                for ano, mes in meses:
+                    chave = (conta_id, ano, mes)
+                    if chave in existentes:
+                        saldo = existentes[chave]
+                        continue
+                    if saldo is None and chave not in movimentos:
+                        continue
+                    
+                    saldo_inicial = saldo or Decimal('0.00')
+                    receitas, despesas = movimentos.get(chave, (Decimal('0.00'), Decimal('0.00')))
+                    saldo = saldo_inicial + receitas - despesas
+                    data_inicio, data_fim = FechamentoService.periodo(mes, ano)
+                    
+                    gerados.append(FechamentoMensal(
+                        conta_id=conta_id,
+                        mes=mes,
+                        ano=ano,
+                        saldo_inicial=saldo_inicial,
+                        total_receitas=receitas,
+                        total_despesas=despesas,
+                        saldo_final=saldo,
+                        data_inicio_periodo=data_inicio,
+                        data_fim_periodo=data_fim,
+                        data_fechamento=agora,
+                        fechado=True,
+                        tenant_id=tenant_id,
+                    ))
+            
+            FechamentoMensal._base_manager.bulk_create(gerados, batch_size=batch_size, ignore_conflicts=True)
+            for tenant_id in {fechamento.tenant_id for fechamento in gerados}:
+                CacheTenant.invalidar_no_commit(tenant_id)
+            total += len(gerados)
+            
+            duracao_lote = int((time.monotonic() - inicio_lote) * 1000)
+            gerados_por_tenant = {}
+            for fechamento in gerados:
+                gerados_por_tenant[fechamento.tenant_id] = gerados_por_tenant.get(fechamento.tenant_id, 0) + 1
+            for tenant_id in lote:
+                tenants[tenant_id] = {
+                    'fechamentos': gerados_por_tenant.get(tenant_id, 0),
+                    'duracao_ms': duracao_lote,
+                }
+        
+        # bulk_create não dispara signals
+        invalidar_periodos_fechados()
+        
+        resultado = {
+            'fechamentos': total,
+            'tenants': tenants,
+            'duracao_ms': int((time.monotonic() - inicio_execucao) * 1000),
+        }
+        logger.info(
+            f"Fechamentos retroativos {inicio:%m/%Y}-{fim:%m/%Y}: {total} gerados para "
+            f"{len(tenants)} tenants em {resultado['duracao_ms']}ms"
+        )
+        return resultado
+
+    @staticmethod
+    def reabrir(conta_id, mes, ano):
+        """
+        Reabre o fechamento de um mês após uma correção e propaga o efeito aos meses seguintes.
+        
+        Recalcula apenas o mês alterado (cubo mensal para o mês completo,
+        transações para fechamentos parciais) e desloca saldo_inicial e
+        saldo_final de todos os fechamentos posteriores da conta pela diferença,
+        em um único UPDATE, sem recalcular cada mês.
+        
+        Args:
+            conta_id (int): ID da conta
+            mes (int): Mês corrigido
+            ano (int): Ano corrigido
+        
+        Returns:
+            dict: Fechamento recalculado, diferença de saldo e fechamentos posteriores ajustados
+        
+        Raises:
+            FechamentoMensal.DoesNotExist: Se o mês não estiver fechado para a conta
+        """
+        with transaction.atomic():
+            fechamento = FechamentoMensal._base_manager.select_for_update().get(
+                conta_id=conta_id, mes=mes, ano=ano
+            )
+            data_inicio, data_fim = FechamentoService.periodo(mes, ano)
+            
+            if fechamento.data_fim_periodo and fechamento.data_fim_periodo < data_fim:
+                totais = Transacao._base_manager.filter(
+                    conta_id=conta_id,
+                    data__gte=fechamento.data_inicio_periodo or data_inicio,
+                    data__lte=fechamento.data_fim_periodo,
+                ).aggregate(
+                    receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+                    despesas=Sum('valor', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+                )
+            else:
+                totais = ResumoMensal._base_manager.filter(
+                    conta_id=conta_id, ano=ano, mes=mes
+                ).aggregate(
+                    receitas=Sum('total', filter=Q(tipo=TipoTransacao.RECEITA)),
+                    despesas=Sum('total', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+                )
             
-            # Se não especificado, usar mês/ano atual
-            if mes is None or ano is None:
-                hoje = get_data_atual_brasil()
-                mes = mes or hoje.month
-                ano = ano or hoje.year
+            receitas = totais['receitas'] or Decimal('0.00')
+            despesas = totais['despesas'] or Decimal('0.00')
+            saldo_final = fechamento.saldo_inicial + receitas - despesas
+            diferenca = saldo_final - fechamento.saldo_final
+            
+            fechamento.total_receitas = receitas
+            fechamento.total_despesas = despesas
+            fechamento.saldo_final = saldo_final
+            fechamento.data_fechamento = timezone.now()
+            fechamento.fechado = True
+            fechamento.save(update_fields=[
+                'total_receitas', 'total_despesas', 'saldo_final', 'data_fechamento', 'fechado'
+            ])
             
-            # Filtrar transações do período (EXCLUINDO despesas parceladas)
-            transacoes_periodo = Transacao.objects.filter(
-                conta=conta,
-                data__month=mes,
-                data__year=ano,
-                despesa_parcelada__isnull=True  # Excluir despesas parceladas
+            meses_posteriores = []
+            if diferenca:
+                fechamentos_posteriores = FechamentoMensal._base_manager.filter(
+                    Q(ano__gt=ano) | Q(ano=ano, mes__gt=mes),
+                    conta_id=conta_id,
+                )
+                meses_posteriores = list(fechamentos_posteriores.values_list('ano', 'mes'))
+                fechamentos_posteriores.update(
+                    saldo_inicial=F('saldo_inicial') + diferenca,
+                    saldo_final=F('saldo_final') + diferenca,
+                )
+        
+        # Só o mês corrigido muda; os movimentos dos posteriores são relativos ao início de cada mês
+        tenant_id = Conta._base_manager.filter(pk=conta_id).values_list('tenant_id', flat=True).first()
+        CachePeriodoFechado.invalidar(tenant_id, conta_id, [(ano, mes)])
+        CacheTenant.invalidar(tenant_id)
+        posteriores = len(meses_posteriores)
+        
+        logger.info(
+            f"Fechamento {mes:02d}/{ano} da conta {conta_id} reaberto: diferença {diferenca}, "
+            f"{posteriores} fechamentos posteriores ajustados"
+        )
+        return {
+            'fechamento': fechamento,
+            'diferenca': diferenca,
+            'posteriores': posteriores,
+        }
+
+class CachePeriodoFechado:
+    """
+    Cache imutável de agregados de meses fechados.
+    
+    Um mês fechado (FechamentoMensal.fechado=True) não muda, então seus
+    agregados por conta ficam no cache sem expiração, com chave por tenant,
+    conta e período, e só são descartados por uma reabertura explícita
+    (FechamentoService.reabrir ou exclusão do fechamento). Meses abertos são
+    sempre calculados no banco, em uma consulta para todas as contas e meses.
+    
+    Agregados:
+        celulas: células do cubo mensal da conta no mês
+            (categoria_id, tipo, parcelada, total, quantidade)
+        movimentos_diarios: ((data, saldo do dia menos o saldo na véspera
+            do mês), ...) a partir do snapshot diário; por ser relativo ao
+            início do mês, não muda com escritas em meses anteriores
+    """
+    
+    AGREGADOS = ('celulas', 'movimentos_diarios')
+    
+    @staticmethod
+    def chave(agregado, tenant_id, conta_id, ano, mes):
+        """Chave de cache de um agregado de conta/mês."""
+        return CacheConfig.PERIODO_FECHADO_KEY.format(
+            agregado=agregado, tenant_id=tenant_id, conta_id=conta_id, ano=ano, mes=mes
+        )
+    
+    @staticmethod
+    def meses(inicio, fim):
+        """Lista os meses (ano, mes) de inicio a fim, inclusive (os dias são ignorados)."""
+        meses = []
+        mes_corrente, fim = inicio.replace(day=1), fim.replace(day=1)
+        while mes_corrente <= fim:
+            meses.append((mes_corrente.year, mes_corrente.month))
+            mes_corrente += relativedelta(months=1)
+        return meses
+    
+    @staticmethod
+    def _obter(agregado, contas, meses, calcular):
+        """
+        Lê do cache os pares conta/mês fechados e calcula os demais de uma vez.
+        
+        Args:
+            agregado (str): Nome do agregado
+            contas (list): Contas (instâncias de Conta)
+            meses (list): Meses (ano, mes)
+            calcular (callable): Recebe a lista de pares (conta_id, ano, mes) pendentes e
+                retorna {(conta_id, ano, mes): valor} para eles
+        
+        Returns:
+            dict: {(conta_id, ano, mes): valor}
+        """
+        fechados = {}
+        for conta in contas:
+            indice = periodos_fechados(conta.tenant_id)
+            for ano, mes in meses:
+                if (conta.id, ano, mes) in indice:
+                    chave = CachePeriodoFechado.chave(agregado, conta.tenant_id, conta.id, ano, mes)
+                    fechados[chave] = (conta.id, ano, mes)
+        
+        em_cache = cache.get_many(list(fechados)) if fechados else {}
+        resultado = {fechados[chave]: valor for chave, valor in em_cache.items()}
+        
+        pendentes = [
+            (conta.id, ano, mes) for conta in contas for ano, mes in meses
+            if (conta.id, ano, mes) not in resultado
+        ]
+        if pendentes:
+            resultado.update(calcular(pendentes))
+            novos = {chave: resultado[par] for chave, par in fechados.items() if chave not in em_cache}
+            if novos:
+                cache.set_many(novos, timeout=None)
+        
+        return resultado
+    
+    @staticmethod
+    def celulas(contas, inicio, fim):
+        """
+        Retorna as células do cubo de cada conta em cada mês do período.
+        
+        Args:
+            contas (list): Contas (instâncias de Conta)
+            inicio (date): Primeiro mês (o dia é ignorado)
+            fim (date): Último mês, inclusive (o dia é ignorado)
+        
+        Returns:
+            dict: {(conta_id, ano, mes): ((categoria_id, tipo, parcelada, total, quantidade), ...)}
+        """
+        def calcular(pendentes):
+            resultado = {par: [] for par in pendentes}
+            inicio_pendente, fim_pendente = min(p[1:] for p in pendentes), max(p[1:] for p in pendentes)
+            linhas = ResumoMensal._base_manager.filter(
+                Q(ano__gt=inicio_pendente[0]) | Q(ano=inicio_pendente[0], mes__gte=inicio_pendente[1]),
+                Q(ano__lt=fim_pendente[0]) | Q(ano=fim_pendente[0], mes__lte=fim_pendente[1]),
+                conta_id__in={p[0] for p in pendentes},
+            ).values_list('conta_id', 'ano', 'mes', 'categoria_id', 'tipo', 'parcelada', 'total', 'quantidade')
+            for conta_id, ano, mes, *celula in linhas:
+                if (conta_id, ano, mes) in resultado:
+                    resultado[(conta_id, ano, mes)].append(tuple(celula))
+            return {par: tuple(celulas) for par, celulas in resultado.items()}
+        
+        return CachePeriodoFechado._obter(
+            'celulas', contas, CachePeriodoFechado.meses(inicio, fim), calcular
+        )
+    
+    @staticmethod
+    def saldos_diarios(contas, inicio, fim):
+        """
+        Retorna a série diária de saldos de cada conta em cada mês do período.
+        
+        Do cache saem apenas os movimentos acumulados de cada mês fechado; os
+        saldos absolutos são encadeados a partir do snapshot vigente na véspera
+        do período, de modo que escritas retroativas em meses anteriores se
+        refletem sem invalidar os meses fechados posteriores.
+        
+        Args:
+            contas (list): Contas (instâncias de Conta)
+            inicio (date): Primeiro mês (o dia é ignorado)
+            fim (date): Último mês, inclusive (o dia é ignorado)
+        
+        Returns:
+            dict: {(conta_id, ano, mes): {'saldo_inicial': Decimal, 'dias': ((data, saldo), ...)}}
+        """
+        def calcular(pendentes):
+            conta_ids = sorted({p[0] for p in pendentes})
+            primeiro_dia = date(*min(p[1:] for p in pendentes), 1)
+            ultimo_dia = date(*max(p[1:] for p in pendentes), 1) + relativedelta(months=1) - timedelta(days=1)
+            
+            dias_por_mes = {}
+            for conta_id, data, saldo in SaldoDiario._base_manager.filter(
+                conta_id__in=conta_ids, data__gte=primeiro_dia, data__lte=ultimo_dia
+            ).order_by('conta_id', 'data').values_list('conta_id', 'data', 'saldo'):
+                dias_por_mes.setdefault((conta_id, data.year, data.month), []).append((data, saldo))
+            
+            # O movimento de um dia é relativo ao último saldo do mês anterior
+            saldos = SaldoService.saldos_em(primeiro_dia - timedelta(days=1), conta_ids=conta_ids)
+            meses_intervalo = CachePeriodoFechado.meses(primeiro_dia, ultimo_dia)
+            pendentes = set(pendentes)
+            resultado = {}
+            for conta_id in conta_ids:
+                saldo = saldos.get(conta_id, Decimal('0.00'))
+                for ano, mes in meses_intervalo:
+                    dias = dias_por_mes.get((conta_id, ano, mes), ())
+                    if (conta_id, ano, mes) in pendentes:
+                        resultado[(conta_id, ano, mes)] = tuple((data, valor - saldo) for data, valor in dias)
+                    if dias:
+                        saldo = dias[-1][1]
+            return resultado
+        
+        meses = CachePeriodoFechado.meses(inicio, fim)
+        if not meses:
+            return {}
+        movimentos = CachePeriodoFechado._obter('movimentos_diarios', contas, meses, calcular)
+        saldos = SaldoService.saldos_em(
+            date(*meses[0], 1) - timedelta(days=1), conta_ids=[conta.id for conta in contas]
+        )
+        
+        series = {}
+        for conta in contas:
+            saldo = saldos.get(conta.id, Decimal('0.00'))
+            for ano, mes in meses:
+                dias = tuple((data, saldo + movimento) for data, movimento in movimentos[(conta.id, ano, mes)])
+                series[(conta.id, ano, mes)] = {'saldo_inicial': saldo, 'dias': dias}
+                if dias:
+                    saldo = dias[-1][1]
+        return series
+    
+    @staticmethod
+    def saldos_fim_mes(contas, inicio, fim):
+        """
+        Soma o saldo de fim de mês das contas em cada mês do período.
+        
+        Args:
+            contas (list): Contas (instâncias de Conta)
+            inicio (date): Primeiro mês (o dia é ignorado)
+            fim (date): Último mês, inclusive (o dia é ignorado)
+        
+        Returns:
+            dict: {(ano, mes): saldo total no último dia do mês}
+        """
+        series = CachePeriodoFechado.saldos_diarios(contas, inicio, fim)
+        totais = {mes: Decimal('0.00') for mes in CachePeriodoFechado.meses(inicio, fim)}
+        for (conta_id, ano, mes), serie in series.items():
+            totais[(ano, mes)] += serie['dias'][-1][1] if serie['dias'] else serie['saldo_inicial']
+        return totais
+    
+    @staticmethod
+    def invalidar(tenant_id, conta_id, meses, agregados=None):
+        """
+        Descarta os agregados em cache de uma conta nos meses informados.
+        
+        Args:
+            tenant_id (int): Tenant da conta
+            conta_id (int): ID da conta
+            meses (list): Meses (ano, mes)
+            agregados (tuple, optional): Agregados a descartar. Padrão: todos
+        """
+        chaves = [
+            CachePeriodoFechado.chave(agregado, tenant_id, conta_id, ano, mes)
+            for agregado in agregados or CachePeriodoFechado.AGREGADOS
+            for ano, mes in meses
+        ]
+        if chaves:
+            cache.delete_many(chaves)
+
+class CategoriaService:
+    """Serviço para operações relacionadas a categorias."""
+    
+    @staticmethod
+    def totais_por_categoria(periodo, tipos=None, excluir_parceladas=True):
+        """
+        Calcula despesas e receitas por categoria de um período com uma única consulta agrupada.
+        
+        Períodos alinhados a meses inteiros são lidos do cubo mensal; os demais
+        agregam as transações. Os percentuais de cada categoria são calculados
+        sobre o total do seu grupo (despesas ou receitas).
+        
+        Args:
+            periodo (tuple): (data_inicio, data_fim), inclusive
+            tipos (list, optional): Tipos de transação considerados. Padrão: todos
+            excluir_parceladas (bool): Exclui transações de despesas parceladas
+        
+        Returns:
+            dict: {'despesas': [...], 'receitas': [...], 'total_despesas': Decimal,
+                'total_receitas': Decimal}; cada item tem categoria_id, nome, cor,
+                total, quantidade e percentual, em ordem decrescente de total
+        
+        Exemplo:
+            CategoriaService.totais_por_categoria((inicio_mes, fim_mes),
+                                                  tipos=TipoTransacao.get_expense_types())
+        """
+        data_inicio, data_fim = periodo
+        tipos = tipos or TipoTransacao.get_all_types()
+        
+        mes_inteiro = (
+            data_inicio.day == 1 and
+            (data_fim + timedelta(days=1)).day == 1
+        )
+        
+        if mes_inteiro:
+            linhas = ResumoMensalService.filtrar(
+                inicio=data_inicio, fim=data_fim, tipos=tipos, excluir_parceladas=excluir_parceladas
+            ).values(
+                'categoria_id', 'categoria__nome', 'categoria__cor', 'tipo'
+            ).annotate(soma=Sum('total'), contagem=Sum('quantidade'))
+        else:
+            transacoes = Transacao.objects.filter(
+                data__gte=data_inicio, data__lte=data_fim, tipo__in=tipos
+            )
+            if excluir_parceladas:
+                transacoes = transacoes.filter(despesa_parcelada__isnull=True)
+            linhas = transacoes.values(
+                'categoria_id', 'categoria__nome', 'categoria__cor', 'tipo'
+            ).annotate(soma=Sum('valor'), contagem=Count('id'))
+        
+        # Despesas e saídas da mesma categoria formam um único item
+        grupos = {'despesas': {}, 'receitas': {}}
+        for linha in linhas.order_by():
+            if not linha['soma']:
+                continue
+            grupo = grupos['receitas' if linha['tipo'] == TipoTransacao.RECEITA else 'despesas']
+            item = grupo.setdefault(linha['categoria_id'], {
+                'categoria_id': linha['categoria_id'],
+                'nome': linha['categoria__nome'] or 'Sem categoria',
+                'cor': linha['categoria__cor'] or '#6c757d',
+                'total': Decimal('0.00'),
+                'quantidade': 0,
+            })
+            item['total'] += linha['soma']
+            item['quantidade'] += linha['contagem']
+        
+        resultado = {}
+        for nome, grupo in grupos.items():
+            itens = sorted(grupo.values(), key=lambda item: item['total'], reverse=True)
+            total = sum((item['total'] for item in itens), Decimal('0.00'))
+            for item in itens:
+                item['percentual'] = float(item['total'] / total * 100) if total else 0
+            resultado[nome] = itens
+            resultado[f'total_{nome}'] = total
+        
+        return resultado
+
+class DashboardService:
+    """
+    Dados dos widgets do dashboard, um método por widget.
+    
+    Cada widget é calculado e guardado em cache separadamente, de modo que a
+    página é entregue sem esperar por nenhum deles e o navegador os carrega
+    em paralelo. Os resultados já vêm prontos para JSON.
+    """
+    
+    @staticmethod
+    def resumo(hoje):
+        """
+        Totais do mês e saldos consolidados de todas as contas do tenant.
+        
+        Returns:
+            dict: total_receitas, total_despesas, saldo, saldo_anterior e movimentacao_mes
+        """
+        resumos = ContaService.obter_resumos_financeiros(mes=hoje.month, ano=hoje.year).values()
+        
+        total_receitas = sum((r['receitas'] for r in resumos), Decimal('0.00'))
+        total_despesas = sum((r['despesas'] for r in resumos), Decimal('0.00'))
+        
+        return {
+            'total_receitas': float(total_receitas),
+            'total_despesas': float(total_despesas),
+            'saldo': float(sum((r['saldo_atual'] for r in resumos), Decimal('0.00'))),
+            'saldo_anterior': float(sum((r['saldo_anterior'] for r in resumos), Decimal('0.00'))),
+            'movimentacao_mes': float(total_receitas - total_despesas),
+        }
+    
+    @staticmethod
+    def categorias(hoje):
+        """
+        Despesas do mês por categoria, lidas do cubo mensal (sem despesas parceladas).
+        
+        Returns:
+            list: Itens {'nome', 'valor', 'cor', 'percentual'} em ordem decrescente de valor
+        """
+        inicio = hoje.replace(day=1)
+        totais = CategoriaService.totais_por_categoria(
+            (inicio, inicio + relativedelta(months=1) - timedelta(days=1)),
+            tipos=TipoTransacao.get_expense_types()
+        )
+        return [
+            {
+                'nome': categoria['nome'],
+                'valor': float(categoria['total']),
+                'cor': categoria['cor'],
+                'percentual': categoria['percentual'],
+            }
+            for categoria in totais['despesas']
+        ]
+    
+    @staticmethod
+    def transacoes_recentes(limite=10):
+        """
+        Últimas transações do tenant, sem as de despesas parceladas.
+        
+        Returns:
+            list: Itens {'id', 'data', 'descricao', 'tipo', 'categoria', 'valor'}
+        """
+        transacoes = Transacao.objects.filter(
+            despesa_parcelada__isnull=True
+        ).order_by('-data', '-id').values(
+            'id', 'data', 'descricao', 'tipo', 'valor', 'categoria__nome'
+        )[:limite]
+        
+        tipos = dict(TipoTransacao.CHOICES)
+        return [
+            {
+                'id': t['id'],
+                'data': t['data'].strftime('%d/%m/%Y'),
+                'descricao': t['descricao'],
+                'tipo': t['tipo'],
+                'categoria': t['categoria__nome'] or tipos.get(t['tipo'], t['tipo']),
+                'valor': float(t['valor']),
+            }
+            for t in transacoes
+        ]
+    
+    @staticmethod
+    def fechamentos(hoje):
+        """
+        Contas do tenant já fechadas no mês de hoje.
+        
+        Returns:
+            dict: tem_fechamentos, contas_fechadas (nomes), total_contas_fechadas e total_contas
+        """
+        contas_fechadas = list(
+            FechamentoMensal.objects.filter(
+                mes=hoje.month, ano=hoje.year
+            ).order_by('conta__nome').values_list('conta__nome', flat=True)
+        )
+        return {
+            'tem_fechamentos': bool(contas_fechadas),
+            'contas_fechadas': contas_fechadas,
+            'total_contas_fechadas': len(contas_fechadas),
+            'total_contas': Conta.objects.count(),
+        }
+    
+    @staticmethod
+    def metas():
+        """
+        Metas cadastradas com o progresso de cada uma.
+        
+        Returns:
+            list: Itens {'nome', 'valor_alvo', 'data_limite', 'concluida', 'percentual'}
+        """
+        from .models import Meta
+        
+        return [
+            {
+                'nome': meta['nome'],
+                'valor_alvo': float(meta['valor_alvo']),
+                'data_limite': meta['data_limite'].strftime('%d/%m/%Y'),
+                'concluida': meta['concluida'],
+                'percentual': 100 if meta['concluida'] else 0,
+            }
+            for meta in Meta.objects.order_by('data_limite').values(
+                'nome', 'valor_alvo', 'data_limite', 'concluida'
+            )
+        ]
+
+class RelatorioService:
+    """Serviço para as séries e agregações dos relatórios."""
+    
+    # Granularidade -> (truncamento no banco, frequência do pandas)
+    GRANULARIDADES = {
+        'diario': (TruncDay, 'D'),
+        'semanal': (TruncWeek, 'W-MON'),
+        'mensal': (TruncMonth, 'MS'),
+        'anual': (TruncYear, 'YS'),
+    }
+    
+    MESES_ABREVIADOS = ['', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+    
+    @staticmethod
+    def inicio_periodo(data, granularidade):
+        """Retorna o primeiro dia do período (dia, semana, mês ou ano) que contém a data."""
+        if granularidade == 'semanal':
+            return data - timedelta(days=data.weekday())
+        if granularidade == 'mensal':
+            return data.replace(day=1)
+        if granularidade == 'anual':
+            return data.replace(month=1, day=1)
+        return data
+    
+    @staticmethod
+    def serie_temporal(inicio, fim, granularidade='mensal', filtros=None):
+        """
+        Calcula receitas, despesas e saldo acumulado por período com custo constante de consultas.
+        
+        Todos os períodos vêm de uma única consulta agrupada pela data truncada
+        no banco. Em séries mensais e anuais, os meses inteiros são lidos do
+        cubo mensal via CachePeriodoFechado (meses fechados saem do cache) e
+        só as pontas parciais consultam as transações. Períodos sem movimento
+        são preenchidos com zero e o saldo é acumulado em uma única passada
+        vetorizada, em centavos.
+        
+        O saldo parte do saldo real das contas na véspera do início; com filtro
+        de categorias ou tipos parte de zero, acumulando só o movimento filtrado.
+        
+        Args:
+            inicio (date): Primeiro dia
+            fim (date): Último dia, inclusive
+            granularidade (str): 'diario', 'semanal', 'mensal' ou 'anual'
+            filtros (dict, optional): conta_ids, categoria_ids, tipos e
+                excluir_parceladas (padrão False)
+        
+        Returns:
+            list: Um dicionário por período, em ordem, com inicio, fim (limitados
+                ao intervalo), rotulo, receitas, despesas, movimento e saldo (Decimal)
+        
+        Raises:
+            ValueError: Se a granularidade não for suportada
+        """
+        import numpy as np
+        import pandas as pd
+        
+        if granularidade not in RelatorioService.GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        truncar, frequencia = RelatorioService.GRANULARIDADES[granularidade]
+        
+        filtros = filtros or {}
+        conta_ids = filtros.get('conta_ids')
+        categoria_ids = filtros.get('categoria_ids')
+        tipos = filtros.get('tipos')
+        excluir_parceladas = filtros.get('excluir_parceladas', False)
+        tipos_despesa = TipoTransacao.get_expense_types()
+        
+        # (início do período, receitas, despesas)
+        movimentos = []
+        
+        transacoes = Transacao.objects.filter(data__gte=inicio, data__lte=fim)
+        if conta_ids is not None:
+            transacoes = transacoes.filter(conta_id__in=conta_ids)
+        if categoria_ids is not None:
+            transacoes = transacoes.filter(categoria_id__in=categoria_ids)
+        if tipos is not None:
+            transacoes = transacoes.filter(tipo__in=tipos)
+        if excluir_parceladas:
+            transacoes = transacoes.filter(despesa_parcelada__isnull=True)
+        
+        consultar_transacoes = True
+        if granularidade in ('mensal', 'anual'):
+            primeiro_mes = inicio if inicio.day == 1 else inicio.replace(day=1) + relativedelta(months=1)
+            ultimo_dia = fim if (fim + timedelta(days=1)).day == 1 else fim.replace(day=1) - timedelta(days=1)
+            
+            if primeiro_mes <= ultimo_dia:
+                contas = Conta.objects.all()
+                if conta_ids is not None:
+                    contas = contas.filter(id__in=conta_ids)
+                
+                celulas = CachePeriodoFechado.celulas(list(contas), primeiro_mes, ultimo_dia)
+                for (conta_id, ano, mes), linhas in celulas.items():
+                    periodo = RelatorioService.inicio_periodo(date(ano, mes, 1), granularidade)
+                    for categoria_id, tipo, parcelada, total, quantidade in linhas:
+                        if categoria_ids is not None and categoria_id not in categoria_ids:
+                            continue
+                        if tipos is not None and tipo not in tipos:
+                            continue
+                        if excluir_parceladas and parcelada:
+                            continue
+                        if tipo == TipoTransacao.RECEITA:
+                            movimentos.append((periodo, total, 0))
+                        elif tipo in tipos_despesa:
+                            movimentos.append((periodo, 0, total))
+                
+                # Só as pontas parciais do intervalo ficam para as transações
+                transacoes = transacoes.exclude(data__gte=primeiro_mes, data__lte=ultimo_dia)
+                consultar_transacoes = inicio < primeiro_mes or fim > ultimo_dia
+        
+        if consultar_transacoes:
+            linhas = transacoes.annotate(
+                periodo=truncar('data')
+            ).values('periodo').annotate(
+                receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+                despesas=Sum('valor', filter=Q(tipo__in=tipos_despesa)),
+            ).order_by()
+            movimentos.extend(
+                (linha['periodo'], linha['receitas'] or 0, linha['despesas'] or 0) for linha in linhas
             )
-            
-            # Calcular receitas e despesas do período
-            receitas = transacoes_periodo.filter(
-                tipo=TipoTransacao.RECEITA
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            
-            despesas = transacoes_periodo.filter(
-                tipo__in=TipoTransacao.get_expense_types()
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            
-            # Calcular saldo anterior (receitas - despesas dos meses anteriores) EXCLUINDO despesas parceladas
-            transacoes_anteriores = Transacao.objects.filter(
-                conta=conta,
-                data__lt=date(ano, mes, 1),
-                despesa_parcelada__isnull=True  # Excluir despesas parceladas
+        
+        saldo_inicial = Decimal('0.00')
+        if categoria_ids is None and tipos is None:
+            saldo_inicial = sum(
+                SaldoService.saldos_em(inicio - timedelta(days=1), conta_ids=conta_ids).values(), Decimal('0.00')
             )
-            
-            receitas_anteriores = transacoes_anteriores.filter(
-                tipo=TipoTransacao.RECEITA
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            
-            despesas_anteriores = transacoes_anteriores.filter(
-                tipo__in=TipoTransacao.get_expense_types()
-            ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            
-            saldo_anterior = receitas_anteriores - despesas_anteriores
-            movimento_mes = receitas - despesas
-            saldo_atual = saldo_anterior + movimento_mes
-            
-            resumo = {
-                'conta': conta,
-                'periodo': f"{mes:02d}/{ano}",
-                'receitas': receitas,
-                'despesas': despesas,
-                'movimento_mes': movimento_mes,
-                'saldo_anterior': saldo_anterior,
-                'saldo_atual': saldo_atual,
-                'total_transacoes': transacoes_periodo.count()
-            }
-            
-            # Log estruturado de sucesso
-            duration_ms = int((time.time() - start_time) * 1000)
-            logger.log_operation(
-                level=logging.INFO,
-                operation='GET_FINANCIAL_SUMMARY',
-                entity_type='Conta',
-                entity_id=conta_id,
-                message=f"Resumo financeiro gerado para conta {conta.nome} - {mes:02d}/{ano}",
-                duration_ms=duration_ms,
-                periodo=f"{mes:02d}/{ano}",
-                receitas=float(receitas),
-                despesas=float(despesas),
-                movimento_mes=float(movimento_mes),
-                total_transacoes=transacoes_periodo.count()
+        
+        # Preenche os períodos vazios e acumula o saldo em centavos
+        periodos = pd.date_range(
+            RelatorioService.inicio_periodo(inicio, granularidade), fim, freq=frequencia
+        )
+        tabela = pd.DataFrame(movimentos, columns=['periodo', 'receitas', 'despesas'])
+        tabela['periodo'] = pd.to_datetime(tabela['periodo'])
+        for coluna in ('receitas', 'despesas'):
+            tabela[coluna] = (tabela[coluna].astype(float) * 100).round().astype(np.int64)
+        tabela = tabela.groupby('periodo').sum().reindex(periodos, fill_value=0)
+        
+        receitas = tabela['receitas'].to_numpy(dtype=np.int64)
+        despesas = tabela['despesas'].to_numpy(dtype=np.int64)
+        movimento = receitas - despesas
+        saldo = int(saldo_inicial * 100) + np.cumsum(movimento)
+        
+        inicios = [max(periodo.date(), inicio) for periodo in periodos]
+        fins = [proximo.date() - timedelta(days=1) for proximo in periodos[1:]] + [fim]
+        varios_anos = inicio.year != fim.year
+        
+        serie = []
+        for i, (inicio_ponto, fim_ponto) in enumerate(zip(inicios, fins)):
+            if granularidade == 'diario':
+                rotulo = inicio_ponto.strftime('%d/%m/%Y' if varios_anos else '%d/%m')
+            elif granularidade == 'semanal':
+                rotulo = f"{inicio_ponto.strftime('%d/%m')} - {fim_ponto.strftime('%d/%m')}"
+            elif granularidade == 'mensal':
+                rotulo = f"{RelatorioService.MESES_ABREVIADOS[inicio_ponto.month]}/{inicio_ponto.year}"
+            else:
+                rotulo = str(inicio_ponto.year)
+            
+            serie.append({
+                'inicio': inicio_ponto,
+                'fim': fim_ponto,
+                'rotulo': rotulo,
+                'receitas': Decimal(int(receitas[i])).scaleb(-2),
+                'despesas': Decimal(int(despesas[i])).scaleb(-2),
+                'movimento': Decimal(int(movimento[i])).scaleb(-2),
+                'saldo': Decimal(int(saldo[i])).scaleb(-2),
+            })
+        
+        return serie
+    
+    @staticmethod
+    def indices_lttb(valores, limite):
+        """
+        Escolhe até `limite` pontos de uma série preservando sua forma (Largest-Triangle-Three-Buckets).
+        
+        O primeiro e o último ponto são mantidos; os demais são divididos em
+        limite - 2 faixas e, de cada faixa, fica o ponto que forma o maior
+        triângulo com o ponto escolhido na faixa anterior e a média da
+        seguinte, o que preserva picos e vales. As áreas de cada faixa são
+        calculadas de uma vez com NumPy.
+        
+        Args:
+            valores (sequence): Valores da série, em ordem
+            limite (int): Quantidade máxima de pontos
+        
+        Returns:
+            numpy.ndarray: Índices dos pontos escolhidos, em ordem crescente
+        """
+        import numpy as np
+        
+        y = np.asarray(valores, dtype=float)
+        n = len(y)
+        if limite >= n:
+            return np.arange(n)
+        if limite < 3:
+            return np.array([0, n - 1][:max(limite, 0)], dtype=int)
+        
+        x = np.arange(n, dtype=float)
+        bordas = np.floor(np.linspace(1, n - 1, limite - 1)).astype(int)
+        
+        escolhidos = np.empty(limite, dtype=int)
+        escolhidos[0], escolhidos[-1] = 0, n - 1
+        anterior = 0
+        for i in range(limite - 2):
+            inicio, fim = bordas[i], bordas[i + 1]
+            if i + 2 < limite - 1:
+                proximo_inicio, proximo_fim = bordas[i + 1], bordas[i + 2]
+            else:
+                proximo_inicio, proximo_fim = n - 1, n
+            media_x = x[proximo_inicio:proximo_fim].mean()
+            media_y = y[proximo_inicio:proximo_fim].mean()
+            
+            areas = np.abs(
+                (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
             )
-            
-            return resumo
-            
-        except Conta.DoesNotExist:
-            logger.log_error(
-                operation='GET_FINANCIAL_SUMMARY',
-                error=f"Conta com ID {conta_id} não encontrada",
-                entity_type='Conta',
-                entity_id=conta_id,
-                error_code='CONTA_NOT_FOUND'
+            anterior = inicio + int(np.argmax(areas))
+            escolhidos[i + 1] = anterior
+        
+        return escolhidos
+    
+    @staticmethod
+    def reduzir_serie(serie, limite, campo='saldo'):
+        """
+        Reduz uma série de serie_temporal a no máximo `limite` pontos com LTTB sobre um campo.
+        
+        Args:
+            serie (list): Pontos de serie_temporal
+            limite (int): Quantidade máxima de pontos
+            campo (str): Campo numérico cuja forma deve ser preservada
+        
+        Returns:
+            list: Os pontos escolhidos, inalterados e em ordem
+        """
+        if len(serie) <= limite:
+            return serie
+        indices = RelatorioService.indices_lttb([ponto[campo] for ponto in serie], limite)
+        return [serie[i] for i in indices]
+
+class BuscaTransacaoService:
+    """
+    Busca textual indexada em descrição e responsável das transações.
+    
+    No PostgreSQL usa um índice GIN de tsvector (palavras, com stemming em
+    português) e índices GIN de trigramas (substrings, servindo o próprio
+    icontains). No SQLite usa uma tabela FTS5 de trigramas mantida em
+    sincronia por triggers, de modo que inserções em lote e updates também
+    a atualizam. Sem nenhum dos dois, cai no icontains.
+    """
+    
+    TABELA_FTS = 'financas_transacao_busca'
+    
+    # A expressão precisa ser idêntica à do índice para o planejador usá-lo
+    VETOR_POSTGRES = (
+        "to_tsvector('{config}', coalesce({tabela}.descricao, '') || ' ' || coalesce({tabela}.responsavel, ''))"
+    )
+    
+    # Backend detectado por alias de conexão
+    _backends = {}
+    
+    @staticmethod
+    def instalar(conexao):
+        """
+        Cria (ou recria) os índices de busca no banco da conexão informada.
+        
+        Usado pela migração e pelo comando reconstruir_indice_busca; o
+        índice FTS5 é reconstruído a partir das transações existentes.
+        
+        Args:
+            conexao: Conexão de banco do Django
+        
+        Returns:
+            str or None: Backend instalado ('postgresql' ou 'fts5'), ou None se não suportado
+        """
+        BuscaTransacaoService._backends.pop(conexao.alias, None)
+        
+        with conexao.cursor() as cursor:
+            if conexao.vendor == 'postgresql':
+                vetor = BuscaTransacaoService.VETOR_POSTGRES.format(
+                    config=BuscaConfig.CONFIGURACAO_TEXTO, tabela='financas_transacao'
+                )
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS transacao_busca_texto_idx ON financas_transacao USING gin (({vetor}))'
+                )
+                # icontains gera UPPER(coluna::text) LIKE UPPER(...), servido por estes índices
+                for coluna in ('descricao', 'responsavel'):
+                    cursor.execute(
+                        f'CREATE INDEX IF NOT EXISTS transacao_busca_{coluna}_trgm_idx '
+                        f'ON financas_transacao USING gin ((UPPER({coluna}::text)) gin_trgm_ops)'
+                    )
+                return 'postgresql'
+            
+            if conexao.vendor != 'sqlite':
+                return None
+            
+            tabela = BuscaTransacaoService.TABELA_FTS
+            BuscaTransacaoService.desinstalar(conexao)
+            criada = False
+            # remove_diacritics no tokenizador de trigramas exige SQLite 3.45+
+            for tokenizador in ('trigram remove_diacritics 1', 'trigram'):
+                try:
+                    cursor.execute(
+                        f"CREATE VIRTUAL TABLE {tabela} USING fts5(descricao, responsavel, "
+                        f"content='financas_transacao', content_rowid='id', tokenize='{tokenizador}')"
+                    )
+                    criada = True
+                    break
+                except DatabaseError:
+                    continue
+            if not criada:
+                logger.warning('SQLite sem FTS5 com trigramas: busca de transações usará icontains')
+                return None
+            
+            cursor.execute(
+                f"CREATE TRIGGER {tabela}_ai AFTER INSERT ON financas_transacao BEGIN "
+                f"INSERT INTO {tabela}(rowid, descricao, responsavel) VALUES (new.id, new.descricao, new.responsavel); "
+                f"END"
             )
-            raise ContaServiceError(ErrorMessages.CONTA_INEXISTENTE)
-        except Exception as e:
-            logger.log_error(
-                operation='GET_FINANCIAL_SUMMARY',
-                error=e,
-                entity_type='Conta',
-                entity_id=conta_id,
-                error_code='UNEXPECTED_ERROR'
+            cursor.execute(
+                f"CREATE TRIGGER {tabela}_ad AFTER DELETE ON financas_transacao BEGIN "
+                f"INSERT INTO {tabela}({tabela}, rowid, descricao, responsavel) "
+                f"VALUES ('delete', old.id, old.descricao, old.responsavel); "
+                f"END"
             )
-            raise ContaServiceError(f"Erro ao gerar resumo: {str(e)}")
+            cursor.execute(
+                f"CREATE TRIGGER {tabela}_au AFTER UPDATE OF descricao, responsavel ON financas_transacao BEGIN "
+                f"INSERT INTO {tabela}({tabela}, rowid, descricao, responsavel) "
+                f"VALUES ('delete', old.id, old.descricao, old.responsavel); "
+                f"INSERT INTO {tabela}(rowid, descricao, responsavel) VALUES (new.id, new.descricao, new.responsavel); "
+                f"END"
+            )
+            cursor.execute(f"INSERT INTO {tabela}({tabela}) VALUES ('rebuild')")
+            return 'fts5'
+    
+    @staticmethod
+    def desinstalar(conexao):
+        """Remove os índices de busca criados por instalar()."""
+        BuscaTransacaoService._backends.pop(conexao.alias, None)
+        
+        with conexao.cursor() as cursor:
+            if conexao.vendor == 'postgresql':
+                for indice in ('transacao_busca_texto_idx', 'transacao_busca_descricao_trgm_idx',
+                               'transacao_busca_responsavel_trgm_idx'):
+                    cursor.execute(f'DROP INDEX IF EXISTS {indice}')
+            elif conexao.vendor == 'sqlite':
+                tabela = BuscaTransacaoService.TABELA_FTS
+                for sufixo in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {tabela}_{sufixo}')
+                cursor.execute(f'DROP TABLE IF EXISTS {tabela}')
+    
+    @staticmethod
+    def backend():
+        """
+        Detecta o backend de busca disponível no banco atual (uma vez por processo).
+        
+        No SQLite exige a tabela FTS5 e seus três triggers: uma migração que
+        recrie financas_transacao descarta os triggers, e sem eles o índice
+        ficaria desatualizado (reconstruir_indice_busca os recria).
+        
+        Returns:
+            str or None: 'postgresql', 'fts5' ou None (icontains)
+        """
+        if connection.alias in BuscaTransacaoService._backends:
+            return BuscaTransacaoService._backends[connection.alias]
+        
+        backend = None
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'transacao_busca_texto_idx'")
+                backend = 'postgresql' if cursor.fetchone() else None
+        elif connection.vendor == 'sqlite':
+            tabela = BuscaTransacaoService.TABELA_FTS
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                    [tabela, f'{tabela}_ai', f'{tabela}_ad', f'{tabela}_au']
+                )
+                backend = 'fts5' if cursor.fetchone()[0] == 4 else None
+        
+        if backend is None:
+            logger.warning('Índice de busca de transações ausente: usando icontains')
+        BuscaTransacaoService._backends[connection.alias] = backend
+        return backend
+    
+    @staticmethod
+    def _consulta_postgres(termo):
+        """Converte o termo em tsquery com prefixo em cada palavra (busca enquanto digita)."""
+        palavras = re.findall(r'\w+', termo)
+        return ' & '.join(f'{palavra}:*' for palavra in palavras)
+    
+    @staticmethod
+    def _consulta_fts5(termo, campos):
+        """Monta a expressão MATCH do FTS5: o termo como frase, restrito às colunas pedidas."""
+        frase = '"' + termo.replace('"', '""') + '"'
+        return '{%s} : %s' % (' '.join(campos), frase)
+    
+    @staticmethod
+    def filtrar(queryset, termo, campos=('descricao', 'responsavel')):
+        """
+        Restringe transações às que contêm o termo em algum dos campos, usando o índice disponível.
+        
+        Args:
+            queryset: QuerySet de transações
+            termo (str): Texto buscado (substring, sem diferenciar maiúsculas)
+            campos (tuple): Campos pesquisados ('descricao' e/ou 'responsavel')
+        
+        Returns:
+            QuerySet: Transações filtradas, na ordem original
+        """
+        termo = (termo or '').strip()
+        if not termo:
+            return queryset
+        
+        substring = Q()
+        for campo in campos:
+            substring |= Q(**{f'{campo}__icontains': termo})
+        
+        backend = BuscaTransacaoService.backend()
+        if backend == 'postgresql':
+            # icontains já usa os índices de trigramas; o tsvector acrescenta
+            # as variações de palavra (stemming) quando os dois campos são buscados
+            consulta = BuscaTransacaoService._consulta_postgres(termo)
+            if consulta and set(campos) == {'descricao', 'responsavel'}:
+                vetor = BuscaTransacaoService.VETOR_POSTGRES.format(
+                    config=BuscaConfig.CONFIGURACAO_TEXTO, tabela='"financas_transacao"'
+                )
+                substring |= Q(RawSQL(
+                    f"{vetor} @@ to_tsquery('{BuscaConfig.CONFIGURACAO_TEXTO}', %s)",
+                    [consulta], output_field=BooleanField()
+                ))
+            return queryset.filter(substring)
+        
+        if backend == 'fts5' and len(termo) >= BuscaConfig.TAMANHO_MINIMO_INDEXADO:
+            return queryset.filter(id__in=RawSQL(
+                f'SELECT rowid FROM {BuscaTransacaoService.TABELA_FTS} '
+                f'WHERE {BuscaTransacaoService.TABELA_FTS} MATCH %s',
+                [BuscaTransacaoService._consulta_fts5(termo, campos)]
+            ))
+        
+        return queryset.filter(substring)
+    
+    @staticmethod
+    def buscar(termo, queryset=None, limite=BuscaConfig.LIMITE_RESULTADOS):
+        """
+        Busca transações por descrição ou responsável, das mais relevantes para as menos.
+        
+        A relevância é o ts_rank somado à similaridade de trigramas no
+        PostgreSQL e o bm25 do FTS5 no SQLite; empates ficam com as mais
+        recentes. Sem índice, a ordem é só por data.
+        
+        Args:
+            termo (str): Texto buscado
+            queryset: QuerySet base (padrão: todas as transações do tenant)
+            limite (int): Quantidade máxima de resultados
+        
+        Returns:
+            list: Transações com o atributo `relevancia`
+        """
+        if queryset is None:
+            queryset = Transacao.objects.select_related('conta', 'categoria')
+        termo = (termo or '').strip()
+        if not termo:
+            return []
+        
+        queryset = BuscaTransacaoService.filtrar(queryset, termo)
+        backend = BuscaTransacaoService.backend()
+        
+        if backend == 'postgresql':
+            vetor = BuscaTransacaoService.VETOR_POSTGRES.format(
+                config=BuscaConfig.CONFIGURACAO_TEXTO, tabela='"financas_transacao"'
+            )
+            relevancia = RawSQL(
+                f"ts_rank({vetor}, to_tsquery('{BuscaConfig.CONFIGURACAO_TEXTO}', %s)) "
+                f'+ similarity("financas_transacao".descricao, %s)',
+                [BuscaTransacaoService._consulta_postgres(termo) or termo, termo],
+                output_field=FloatField()
+            )
+        elif backend == 'fts5' and len(termo) >= BuscaConfig.TAMANHO_MINIMO_INDEXADO:
+            tabela = BuscaTransacaoService.TABELA_FTS
+            # bm25 é menor para os mais relevantes
+            relevancia = RawSQL(
+                f'SELECT -bm25({tabela}) FROM {tabela} '
+                f'WHERE {tabela} MATCH %s AND {tabela}.rowid = "financas_transacao"."id"',
+                [BuscaTransacaoService._consulta_fts5(termo, ('descricao', 'responsavel'))],
+                output_field=FloatField()
+            )
+        else:
+            relevancia = Value(0.0, output_field=FloatField())
+        
+        return list(
+            queryset.annotate(relevancia=relevancia).order_by('-relevancia', '-data', '-id')[:limite]
+        )
 
 class TransacaoService:
     """Serviço para operações relacionadas a transações."""
@@ -398,35 +2863,44 @@ class TransacaoService:
             raise TransacaoServiceError(f"Erro ao obter transações: {str(e)}")
     
     @staticmethod
-    def calcular_totalizadores(queryset):
+    def calcular_totalizadores(queryset, filtros=None):
         """
-        Calcula os totalizadores para um queryset de transações.
+        Calcula os totalizadores para um queryset de transações em uma única consulta.
+        
+        Receitas, despesas e quantidade saem de um só aggregate condicional.
+        Com `filtros`, o resultado fica no cache do tenant (CacheTenant) sob a
+        assinatura dos filtros normalizados: navegar pelas páginas do mesmo
+        filtro não agrega de novo, e qualquer gravação muda a versão do tenant.
         
         Args:
             queryset: QuerySet de transações
+            filtros (dict, optional): Filtros que produziram o queryset, para o cache
             
         Returns:
             dict: Dicionário com os totalizadores
         """
-        try:
-            # Calcular totais por tipo
-            total_receitas = queryset.filter(tipo=TipoTransacao.RECEITA).aggregate(
-                total=Sum('valor')
-            )['total'] or Decimal('0.00')
-            
-            total_despesas = queryset.filter(tipo__in=TipoTransacao.get_expense_types()).aggregate(
-                total=Sum('valor')
-            )['total'] or Decimal('0.00')
-            
-            saldo_liquido = total_receitas - total_despesas
-            total_transacoes = queryset.count()
+        def agregar():
+            totais = queryset.aggregate(
+                total_receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+                total_despesas=Sum('valor', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+                total_transacoes=Count('id'),
+            )
+            total_receitas = totais['total_receitas'] or Decimal('0.00')
+            total_despesas = totais['total_despesas'] or Decimal('0.00')
             
             return {
                 'total_receitas': total_receitas,
                 'total_despesas': total_despesas,
-                'saldo_liquido': saldo_liquido,
-                'total_transacoes': total_transacoes
+                'saldo_liquido': total_receitas - total_despesas,
+                'total_transacoes': totais['total_transacoes']
             }
+        
+        try:
+            if filtros is None:
+                return agregar()
+            return CacheTenant.obter_ou_calcular(
+                'transacoes:totalizadores', agregar, TransacaoService.assinatura_filtros(filtros)
+            )
             
         except Exception as e:
             logger.error(f"Erro ao calcular totalizadores: {str(e)}")
@@ -495,45 +2969,138 @@ class TransacaoService:
                 else:
                     logger.warning(f"Tipo de transação inválido: {filtros['tipo']}")
             
+            # Busca textual pelo índice disponível (FTS5, GIN ou icontains)
             if 'responsavel' in filtros and filtros['responsavel']:
-                queryset = queryset.filter(responsavel__icontains=filtros['responsavel'])
+                queryset = BuscaTransacaoService.filtrar(queryset, filtros['responsavel'], campos=('responsavel',))
                 filtros_aplicados += 1
             
             if 'descricao' in filtros and filtros['descricao']:
-                queryset = queryset.filter(descricao__icontains=filtros['descricao'])
+                queryset = BuscaTransacaoService.filtrar(queryset, filtros['descricao'], campos=('descricao',))
                 filtros_aplicados += 1
             
-            # Ordenar por data decrescente
+            # Ordenar por data decrescente (mesma chave usada na paginação por cursor)
             queryset = queryset.order_by('-data', '-id')
             
-            # Contar resultados para métricas
-            total_resultados = queryset.count()
-            
-            # Log estruturado de sucesso
+            # Sem count(): o total, quando necessário, vem de calcular_totalizadores
             duration_ms = int((time.time() - start_time) * 1000)
-            logger.log_operation(
-                level=logging.INFO,
-                operation='LIST_TRANSACOES_FILTERED',
-                entity_type='Transacao',
-                message=f"Consulta de transações executada com {filtros_aplicados} filtros",
-                duration_ms=duration_ms,
-                filtros_aplicados=filtros_aplicados,
-                total_resultados=total_resultados,
-                filtros=filtros
+            logger.info(
+                f"Consulta de transações montada com {filtros_aplicados} filtros em {duration_ms}ms: {filtros}"
             )
             
             return queryset
             
         except Exception as e:
-            logger.log_error(
-                operation='LIST_TRANSACOES_FILTERED',
-                error=e,
-                entity_type='Transacao',
-                error_code='QUERY_ERROR',
-                filtros=filtros
-            )
+            logger.error(f"Erro ao listar transações com filtros {filtros}: {str(e)}")
             raise TransacaoServiceError(f"Erro ao listar transações: {str(e)}")
     
+    @staticmethod
+    def assinatura_filtros(filtros):
+        """
+        Normaliza um conjunto de filtros em uma assinatura curta para chaves de cache.
+        
+        Valores vazios são descartados e os demais comparados como texto sem
+        espaços nas pontas, de modo que filtros equivalentes gerem a mesma chave.
+        
+        Args:
+            filtros (dict): Filtros da listagem
+        
+        Returns:
+            str: Hash hexadecimal dos filtros normalizados
+        """
+        normalizados = sorted(
+            (chave, str(valor).strip()) for chave, valor in filtros.items()
+            if valor is not None and str(valor).strip()
+        )
+        return hashlib.md5(json.dumps(normalizados).encode()).hexdigest()
+    
+    @staticmethod
+    def codificar_cursor(transacao, direcao):
+        """
+        Gera o cursor opaco que aponta para uma transação da listagem.
+        
+        Args:
+            transacao (Transacao): Transação na borda da página
+            direcao (str): 'proximo' (mais antigas) ou 'anterior' (mais recentes)
+        
+        Returns:
+            str: Cursor assinado, seguro para query string
+        """
+        return signing.dumps(
+            [transacao.data.isoformat(), transacao.id, direcao], salt=PaginationConfig.CURSOR_SALT
+        )
+    
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """
+        Lê um cursor gerado por codificar_cursor.
+        
+        Args:
+            cursor (str): Cursor recebido na query string
+        
+        Returns:
+            tuple or None: (data, id, direcao), ou None se o cursor for inválido
+        """
+        try:
+            data, transacao_id, direcao = signing.loads(cursor, salt=PaginationConfig.CURSOR_SALT)
+            if direcao not in ('proximo', 'anterior'):
+                return None
+            return date.fromisoformat(data), int(transacao_id), direcao
+        except (signing.BadSignature, ValueError, TypeError):
+            return None
+    
+    @staticmethod
+    def paginar_por_cursor(queryset, cursor=None, tamanho=PaginationConfig.TRANSACOES_PAGE_SIZE):
+        """
+        Pagina transações por busca na chave (data, id), sem COUNT nem OFFSET.
+        
+        Cada página é uma consulta que parte da última (ou primeira) transação
+        da página vista, ordenada por (-data, -id), e lê tamanho + 1 linhas
+        para saber se há mais. O custo é o mesmo na primeira página e na
+        milésima.
+        
+        Args:
+            queryset: QuerySet de transações já filtrado
+            cursor (str, optional): Cursor de codificar_cursor; ausente ou inválido volta ao início
+            tamanho (int): Transações por página
+        
+        Returns:
+            dict: 'transacoes' (list), 'proximo' e 'anterior' (cursores ou None)
+        """
+        posicao = TransacaoService.decodificar_cursor(cursor) if cursor else None
+        
+        if posicao is None:
+            pagina = list(queryset.order_by('-data', '-id')[:tamanho + 1])
+            tem_antigas = len(pagina) > tamanho
+            pagina = pagina[:tamanho]
+            tem_recentes = False
+        else:
+            data, transacao_id, direcao = posicao
+            if direcao == 'anterior':
+                # Mais recentes que o cursor, lidas em ordem crescente e invertidas
+                pagina = list(
+                    queryset.filter(data__gte=data)
+                    .filter(Q(data__gt=data) | Q(id__gt=transacao_id))
+                    .order_by('data', 'id')[:tamanho + 1]
+                )
+                tem_recentes = len(pagina) > tamanho
+                pagina = pagina[:tamanho][::-1]
+                tem_antigas = True
+            else:
+                pagina = list(
+                    queryset.filter(data__lte=data)
+                    .filter(Q(data__lt=data) | Q(id__lt=transacao_id))
+                    .order_by('-data', '-id')[:tamanho + 1]
+                )
+                tem_antigas = len(pagina) > tamanho
+                pagina = pagina[:tamanho]
+                tem_recentes = True
+        
+        return {
+            'transacoes': pagina,
+            'proximo': TransacaoService.codificar_cursor(pagina[-1], 'proximo') if pagina and tem_antigas else None,
+            'anterior': TransacaoService.codificar_cursor(pagina[0], 'anterior') if pagina and tem_recentes else None,
+        }
+    
     @staticmethod
     def excluir_transacao(transacao_id):
         """
@@ -667,10 +3234,127 @@ class TransacaoService:
             raise TransacaoServiceError(f"Erro ao gerar modelo de planilha: {str(e)}")
     
     @staticmethod
+    def _validar_planilha(df):
+        """
+        Converte e valida as colunas da planilha de importação de forma vetorizada.
+        
+        Cada linha recebe no máximo um erro (o primeiro encontrado, na ordem:
+        campos obrigatórios, valor, data, tipo, conta, categoria, mês fechado
+        e tamanhos).
+        
+        Args:
+            df (DataFrame): Planilha lida com a coluna data como texto
+        
+        Returns:
+            tuple: (DataFrame com as colunas convertidas, Series com a mensagem de erro por linha ou NA)
+        """
+        import numpy as np
+        import pandas as pd
+        from .constants import ValidationConfig
+        from .models import Categoria
+        
+        def texto(coluna):
+            if coluna not in df.columns:
+                return pd.Series(pd.NA, index=df.index, dtype='string')
+            valores = df[coluna].astype('string').str.strip()
+            return valores.mask(valores == '')
+        
+        erro = pd.Series(pd.NA, index=df.index, dtype='object')
+        
+        def marcar(mascara, mensagem):
+            alvo = mascara.fillna(False).astype(bool) & erro.isna()
+            erro[alvo] = mensagem[alvo] if isinstance(mensagem, pd.Series) else mensagem
+        
+        marcar(df[['descricao', 'valor', 'data', 'tipo']].isna().any(axis=1), 'Campos obrigatórios não preenchidos')
+        
+        valores = pd.to_numeric(df['valor'], errors='coerce')
+        marcar(~np.isfinite(valores), 'Valor inválido')
+        marcar(valores <= 0, 'Valor deve ser maior que zero')
+        
+        datas_texto = texto('data')
+        datas = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        for formato in ImportacaoConfig.FORMATOS_DATA:
+            pendentes = datas.isna() & datas_texto.notna()
+            if not pendentes.any():
+                break
+            datas[pendentes] = pd.to_datetime(datas_texto[pendentes], format=formato, errors='coerce')
+        marcar(
+            datas.isna(),
+            "Data inválida '" + datas_texto.fillna('') + "'. Use o formato DD/MM/AAAA ou AAAA-MM-DD"
+        )
+        
+        tipos = texto('tipo').str.lower()
+        marcar(~tipos.isin(TipoTransacao.get_all_types()), "Tipo inválido. Use 'receita' ou 'despesa'")
+        
+        # Nomes → ids em uma consulta por modelo (o TenantManager restringe ao tenant);
+        # nomes repetidos ficam com o registro mais antigo, como em .get() por nome
+        contas = {}
+        for conta_id, nome, tenant_id in Conta.objects.order_by('-id').values_list('id', 'nome', 'tenant_id'):
+            contas[nome] = (conta_id, tenant_id)
+        categorias = dict(Categoria.objects.order_by('-id').values_list('nome', 'id'))
+        
+        nomes_contas = texto('conta')
+        conta_ids = nomes_contas.map(lambda nome: contas.get(nome, (None, None))[0], na_action='ignore')
+        marcar(nomes_contas.notna() & conta_ids.isna(), "Conta '" + nomes_contas.fillna('') + "' não encontrada")
+        
+        nomes_categorias = texto('categoria')
+        categoria_ids = nomes_categorias.map(categorias, na_action='ignore')
+        marcar(
+            nomes_categorias.notna() & categoria_ids.isna(),
+            "Categoria '" + nomes_categorias.fillna('') + "' não encontrada"
+        )
+        
+        marcar(conta_ids.isna(), 'É necessário informar uma conta válida')
+        marcar(categoria_ids.isna(), 'É necessário informar uma categoria válida')
+        
+        # Meses fechados vêm do índice memorizado de periodos_fechados, sem consulta por linha
+        fechados = set()
+        for tenant_id in {tenant_id for _, tenant_id in contas.values()}:
+            fechados |= periodos_fechados(tenant_id)
+        if fechados:
+            periodos = pd.Series(list(zip(conta_ids, datas.dt.year, datas.dt.month)), index=df.index, dtype='object')
+            marcar(
+                periodos.isin(fechados),
+                'Mês ' + datas.dt.strftime('%m/%Y').fillna('') + ' está fechado para a conta ' + nomes_contas.fillna('')
+            )
+        
+        descricoes = texto('descricao')
+        responsaveis = texto('responsavel')
+        marcar(
+            descricoes.str.len() > ValidationConfig.MAX_DESCRICAO_LENGTH,
+            f'Descrição excede {ValidationConfig.MAX_DESCRICAO_LENGTH} caracteres'
+        )
+        marcar(
+            responsaveis.str.len() > ImportacaoConfig.MAX_RESPONSAVEL_LENGTH,
+            f'Responsável excede {ImportacaoConfig.MAX_RESPONSAVEL_LENGTH} caracteres'
+        )
+        
+        convertidos = pd.DataFrame({
+            'descricao': descricoes,
+            'valor': valores.round(2),
+            'data': datas.dt.date,
+            'tipo': tipos,
+            'conta_id': conta_ids,
+            'tenant_id': nomes_contas.map(lambda nome: contas.get(nome, (None, None))[1], na_action='ignore'),
+            'categoria_id': categoria_ids,
+            'responsavel': responsaveis,
+        })
+        return convertidos, erro
+    
+    @staticmethod
+    @SaldoService.lote()
     def importar_transacoes_planilha(arquivo_excel, usuario):
         """
         Importa transações de uma planilha Excel.
         
+        A importação é um pipeline: leitura e validação vetorizadas com
+        pandas (_validar_planilha), uma consulta por mapa de nomes de contas
+        e categorias, bulk_create em lotes de ImportacaoConfig.TAMANHO_LOTE e
+        um único ajuste de saldo, snapshot diário e cubo mensal por conta
+        afetada (SaldoService.registrar_criacoes) na confirmação.
+        
+        Linhas inválidas são relatadas e as demais importadas.
+        
         Args:
             arquivo_excel: Arquivo Excel enviado pelo usuário
             usuario: Usuário que está realizando a importação
@@ -682,10 +3366,8 @@ class TransacaoService:
             TransacaoServiceError: Se houver erro na importação
         """
         import pandas as pd
-        from django.db import transaction
-        from .models import Categoria, Conta
-        from decimal import Decimal, InvalidOperation
-        from datetime import datetime
+        
+        start_time = time.time()
         
         try:
             # Ler o arquivo Excel - forçando o tipo de dados da coluna data como string
@@ -697,194 +3379,46 @@ class TransacaoService:
                 if coluna not in df.columns:
                     raise TransacaoServiceError(f"Coluna obrigatória '{coluna}' não encontrada na planilha")
             
-            # Estatísticas da importação
             total_linhas = len(df)
-            transacoes_importadas = 0
-            erros = []
-            dados_invalidos = []  # Lista para armazenar dados que precisam de correção manual
-            
-            # Processar cada linha da planilha em lotes para evitar timeout
-            BATCH_SIZE = 50  # Processar 50 transações por vez
-            
-            # Dividir o dataframe em lotes
-            total_rows = len(df)
-            for batch_start in range(0, total_rows, BATCH_SIZE):
-                batch_end = min(batch_start + BATCH_SIZE, total_rows)
-                batch_df = df.iloc[batch_start:batch_end]
-                
-                with transaction.atomic():
-                    for index, row in batch_df.iterrows():
-                    try:
-                        # Validar campos obrigatórios
-                        if pd.isna(row['descricao']) or pd.isna(row['valor']) or pd.isna(row['data']) or pd.isna(row['tipo']):
-                            erros.append(f"Linha {index+2}: Campos obrigatórios não preenchidos")
-                            continue
-                        
-                        # Validar e converter valor
-                        try:
-                            valor = Decimal(str(row['valor']))
-                            if valor <= 0:
-                                erros.append(f"Linha {index+2}: Valor deve ser maior que zero")
-                                continue
-                        except InvalidOperation:
-                            erros.append(f"Linha {index+2}: Valor inválido")
-                            continue
-                        
-                        # Validar e converter data - aceitar múltiplos formatos
-                        try:
-                            # Converter para string para garantir compatibilidade
-                            data_str = str(row['data']).strip()
-                            # Tentar diferentes formatos de data - priorizando o formato dd/mm/aaaa
-                            formatos = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', 
-                                       '%Y/%m/%d', '%Y.%m.%d', '%m/%d/%Y', '%m-%d-%Y', '%m.%d.%Y']
-                            data = None
-                            for formato in formatos:
-                                try:
-                                    data = datetime.strptime(data_str, formato).date()
-                                    break
-                                except ValueError:
-                                    continue
-                            if data is None:
-                                # Adicionar linha e valor aos erros para depuração
-                                erros.append(f"Linha {index+2}: Data inválida '{data_str}'. Use o formato DD/MM/AAAA ou AAAA-MM-DD")
-                                # Adicionar dados inválidos para correção manual
-                                dados_invalidos.append({
-                                    'linha': index+2,
-                                    'descricao': row.get('descricao', ''),
-                                    'valor': row.get('valor', ''),
-                                    'data': data_str,  # Manter o valor original para correção
-                                    'tipo': row.get('tipo', ''),
-                                    'conta': row.get('conta', ''),
-                                    'categoria': row.get('categoria', ''),
-                                    'responsavel': row.get('responsavel', '')
-                                })
-                                continue
-                        except (ValueError, AttributeError):
-                            erros.append(f"Linha {index+2}: Data inválida. Use o formato DD/MM/AAAA ou AAAA-MM-DD")
-                            continue
-                        
-                        # Validar tipo
-                        tipo = str(row['tipo']).lower()
-                        if not TipoTransacao.is_valid_type(tipo):
-                            erros.append(f"Linha {index+2}: Tipo inválido. Use 'receita' ou 'despesa'")
-                            continue
-                        
-                        # Buscar conta (opcional)
-                        conta = None
-                        if 'conta' in row and not pd.isna(row.get('conta', None)):
-                            try:
-                                conta = Conta.objects.get(nome=row['conta'])
-                            except Conta.DoesNotExist:
-                                erros.append(f"Linha {index+2}: Conta '{row['conta']}' não encontrada")
-                                continue
-                        
-                        # Buscar categoria (opcional)
-                        categoria = None
-                        if 'categoria' in row and not pd.isna(row['categoria']):
-                            try:
-                                categoria = Categoria.objects.get(nome=row['categoria'])
-                            except Categoria.DoesNotExist:
-                                erros.append(f"Linha {index+2}: Categoria '{row['categoria']}' não encontrada")
-                                continue
-                        
-                        # Campos opcionais
-                        responsavel = None if pd.isna(row.get('responsavel', None)) else str(row['responsavel'])
-                        observacoes = None if pd.isna(row.get('observacoes', None)) else str(row['observacoes'])
-                        
-                        # Criar transação
-                        if conta is None:
-                            erros.append(f"Linha {index+2}: É necessário informar uma conta válida")
-                            continue
-                            
-                        # Obter tenant_id do usuário
-                        from .views import get_tenant_id
-                        tenant_id = get_tenant_id(usuario)
-                        
-                        transacao = Transacao.objects.create(
-                            descricao=str(row['descricao']),
-                            valor=valor,
-                            data=data,
-                            tipo=tipo,
-                            conta=conta,
-                            categoria=categoria,
-                            responsavel=responsavel,
-                            tenant_id=tenant_id
-                        )
-                        
-                        transacoes_importadas += 1
-                        
-                    except Exception as e:
-                        erros.append(f"Linha {index+2}: {str(e)}")
-            
-            # Atualizar saldos das contas afetadas - otimizado para evitar timeout
-            contas_afetadas = set()
-            # Coletar contas afetadas apenas uma vez, fora dos lotes
-            for index, row in df.iterrows():
-                if 'conta' in row and not pd.isna(row.get('conta', None)):
-                    try:
-                        conta = Conta.objects.get(nome=row['conta'])
-                        contas_afetadas.add(conta.id)
-                    except Conta.DoesNotExist:
-                        pass
-            
-            # Atualizar saldos em lotes para evitar timeout
-            BATCH_SIZE_SALDOS = 10  # Processar 10 contas por vez
-            contas_lista = list(contas_afetadas)
-            
-            for i in range(0, len(contas_lista), BATCH_SIZE_SALDOS):
-                batch_contas = contas_lista[i:i+BATCH_SIZE_SALDOS]
-                for conta_id in batch_contas:
-                    ContaService.atualizar_saldo_conta(conta_id)
-            
-            # Verificar se há linhas com erro que ainda não foram adicionadas a dados_invalidos
-            # Limitar o número de erros processados para evitar timeout
-            MAX_ERROS = 50  # Limitar a 50 erros para não sobrecarregar o sistema
-            
-            # Se já temos muitos erros, não processar mais
-            if len(erros) > MAX_ERROS:
-                erros = erros[:MAX_ERROS]
-                erros.append(f"Mais de {MAX_ERROS} erros encontrados. Alguns erros foram omitidos.")
-            
-            # Limitar o número de dados inválidos para evitar sobrecarga de memória
-            if len(dados_invalidos) > MAX_ERROS:
-                dados_invalidos = dados_invalidos[:MAX_ERROS]
-            
-            # Verificar apenas um número limitado de linhas com erro
-            linhas_verificadas = 0
-            for index, row in df.iterrows():
-                # Limitar o número de linhas verificadas
-                linhas_verificadas += 1
-                if linhas_verificadas > 200:  # Verificar apenas as primeiras 200 linhas
-                    break
-                    
-                # Verificar se esta linha teve erro
-                linha_com_erro = False
-                linha_ja_adicionada = False
-                
-                # Verificar se a linha tem erro
-                for erro in erros:
-                    if f"Linha {index+2}:" in erro:
-                        linha_com_erro = True
-                        break
-                
-                # Verificar se a linha já foi adicionada aos dados_invalidos
-                for dado in dados_invalidos:
-                    if dado.get('linha') == index+2:
-                        linha_ja_adicionada = True
-                        break
-                
-                # Adicionar apenas se tem erro e ainda não foi adicionada
-                if linha_com_erro and not linha_ja_adicionada:
-                    dados_invalidos.append({
-                        'linha': index+2,
-                        'descricao': str(row.get('descricao', '')) if not pd.isna(row.get('descricao', '')) else '',
-                        'valor': str(row.get('valor', '')) if not pd.isna(row.get('valor', '')) else '',
-                        'data': str(row.get('data', '')) if not pd.isna(row.get('data', '')) else '',
-                        'tipo': str(row.get('tipo', '')) if not pd.isna(row.get('tipo', '')) else '',
-                        'conta': str(row.get('conta', '')) if not pd.isna(row.get('conta', '')) else '',
-                        'categoria': str(row.get('categoria', '')) if not pd.isna(row.get('categoria', '')) else '',
-                        'responsavel': str(row.get('responsavel', '')) if not pd.isna(row.get('responsavel', '')) else ''
-                    })
+            convertidos, erro = TransacaoService._validar_planilha(df)
+            validos = convertidos[erro.isna()]
+            
+            # O tenant vem da conta, que o TenantManager já restringiu ao usuário
+            novas = [
+                Transacao(
+                    descricao=descricao,
+                    valor=Decimal(f'{valor:.2f}'),
+                    data=data,
+                    tipo=tipo,
+                    conta_id=int(conta_id),
+                    categoria_id=int(categoria_id),
+                    responsavel=None if pd.isna(responsavel) else responsavel,
+                    tenant_id=None if pd.isna(tenant_id) else int(tenant_id),
+                )
+                for descricao, valor, data, tipo, conta_id, tenant_id, categoria_id, responsavel in zip(
+                    validos['descricao'], validos['valor'], validos['data'], validos['tipo'],
+                    validos['conta_id'], validos['tenant_id'], validos['categoria_id'], validos['responsavel']
+                )
+            ]
+            
+            with transaction.atomic():
+                criadas = Transacao.objects.bulk_create(novas, batch_size=ImportacaoConfig.TAMANHO_LOTE)
+                SaldoService.registrar_criacoes(criadas)
+            transacoes_importadas = len(criadas)
+            
+            # Erros e dados para o formulário de correção, limitados para não sobrecarregar a sessão
+            com_erro = erro.dropna()
+            erros = [f"Linha {index + 2}: {mensagem}" for index, mensagem in com_erro.items()]
+            if len(erros) > ImportacaoConfig.MAX_ERROS:
+                erros = erros[:ImportacaoConfig.MAX_ERROS]
+                erros.append(f"Mais de {ImportacaoConfig.MAX_ERROS} erros encontrados. Alguns erros foram omitidos.")
+            
+            colunas_correcao = ['descricao', 'valor', 'data', 'tipo', 'conta', 'categoria', 'responsavel']
+            originais = df.loc[com_erro.index[:ImportacaoConfig.MAX_ERROS]].reindex(columns=colunas_correcao)
+            dados_invalidos = [
+                {'linha': index + 2, **{coluna: '' if pd.isna(valor) else str(valor) for coluna, valor in linha.items()}}
+                for index, linha in originais.iterrows()
+            ]
             
             resultado = {
                 'total_linhas': total_linhas,
@@ -894,8 +3428,11 @@ class TransacaoService:
                 'sucesso': len(erros) == 0
             }
             
-            # Log de sucesso
-            logger.info(f"Importação de transações concluída: {transacoes_importadas}/{total_linhas} importadas")
+            duration_ms = int((time.time() - start_time) * 1000)
+            logger.info(
+                f"Importação de transações concluída: {transacoes_importadas}/{total_linhas} importadas "
+                f"em {duration_ms}ms"
+            )
             
             return resultado
             
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db.models import QuerySet
 from django.dispatch import receiver
-from .models import Transacao, CustomUser, Categoria, Tenant
+from .models import Transacao, CustomUser, Categoria, Tenant, FechamentoMensal, Conta
+from .services import SaldoService, CachePeriodoFechado, CacheTenant
+from .utils import invalidar_periodos_fechados
 import logging
 import threading
 
@@ -10,18 +13,66 @@ logger = logging.getLogger(__name__)
 _thread_local = threading.local()
 
 def desabilitar_atualizacao_saldo():
-    """Desabilita a atualização automática de saldo pelos signals."""
+    """
+    Desabilita a atualização automática de saldo pelos signals.
+    
+    Para operações em massa prefira SaldoService.lote(), que em vez de
+    descartar as alterações as aplica uma única vez por conta no commit.
+    """
     _thread_local.skip_saldo_update = True
 
 def habilitar_atualizacao_saldo():
     """Habilita a atualização automática de saldo pelos signals."""
     _thread_local.skip_saldo_update = False
 
+def _excluida_em_cascata(origem, modelo, pk):
+    """
+    Indica se o objeto modelo/pk faz parte da exclusão que originou o signal.
+    
+    Ao excluir uma conta ou categoria, o Django remove primeiro o snapshot e o
+    cubo dela (sem signals) e só então as transações; o post_delete de cada
+    transação não pode regravar linhas apontando para o objeto em exclusão.
+    As linhas da origem ainda existem quando os post_delete das transações rodam.
+    """
+    if pk is None:
+        return False
+    if isinstance(origem, modelo):
+        return origem.pk == pk
+    if isinstance(origem, QuerySet) and origem.model is modelo:
+        return origem.filter(pk=pk).exists()
+    return False
+
+@receiver(pre_save, sender=Transacao)
+def capturar_estado_anterior_transacao(sender, instance, raw=False, **kwargs):
+    """
+    Guarda o estado da transação no banco antes de uma edição.
+    
+    Necessário para que o post_save calcule o delta de saldo e do cubo mensal
+    quando a edição altera valor, tipo, data, categoria ou conta. Custa uma
+    consulta pela chave primária.
+    """
+    instance._estado_saldo_anterior = None
+    
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if getattr(_thread_local, 'skip_saldo_update', False):
+        return
+    
+    instance._estado_saldo_anterior = Transacao._base_manager.filter(
+        pk=instance.pk
+    ).values(
+        'conta_id', 'categoria_id', 'despesa_parcelada_id', 'tipo', 'valor', 'data', 'tenant_id'
+    ).first()
+
 @receiver(post_save, sender=Transacao)
 def atualizar_saldo_conta_apos_salvar(sender, instance, created, **kwargs):
     """
     Atualiza o saldo da conta automaticamente após criar ou editar uma transação.
     
+    Aplica apenas o delta da transação (UPDATE com F()), sem reagregar o
+    histórico da conta, e o propaga para o snapshot diário de saldos e para o
+    cubo de agregados mensais.
+    
     Args:
         sender: O modelo que enviou o signal (Transacao)
         instance: A instância da transação que foi salva
@@ -32,22 +83,24 @@ def atualizar_saldo_conta_apos_salvar(sender, instance, created, **kwargs):
         # Verificar se deve pular a atualização de saldo
         if getattr(_thread_local, 'skip_saldo_update', False):
             return
-            
-        # Atualizar saldo da conta relacionada à transação
-        instance.conta.atualizar_saldo()
+        
+        anterior = None if created else getattr(instance, '_estado_saldo_anterior', None)
+        deltas = SaldoService.registrar_alteracao(
+            anterior, SaldoService.estado_transacao(instance)
+        )
         
         # Log da operação para auditoria
         action = "criada" if created else "editada"
         logger.info(
             f"Transação {action}: {instance.descricao} - "
             f"R$ {instance.valor} ({instance.tipo}) - "
-            f"Conta: {instance.conta.nome} - "
-            f"Novo saldo: R$ {instance.conta.saldo}"
+            f"Conta ID: {instance.conta_id} - "
+            f"Deltas de saldo: {deltas}"
         )
         
     except Exception as e:
         logger.error(
-            f"Erro ao atualizar saldo da conta {instance.conta.nome} "
+            f"Erro ao atualizar saldo da conta {instance.conta_id} "
             f"após salvar transação {instance.id}: {str(e)}"
         )
         # Re-raise a exceção para não mascarar problemas
@@ -137,21 +190,63 @@ def atualizar_saldo_conta_apos_deletar(sender, instance, **kwargs):
         # Verificar se deve pular a atualização de saldo
         if getattr(_thread_local, 'skip_saldo_update', False):
             return
-        # Atualizar saldo da conta relacionada à transação deletada
-        instance.conta.atualizar_saldo()
+        # A conta inteira está sendo excluída: saldo, snapshot e cubo vão junto
+        origem = kwargs.get('origin')
+        if _excluida_em_cascata(origem, Conta, instance.conta_id):
+            return
+        
+        estado = SaldoService.estado_transacao(instance)
+        if _excluida_em_cascata(origem, Categoria, instance.categoria_id):
+            # As células da categoria já foram removidas; saldo e snapshot da conta mudam
+            estado['categoria_id'] = None
+        
+        # Estornar a contribuição da transação deletada
+        deltas = SaldoService.registrar_alteracao(estado, None)
         
         # Log da operação para auditoria
         logger.info(
             f"Transação deletada: {instance.descricao} - "
             f"R$ {instance.valor} ({instance.tipo}) - "
-            f"Conta: {instance.conta.nome} - "
-            f"Novo saldo: R$ {instance.conta.saldo}"
+            f"Conta ID: {instance.conta_id} - "
+            f"Deltas de saldo: {deltas}"
         )
         
     except Exception as e:
         logger.error(
-            f"Erro ao atualizar saldo da conta {instance.conta.nome} "
+            f"Erro ao atualizar saldo da conta {instance.conta_id} "
             f"após deletar transação {instance.id}: {str(e)}"
         )
         # Re-raise a exceção para não mascarar problemas
-        raise
\ No newline at end of file
+        raise
+
+@receiver(post_save, sender=FechamentoMensal)
+@receiver(post_delete, sender=FechamentoMensal)
+def invalidar_indice_fechamentos(sender, instance, **kwargs):
+    """Descarta o índice de meses fechados quando um fechamento é criado, alterado ou removido."""
+    invalidar_periodos_fechados()
+
+@receiver(post_delete, sender=FechamentoMensal)
+def invalidar_cache_periodo_reaberto(sender, instance, **kwargs):
+    """Excluir um fechamento reabre o mês: descarta os agregados imutáveis em cache."""
+    tenant_id = Conta._base_manager.filter(pk=instance.conta_id).values_list('tenant_id', flat=True).first()
+    CachePeriodoFechado.invalidar(tenant_id, instance.conta_id, [(instance.ano, instance.mes)])
+
+@receiver(post_save, sender=Transacao)
+@receiver(post_delete, sender=Transacao)
+@receiver(post_save, sender=Conta)
+@receiver(post_delete, sender=Conta)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=FechamentoMensal)
+@receiver(post_delete, sender=FechamentoMensal)
+def invalidar_cache_tenant(sender, instance, raw=False, **kwargs):
+    """
+    Incrementa a versão do cache do tenant ao alterar seus dados.
+    
+    A invalidação ocorre no commit, para que uma leitura concorrente não
+    grave em cache a versão nova com dados ainda não confirmados, e uma só
+    vez por tenant, qualquer que seja o número de linhas da transação.
+    """
+    if raw or instance.tenant_id is None:
+        return
+    CacheTenant.invalidar_no_commit(instance.tenant_id)
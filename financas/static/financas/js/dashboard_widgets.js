@@ -0,0 +1,277 @@
+/**
+ * Dashboard principal: carrega cada widget da sua própria URL em paralelo.
+ *
+ * A página chega do servidor só com a estrutura; cada widget é preenchido
+ * assim que sua resposta chega, sem esperar pelos demais. As respostas têm
+ * ETag e Cache-Control, então recarregar a página revalida com 304.
+ */
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.getElementById('dashboardWidgets');
+    if (!container) return;
+    
+    const widgets = {
+        resumo: renderizarResumo,
+        categorias: renderizarCategorias,
+        recentes: renderizarTransacoesRecentes,
+        fechamento: renderizarFechamento,
+        metas: renderizarMetas,
+    };
+    
+    Object.keys(widgets).forEach(function(nome) {
+        carregarWidget(container.dataset['url' + nome.charAt(0).toUpperCase() + nome.slice(1)], widgets[nome]);
+    });
+    
+    initCompartilharWhatsApp();
+});
+
+/**
+ * Busca os dados de um widget e os entrega à função de renderização
+ */
+function carregarWidget(url, renderizar) {
+    fetch(url, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        credentials: 'same-origin',
+    })
+    .then(function(response) {
+        if (!response.ok) throw new Error('HTTP ' + response.status);
+        return response.json();
+    })
+    .then(renderizar)
+    .catch(function(error) {
+        console.error('Erro ao carregar widget ' + url + ':', error);
+        renderizar(null);
+    });
+}
+
+function formatarReal(valor) {
+    return new Intl.NumberFormat('pt-BR', {
+        style: 'currency',
+        currency: 'BRL'
+    }).format(valor);
+}
+
+function truncar(texto, tamanho) {
+    return texto.length > tamanho ? texto.slice(0, tamanho - 1) + '…' : texto;
+}
+
+function escaparHtml(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto;
+    return div.innerHTML;
+}
+
+/**
+ * Preenche os campos marcados com data-resumo
+ */
+function renderizarResumo(dados) {
+    document.querySelectorAll('[data-resumo]').forEach(function(elemento) {
+        if (!dados) {
+            elemento.textContent = '—';
+            return;
+        }
+        
+        const valor = dados[elemento.dataset.resumo];
+        const prefixo = elemento.hasAttribute('data-mais') && valor > 0 ? '+' : '';
+        elemento.textContent = prefixo + formatarReal(valor);
+        
+        if (elemento.hasAttribute('data-sinal')) {
+            elemento.classList.toggle('text-success', valor >= 0);
+            elemento.classList.toggle('text-danger', valor < 0);
+        }
+    });
+}
+
+/**
+ * Gráfico de rosca das despesas do mês por categoria
+ */
+function renderizarCategorias(dadosCategorias) {
+    const grafico = document.querySelector('.chart-pie');
+    const canvasElement = document.getElementById('graficoCategoria');
+    
+    if (!dadosCategorias || !Array.isArray(dadosCategorias)) {
+        grafico.innerHTML = '<p class="text-center text-muted">Erro ao carregar dados do gráfico</p>';
+        return;
+    }
+    
+    if (dadosCategorias.length === 0) {
+        grafico.innerHTML = '<p class="text-center text-muted mt-4">Nenhuma despesa registrada neste mês</p>';
+        return;
+    }
+    
+    if (typeof Chart === 'undefined' || !canvasElement) {
+        console.error('Chart.js não foi carregado!');
+        return;
+    }
+    
+    new Chart(canvasElement.getContext('2d'), {
+        type: 'doughnut',
+        data: {
+            labels: dadosCategorias.map(item => item.nome),
+            datasets: [{
+                data: dadosCategorias.map(item => item.valor),
+                backgroundColor: dadosCategorias.map(item => item.cor),
+                borderWidth: 2,
+                borderColor: '#fff'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom',
+                    labels: {
+                        padding: 20,
+                        usePointStyle: true
+                    }
+                },
+                tooltip: {
+                    callbacks: {
+                        label: function(context) {
+                            return (context.label || '') + ': ' + formatarReal(context.parsed);
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+/**
+ * Tabela das últimas transações
+ */
+function renderizarTransacoesRecentes(transacoes) {
+    const tabela = document.getElementById('tabelaTransacoesRecentes');
+    
+    if (!transacoes) {
+        tabela.innerHTML = '<tr><td colspan="4" class="text-center text-muted">Erro ao carregar transações</td></tr>';
+        return;
+    }
+    
+    if (transacoes.length === 0) {
+        tabela.innerHTML = '<tr><td colspan="4" class="text-center text-muted">Nenhuma transação registrada</td></tr>';
+        return;
+    }
+    
+    tabela.innerHTML = transacoes.map(function(transacao) {
+        const receita = transacao.tipo === 'receita';
+        return (
+            '<tr>' +
+                '<td class="col-data">' + transacao.data + '</td>' +
+                '<td class="col-descricao">' + escaparHtml(truncar(transacao.descricao, 25)) + '</td>' +
+                '<td class="col-categoria">' +
+                    '<span class="badge badge-' + (receita ? 'success' : 'danger') + ' badge-responsive" ' +
+                    'style="color: white !important; background-color: ' + (receita ? '#28a745' : '#dc3545') + ' !important;">' +
+                        escaparHtml(truncar(transacao.categoria, 15)) +
+                    '</span>' +
+                '</td>' +
+                '<td class="col-valor ' + (receita ? 'text-success' : 'text-danger') + '">' +
+                    formatarReal(transacao.valor) +
+                '</td>' +
+            '</tr>'
+        );
+    }).join('');
+}
+
+/**
+ * Aviso das contas já fechadas no mês atual
+ */
+function renderizarFechamento(info) {
+    if (!info || !info.tem_fechamentos) return;
+    
+    const container = document.getElementById('dashboardWidgets');
+    const periodo = container.dataset.mesAtual + '/' + container.dataset.anoAtual;
+    let message;
+    
+    if (info.total_contas_fechadas === info.total_contas) {
+        message = 'Todas as contas (' + info.total_contas_fechadas + ') já foram fechadas para ' + periodo + '.';
+    } else {
+        message = info.total_contas_fechadas + ' de ' + info.total_contas + ' contas já foram fechadas para ' + periodo + '.';
+    }
+    
+    const nomes = info.contas_fechadas.map(escaparHtml);
+    if (nomes.length <= 3) {
+        message += '<br><small>Contas: ' + nomes.join(', ') + '</small>';
+    } else {
+        message += '<br><small>Contas: ' + nomes.slice(0, 3).join(', ') + ' e mais ' + (nomes.length - 3) + ' outras</small>';
+    }
+    
+    showToast(message, 'warning', 8000);
+}
+
+/**
+ * Lista de metas com barra de progresso
+ */
+function renderizarMetas(metas) {
+    const lista = document.getElementById('listaMetas');
+    
+    if (!metas) {
+        lista.innerHTML = '<p class="text-center text-muted mb-0">Erro ao carregar metas</p>';
+        return;
+    }
+    
+    if (metas.length === 0) {
+        lista.innerHTML = '<p class="text-center text-muted mb-0">Nenhuma meta cadastrada</p>';
+        return;
+    }
+    
+    lista.innerHTML = metas.map(function(meta) {
+        return (
+            '<div class="mb-3">' +
+                '<div class="d-flex justify-content-between small">' +
+                    '<strong>' + escaparHtml(meta.nome) + '</strong>' +
+                    '<span>' + formatarReal(meta.valor_alvo) + ' até ' + meta.data_limite + '</span>' +
+                '</div>' +
+                '<div class="progress">' +
+                    '<div class="progress-bar ' + (meta.concluida ? 'bg-success' : 'bg-primary') + '" ' +
+                    'role="progressbar" style="width: ' + meta.percentual + '%"></div>' +
+                '</div>' +
+            '</div>'
+        );
+    }).join('');
+}
+
+/**
+ * Funcionalidade de compartilhamento via WhatsApp
+ */
+function initCompartilharWhatsApp() {
+    const btn = document.getElementById('btnCompartilharWhatsApp');
+    if (!btn) return;
+    
+    btn.addEventListener('click', function() {
+        // Mostrar loading no botão
+        const textoOriginal = btn.innerHTML;
+        btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Gerando...';
+        btn.disabled = true;
+        
+        // Fazer requisição para gerar o resumo
+        fetch(btn.dataset.url, {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'Content-Type': 'application/json',
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Abrir WhatsApp com o texto pré-formatado
+                const urlWhatsApp = `https://wa.me/?text=${encodeURIComponent(data.texto)}`;
+                window.open(urlWhatsApp, '_blank');
+                
+                showToast('Resumo financeiro gerado com sucesso!', 'success');
+            } else {
+                showToast('Erro ao gerar resumo: ' + (data.error || 'Erro desconhecido'), 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Erro:', error);
+            showToast('Erro ao gerar resumo financeiro', 'error');
+        })
+        .finally(() => {
+            // Restaurar botão
+            btn.innerHTML = textoOriginal;
+            btn.disabled = false;
+        });
+    });
+}
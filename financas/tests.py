@@ -1,3 +1,603 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .constants import TipoTransacao
+from .models import (
+    Categoria, Conta, CustomUser, DespesaParcelada, FechamentoMensal, ResumoMensal, SaldoDiario, Transacao,
+    TravaFechamento
+)
+from .services import (
+    CachePeriodoFechado, CacheTenant, ContaService, FechamentoService, ResumoMensalService, SaldoService,
+    TransacaoService
+)
+
+class FinancasTestCase(TestCase):
+    """Base dos testes: um tenant com uma conta e uma categoria, e cache limpo."""
+    
+    tenant_id = 1
+    
+    def setUp(self):
+        cache.clear()
+        self.tenant_anterior = getattr(connection, 'tenant_id', None)
+        connection.tenant_id = self.tenant_id
+        self.conta = Conta.objects.create(nome='Conta corrente')
+        self.categoria = Categoria.objects.create(nome='Mercado')
+    
+    def tearDown(self):
+        connection.tenant_id = self.tenant_anterior
+        cache.clear()
+    
+    def criar_transacao(self, valor, data, tipo=TipoTransacao.RECEITA, conta=None, categoria=None, **campos):
+        return Transacao.objects.create(
+            descricao=campos.pop('descricao', 'Transação'),
+            valor=Decimal(valor),
+            data=data,
+            tipo=tipo,
+            conta=conta or self.conta,
+            categoria=categoria or self.categoria,
+            **campos
+        )
+
+class SaldoIncrementalTest(FinancasTestCase):
+    """O saldo mantido por deltas é igual ao recálculo completo a partir das transações."""
+    
+    def assertSaldoIgualRecalculo(self, *contas):
+        for conta in contas:
+            conta.refresh_from_db()
+            saldo_mantido = conta.saldo
+            self.assertEqual(saldo_mantido, conta.atualizar_saldo(), f'conta {conta.nome}')
+    
+    def test_criacao_edicao_e_exclusao(self):
+        receita = self.criar_transacao('250.00', date(2025, 3, 1))
+        despesa = self.criar_transacao('80.50', date(2025, 3, 2), tipo=TipoTransacao.DESPESA)
+        self.assertSaldoIgualRecalculo(self.conta)
+        self.assertEqual(self.conta.saldo, Decimal('169.50'))
+        
+        receita.valor = Decimal('300.00')
+        receita.save()
+        self.assertSaldoIgualRecalculo(self.conta)
+        
+        despesa.tipo = TipoTransacao.RECEITA
+        despesa.save()
+        self.assertSaldoIgualRecalculo(self.conta)
+        
+        despesa.delete()
+        self.assertSaldoIgualRecalculo(self.conta)
+        self.assertEqual(self.conta.saldo, Decimal('300.00'))
+    
+    def test_mover_transacao_entre_contas(self):
+        poupanca = Conta.objects.create(nome='Poupança')
+        transacao = self.criar_transacao('120.00', date(2025, 3, 5), tipo=TipoTransacao.DESPESA)
+        
+        transacao.conta = poupanca
+        transacao.valor = Decimal('90.00')
+        transacao.save()
+        
+        self.assertSaldoIgualRecalculo(self.conta, poupanca)
+        self.assertEqual((self.conta.saldo, poupanca.saldo), (Decimal('0.00'), Decimal('-90.00')))
+    
+    def test_edicao_sem_mudanca_de_valor_nao_altera_saldo(self):
+        transacao = self.criar_transacao('40.00', date(2025, 3, 5))
+        
+        transacao.descricao = 'Renomeada'
+        transacao.save()
+        
+        self.assertSaldoIgualRecalculo(self.conta)
+        self.assertEqual(self.conta.saldo, Decimal('40.00'))
+
+class LoteSaldoTest(FinancasTestCase):
+    """Operações em massa dentro de SaldoService.lote() aplicam os deltas uma vez, no commit."""
+    
+    def test_lote_adia_e_agrega_os_deltas(self):
+        poupanca = Conta.objects.create(nome='Poupança')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            with SaldoService.lote():
+                for dia in range(1, 11):
+                    self.criar_transacao('10.00', date(2025, 6, dia))
+                    self.criar_transacao('3.00', date(2025, 6, dia), tipo=TipoTransacao.DESPESA, conta=poupanca)
+                # Nada é aplicado antes do commit
+                self.assertEqual(Conta.objects.get(pk=self.conta.pk).saldo, Decimal('0.00'))
+        
+        self.conta.refresh_from_db()
+        poupanca.refresh_from_db()
+        self.assertEqual((self.conta.saldo, poupanca.saldo), (Decimal('100.00'), Decimal('-30.00')))
+        self.assertEqual(SaldoService.saldo_em(self.conta.id, date(2025, 6, 5)), Decimal('50.00'))
+        self.assertEqual(SaldoService.saldo_em(poupanca.id, date(2025, 6, 30)), Decimal('-30.00'))
+    
+    def test_savepoint_desfeito_nao_entra_no_lote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with SaldoService.lote():
+                self.criar_transacao('10.00', date(2025, 6, 1))
+                try:
+                    with transaction.atomic():
+                        self.criar_transacao('500.00', date(2025, 6, 2))
+                        raise RuntimeError('desfaz o savepoint')
+                except RuntimeError:
+                    pass
+        
+        self.conta.refresh_from_db()
+        self.assertEqual(self.conta.saldo, Decimal('10.00'))
+        self.assertEqual(self.conta.saldo, self.conta.atualizar_saldo())
+    
+    def test_update_em_massa_com_recalculo(self):
+        poupanca = Conta.objects.create(nome='Poupança')
+        for dia in (1, 2, 3):
+            self.criar_transacao('15.00', date(2025, 6, dia))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            with SaldoService.lote() as lote:
+                Transacao.objects.filter(conta=self.conta).update(conta=poupanca)
+                lote.recalcular(self.conta.id, poupanca.id)
+        
+        self.conta.refresh_from_db()
+        poupanca.refresh_from_db()
+        self.assertEqual((self.conta.saldo, poupanca.saldo), (Decimal('0.00'), Decimal('45.00')))
+        self.assertEqual(SaldoService.saldo_em(self.conta.id, date(2025, 6, 30)), Decimal('0.00'))
+        self.assertEqual(SaldoService.saldo_em(poupanca.id, date(2025, 6, 30)), Decimal('45.00'))
+
+class ResumoFinanceiroTest(FinancasTestCase):
+    """O resumo mensal exclui despesas parceladas tanto do período quanto do saldo anterior."""
+    
+    def test_saldo_anterior_exclui_parceladas(self):
+        parcelada = DespesaParcelada.objects.create(
+            descricao='Notebook', valor_total=Decimal('300.00'), categoria=self.categoria,
+            numero_parcelas=3, data_primeira_parcela=date(2025, 5, 10), conta=self.conta,
+        )
+        self.criar_transacao('1000.00', date(2025, 5, 1))
+        self.criar_transacao('100.00', date(2025, 5, 10), tipo=TipoTransacao.DESPESA, despesa_parcelada=parcelada)
+        self.criar_transacao('200.00', date(2025, 6, 3), tipo=TipoTransacao.DESPESA)
+        self.criar_transacao('100.00', date(2025, 6, 10), tipo=TipoTransacao.DESPESA, despesa_parcelada=parcelada)
+        
+        resumo = ContaService.obter_resumos_financeiros(mes=6, ano=2025)[self.conta.id]
+        
+        self.assertEqual(resumo['saldo_anterior'], Decimal('1000.00'))
+        self.assertEqual(resumo['movimento_mes'], Decimal('-200.00'))
+        self.assertEqual(resumo['saldo_atual'], resumo['saldo_anterior'] + resumo['movimento_mes'])
+        self.assertEqual(resumo['total_transacoes'], 1)
+    
+    def test_saldo_atual_encadeia_com_o_mes_seguinte(self):
+        self.criar_transacao('500.00', date(2025, 5, 20))
+        self.criar_transacao('120.00', date(2025, 6, 2), tipo=TipoTransacao.DESPESA)
+        
+        junho = ContaService.obter_resumos_financeiros(mes=6, ano=2025)[self.conta.id]
+        julho = ContaService.obter_resumos_financeiros(mes=7, ano=2025)[self.conta.id]
+        
+        self.assertEqual(junho['saldo_atual'], Decimal('380.00'))
+        self.assertEqual(julho['saldo_anterior'], junho['saldo_atual'])
+
+class SnapshotDiarioTest(FinancasTestCase):
+    """O snapshot diário responde o mesmo saldo que a soma das transações até cada data."""
+    
+    def assertSnapshotIgualTransacoes(self, inicio, fim):
+        transacoes = list(Transacao._base_manager.filter(conta=self.conta))
+        dia = inicio
+        while dia <= fim:
+            esperado = sum(
+                (TipoTransacao.sinal(t.tipo) * t.valor for t in transacoes if t.data <= dia),
+                Decimal('0.00')
+            )
+            self.assertEqual(SaldoService.saldo_em(self.conta.id, dia), esperado, dia.isoformat())
+            dia += timedelta(days=1)
+    
+    def test_criacao_fora_de_ordem(self):
+        self.criar_transacao('100.00', date(2025, 4, 20))
+        self.criar_transacao('40.00', date(2025, 4, 5), tipo=TipoTransacao.DESPESA)
+        self.criar_transacao('10.00', date(2025, 4, 12))
+        
+        self.assertSnapshotIgualTransacoes(date(2025, 4, 1), date(2025, 4, 30))
+    
+    def test_mudanca_de_data_e_exclusao(self):
+        primeira = self.criar_transacao('100.00', date(2025, 4, 10))
+        segunda = self.criar_transacao('25.00', date(2025, 4, 15), tipo=TipoTransacao.DESPESA)
+        
+        primeira.data = date(2025, 4, 18)
+        primeira.save()
+        self.assertSnapshotIgualTransacoes(date(2025, 4, 1), date(2025, 4, 30))
+        
+        segunda.data = date(2025, 3, 30)
+        segunda.save()
+        self.assertSnapshotIgualTransacoes(date(2025, 3, 25), date(2025, 4, 30))
+        
+        primeira.delete()
+        self.assertSnapshotIgualTransacoes(date(2025, 3, 25), date(2025, 4, 30))
+    
+    def test_reconstrucao_preserva_saldos(self):
+        self.criar_transacao('70.00', date(2025, 5, 3))
+        self.criar_transacao('20.00', date(2025, 5, 9), tipo=TipoTransacao.DESPESA)
+        saldos = [SaldoService.saldo_em(self.conta.id, date(2025, 5, dia)) for dia in range(1, 32)]
+        
+        SaldoService.reconstruir_saldos_diarios([self.conta.id])
+        
+        self.assertEqual([SaldoService.saldo_em(self.conta.id, date(2025, 5, dia)) for dia in range(1, 32)], saldos)
+
+class CuboMensalTest(FinancasTestCase):
+    """As células mantidas por deltas são iguais às de uma reconstrução completa do cubo."""
+    
+    def celulas(self):
+        return set(ResumoMensal._base_manager.filter(conta__tenant_id=self.tenant_id).values_list(
+            'conta_id', 'categoria_id', 'tipo', 'ano', 'mes', 'parcelada', 'total', 'quantidade'
+        ))
+    
+    def assertCuboIgualReconstrucao(self):
+        mantidas = self.celulas()
+        ResumoMensalService.reconstruir()
+        self.assertEqual(mantidas, self.celulas())
+    
+    def test_criacao_edicao_e_exclusao(self):
+        transporte = Categoria.objects.create(nome='Transporte')
+        primeira = self.criar_transacao('60.00', date(2025, 7, 3), tipo=TipoTransacao.DESPESA)
+        segunda = self.criar_transacao('40.00', date(2025, 7, 9), tipo=TipoTransacao.DESPESA)
+        self.criar_transacao('900.00', date(2025, 7, 5))
+        self.assertCuboIgualReconstrucao()
+        
+        primeira.categoria = transporte
+        primeira.data = date(2025, 8, 1)
+        primeira.save()
+        self.assertCuboIgualReconstrucao()
+        
+        segunda.delete()
+        self.assertCuboIgualReconstrucao()
+        # A célula que ficou sem transações é removida
+        self.assertFalse(ResumoMensal._base_manager.filter(
+            categoria=self.categoria, tipo=TipoTransacao.DESPESA, mes=7
+        ).exists())
+    
+    def test_criacao_em_massa(self):
+        poupanca = Conta.objects.create(nome='Poupança')
+        transacoes = Transacao.objects.bulk_create([
+            Transacao(
+                descricao=f'Importada {dia}', valor=Decimal('12.34'), data=date(2025, 9, dia),
+                tipo=TipoTransacao.DESPESA if dia % 2 else TipoTransacao.RECEITA,
+                conta=poupanca if dia % 3 else self.conta, categoria=self.categoria,
+            )
+            for dia in range(1, 29)
+        ])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            SaldoService.registrar_criacoes(transacoes)
+        
+        self.assertCuboIgualReconstrucao()
+        poupanca.refresh_from_db()
+        self.assertEqual(poupanca.saldo, poupanca.atualizar_saldo())
+
+class FechamentoMensalTest(FinancasTestCase):
+    """O fechamento em lote encadeia os saldos dos meses e é idempotente."""
+    
+    def setUp(self):
+        super().setUp()
+        self.criar_transacao('1000.00', date(2025, 1, 5))
+        self.criar_transacao('300.00', date(2025, 1, 20), tipo=TipoTransacao.DESPESA)
+        self.criar_transacao('200.00', date(2025, 2, 10))
+    
+    def fechamento(self, mes, conta=None):
+        return FechamentoMensal._base_manager.get(conta=conta or self.conta, mes=mes, ano=2025)
+    
+    def test_fechamentos_encadeados(self):
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        FechamentoService.fechar_mes(2, 2025, tenant_ids=[self.tenant_id])
+        
+        janeiro, fevereiro = self.fechamento(1), self.fechamento(2)
+        self.assertEqual(
+            (janeiro.saldo_inicial, janeiro.total_receitas, janeiro.total_despesas, janeiro.saldo_final),
+            (Decimal('0.00'), Decimal('1000.00'), Decimal('300.00'), Decimal('700.00'))
+        )
+        self.assertEqual((fevereiro.saldo_inicial, fevereiro.saldo_final), (Decimal('700.00'), Decimal('900.00')))
+    
+    def test_sem_fechamento_anterior_parte_do_snapshot(self):
+        FechamentoService.fechar_mes(2, 2025, tenant_ids=[self.tenant_id])
+        
+        self.assertEqual(self.fechamento(2).saldo_inicial, Decimal('700.00'))
+    
+    def test_idempotente(self):
+        primeiro = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        segundo = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        
+        self.assertEqual(len(primeiro['fechamentos']), 1)
+        self.assertEqual(segundo['fechamentos'], [])
+        self.assertEqual(FechamentoMensal._base_manager.filter(mes=1, ano=2025).count(), 1)
+    
+    def test_restrito_aos_tenants_informados(self):
+        connection.tenant_id = 2
+        outra = Conta.objects.create(nome='Conta de outro tenant')
+        connection.tenant_id = self.tenant_id
+        
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        
+        self.assertFalse(FechamentoMensal._base_manager.filter(conta=outra).exists())
+        FechamentoService.fechar_mes(1, 2025)
+        self.assertEqual(self.fechamento(1, conta=outra).saldo_final, Decimal('0.00'))
+    
+    def test_reabrir_recalcula_mes_e_desloca_posteriores(self):
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        FechamentoService.fechar_mes(2, 2025, tenant_ids=[self.tenant_id])
+        fevereiro_antes = self.fechamento(2)
+        
+        # Correção retroativa em janeiro, já fechado
+        self.criar_transacao('50.00', date(2025, 1, 25), tipo=TipoTransacao.DESPESA)
+        resultado = FechamentoService.reabrir(self.conta.id, 1, 2025)
+        
+        janeiro, fevereiro = self.fechamento(1), self.fechamento(2)
+        self.assertEqual((resultado['diferenca'], resultado['posteriores']), (Decimal('-50.00'), 1))
+        self.assertEqual((janeiro.total_despesas, janeiro.saldo_final), (Decimal('350.00'), Decimal('650.00')))
+        self.assertEqual(fevereiro.total_receitas, fevereiro_antes.total_receitas)
+        self.assertEqual(
+            (fevereiro.saldo_inicial, fevereiro.saldo_final),
+            (janeiro.saldo_final, fevereiro_antes.saldo_final - Decimal('50.00'))
+        )
+    
+    def test_reabrir_sem_diferenca_nao_altera_posteriores(self):
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        FechamentoService.fechar_mes(2, 2025, tenant_ids=[self.tenant_id])
+        
+        resultado = FechamentoService.reabrir(self.conta.id, 1, 2025)
+        
+        fevereiro = self.fechamento(2)
+        self.assertEqual((resultado['diferenca'], resultado['posteriores']), (Decimal('0.00'), 0))
+        self.assertEqual((fevereiro.saldo_inicial, fevereiro.saldo_final), (Decimal('700.00'), Decimal('900.00')))
+    
+    def test_reabrir_mes_nao_fechado(self):
+        with self.assertRaises(FechamentoMensal.DoesNotExist):
+            FechamentoService.reabrir(self.conta.id, 3, 2025)
+    
+    def test_status_vem_do_banco_e_inclui_contas_novas(self):
+        self.assertFalse(FechamentoService.status_fechamento(1, 2025)['concluido'])
+        
+        # O commit de cada escrita incrementa a versão do tenant (o TestCase não confirma a transação)
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        CacheTenant.invalidar(self.tenant_id)
+        self.assertTrue(FechamentoService.status_fechamento(1, 2025)['concluido'])
+        
+        Conta.objects.create(nome='Conta nova')
+        CacheTenant.invalidar(self.tenant_id)
+        status = FechamentoService.status_fechamento(1, 2025)
+        self.assertEqual((status['concluido'], status['contas_pendentes']), (False, 1))
+    
+    def test_comando_retoma_tenants_e_contas_pendentes(self):
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        connection.tenant_id = 2
+        outra = Conta.objects.create(nome='Conta de outro tenant')
+        connection.tenant_id = self.tenant_id
+        
+        self.assertEqual(FechamentoService.listar_tenants_pendentes(1, 2025), [2])
+        call_command('executar_fechamentos', mes=1, ano=2025, stdout=StringIO())
+        
+        self.assertTrue(FechamentoMensal._base_manager.filter(conta=outra, mes=1, ano=2025).exists())
+        self.assertEqual(FechamentoService.listar_tenants_pendentes(1, 2025), [])
+
+class CachePeriodoFechadoTest(FinancasTestCase):
+    """Escritas em massa em meses fechados descartam os agregados em cache desses meses."""
+    
+    def setUp(self):
+        super().setUp()
+        self.criar_transacao('1000.00', date(2025, 1, 5))
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        self.janeiro = date(2025, 1, 1)
+    
+    def total_janeiro(self, conta=None):
+        celulas = CachePeriodoFechado.celulas([conta or self.conta], self.janeiro, self.janeiro)
+        return sum(celula[3] for celula in celulas[((conta or self.conta).id, 2025, 1)])
+    
+    def saldo_fim_janeiro(self, conta=None):
+        return CachePeriodoFechado.saldos_fim_mes([conta or self.conta], self.janeiro, self.janeiro)[(2025, 1)]
+    
+    def test_lote_invalida_meses_alterados(self):
+        self.assertEqual((self.total_janeiro(), self.saldo_fim_janeiro()), (Decimal('1000.00'), Decimal('1000.00')))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            with SaldoService.lote():
+                self.criar_transacao('250.00', date(2025, 1, 15))
+        
+        self.assertEqual((self.total_janeiro(), self.saldo_fim_janeiro()), (Decimal('1250.00'), Decimal('1250.00')))
+    
+    def test_conta_recalculada_invalida_meses_fechados(self):
+        destino = Conta.objects.create(nome='Conta destino')
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        self.assertEqual(self.total_janeiro(destino), 0)
+        
+        # Como em transferir_dados_conta: update em massa e recálculo da conta destino
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic(), SaldoService.lote() as lote:
+                Transacao.objects.filter(conta=self.conta).update(conta=destino)
+                lote.recalcular(destino.id)
+        
+        self.assertEqual(
+            (self.total_janeiro(destino), self.saldo_fim_janeiro(destino)), (Decimal('1000.00'), Decimal('1000.00'))
+        )
+
+class TravaFechamentoTest(FinancasTestCase):
+    """Execuções concorrentes do fechamento não processam o mesmo tenant duas vezes."""
+    
+    def setUp(self):
+        super().setUp()
+        self.criar_transacao('500.00', date(2025, 1, 10))
+    
+    def test_tenant_travado_fica_em_andamento(self):
+        with FechamentoService.travar([self.tenant_id], 1, 2025) as travados:
+            self.assertEqual(travados, {self.tenant_id})
+            resultado = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        
+        self.assertEqual(resultado['em_andamento'], [self.tenant_id])
+        self.assertEqual(resultado['fechamentos'], [])
+        self.assertFalse(FechamentoMensal._base_manager.filter(mes=1, ano=2025).exists())
+        self.assertFalse(TravaFechamento._base_manager.exists())
+    
+    def test_trava_liberada_ao_final_do_bloco(self):
+        with FechamentoService.travar([self.tenant_id], 1, 2025):
+            pass
+        
+        resultado = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        self.assertEqual(resultado['em_andamento'], [])
+        self.assertEqual(len(resultado['fechamentos']), 1)
+    
+    def test_trava_abandonada_e_assumida(self):
+        chave = FechamentoService._chave_trava(self.tenant_id, 1, 2025)
+        trava = TravaFechamento._base_manager.create(chave=chave, dono='execucao-interrompida')
+        
+        resultado = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        self.assertEqual(resultado['em_andamento'], [self.tenant_id])
+        
+        TravaFechamento._base_manager.filter(pk=trava.pk).update(
+            criado_em=trava.criado_em - FechamentoService.TEMPO_MAXIMO_TRAVA - timedelta(seconds=1)
+        )
+        resultado = FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        self.assertEqual(resultado['em_andamento'], [])
+        self.assertEqual(FechamentoMensal._base_manager.get(conta=self.conta, mes=1, ano=2025).saldo_final, Decimal('500.00'))
+
+class CacheTenantTest(FinancasTestCase):
+    """A invalidação do tenant é um incremento de versão; a versão anterior expira pelo timeout."""
+    
+    def test_invalidar_muda_versao_sem_excluir_entradas(self):
+        self.assertEqual(CacheTenant.obter_ou_calcular('teste', lambda: 1), 1)
+        chave_anterior = CacheTenant.chave('teste')
+        
+        with mock.patch('financas.cache.excluir_prefixo') as excluir_prefixo:
+            CacheTenant.invalidar(self.tenant_id)
+        
+        excluir_prefixo.assert_not_called()
+        self.assertNotEqual(CacheTenant.chave('teste'), chave_anterior)
+        self.assertEqual(CacheTenant.obter_ou_calcular('teste', lambda: 2), 2)
+        self.assertEqual(cache.get(chave_anterior)['valor'], 1)
+
+class PaginacaoCursorTest(FinancasTestCase):
+    """A paginação por (data, id) percorre a listagem sem repetir nem pular transações."""
+    
+    def setUp(self):
+        super().setUp()
+        # Várias transações no mesmo dia cruzam as bordas das páginas
+        datas = [date(2025, 3, 1)] * 4 + [date(2025, 3, 2)] * 3 + [date(2025, 3, 5)]
+        for i, data in enumerate(datas):
+            self.criar_transacao(f'{i + 1}.00', data)
+        self.ordem = list(Transacao.objects.order_by('-data', '-id').values_list('id', flat=True))
+    
+    def paginar(self, cursor=None):
+        return TransacaoService.paginar_por_cursor(Transacao.objects.all(), cursor, tamanho=3)
+    
+    def ids(self, pagina):
+        return [transacao.id for transacao in pagina['transacoes']]
+    
+    def test_percorre_todas_uma_vez(self):
+        paginas = [self.paginar()]
+        while paginas[-1]['proximo']:
+            paginas.append(self.paginar(paginas[-1]['proximo']))
+        
+        self.assertEqual([id_ for pagina in paginas for id_ in self.ids(pagina)], self.ordem)
+        self.assertEqual([len(pagina['transacoes']) for pagina in paginas], [3, 3, 2])
+        self.assertIsNone(paginas[0]['anterior'])
+        self.assertIsNotNone(paginas[-1]['anterior'])
+    
+    def test_volta_para_a_pagina_anterior(self):
+        primeira = self.paginar()
+        segunda = self.paginar(primeira['proximo'])
+        terceira = self.paginar(segunda['proximo'])
+        
+        self.assertEqual(self.ids(self.paginar(terceira['anterior'])), self.ids(segunda))
+        voltando = self.paginar(segunda['anterior'])
+        self.assertEqual(self.ids(voltando), self.ids(primeira))
+        self.assertIsNone(voltando['anterior'])
+    
+    def test_pagina_exata_nao_tem_proxima(self):
+        Transacao.objects.filter(id__in=self.ordem[-2:]).delete()
+        
+        segunda = self.paginar(self.paginar()['proximo'])
+        self.assertEqual(self.ids(segunda), self.ordem[3:6])
+        self.assertIsNone(segunda['proximo'])
+    
+    def test_cursor_invalido_volta_ao_inicio(self):
+        cursor = self.paginar()['proximo']
+        
+        for invalido in (cursor[:-2] + 'xx', 'nao-e-um-cursor'):
+            pagina = self.paginar(invalido)
+            self.assertEqual(self.ids(pagina), self.ordem[:3])
+            self.assertIsNone(pagina['anterior'])
+
+class ImportacaoPlanilhaTest(FinancasTestCase):
+    """A importação recusa linhas em meses fechados e importa as demais."""
+    
+    def planilha(self, *linhas):
+        import pandas as pd
+        
+        arquivo = BytesIO()
+        colunas = ['descricao', 'valor', 'data', 'tipo', 'conta', 'categoria']
+        pd.DataFrame(linhas, columns=colunas).to_excel(arquivo, sheet_name='Transacoes', index=False)
+        arquivo.seek(0)
+        return arquivo
+    
+    def test_linha_em_mes_fechado_e_recusada(self):
+        self.criar_transacao('100.00', date(2025, 1, 5))
+        FechamentoService.fechar_mes(1, 2025, tenant_ids=[self.tenant_id])
+        
+        arquivo = self.planilha(
+            ('Retroativa', '50.00', '20/01/2025', 'receita', self.conta.nome, self.categoria.nome),
+            ('Aberta', '30.00', '2025-02-03', 'despesa', self.conta.nome, self.categoria.nome),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = TransacaoService.importar_transacoes_planilha(arquivo, None)
+        
+        self.assertEqual(resultado['transacoes_importadas'], 1)
+        self.assertEqual(resultado['erros'], ['Linha 2: Mês 01/2025 está fechado para a conta Conta corrente'])
+        self.assertFalse(Transacao.objects.filter(descricao='Retroativa').exists())
+        fechamento = FechamentoMensal._base_manager.get(conta=self.conta, mes=1, ano=2025)
+        self.assertEqual(fechamento.saldo_final, Decimal('100.00'))
+
+class ExclusaoEmCascataTest(FinancasTestCase):
+    """Excluir contas e categorias com transações não recria snapshot nem cubo."""
+    
+    def setUp(self):
+        super().setUp()
+        self.criar_transacao('100.00', date(2025, 1, 10))
+        self.criar_transacao('30.00', date(2025, 2, 5), tipo=TipoTransacao.DESPESA)
+    
+    def test_excluir_conta_com_transacoes(self):
+        conta_id = self.conta.id
+        self.conta.delete()
+        
+        self.assertFalse(Transacao._base_manager.filter(conta_id=conta_id).exists())
+        self.assertFalse(SaldoDiario._base_manager.filter(conta_id=conta_id).exists())
+        self.assertFalse(ResumoMensal._base_manager.filter(conta_id=conta_id).exists())
+    
+    def test_excluir_contas_por_queryset(self):
+        outra = Conta.objects.create(nome='Poupança')
+        self.criar_transacao('20.00', date(2025, 1, 15), conta=outra)
+        
+        Conta.objects.filter(pk=self.conta.pk).delete()
+        outra.refresh_from_db()
+        
+        self.assertFalse(SaldoDiario._base_manager.filter(conta_id=self.conta.pk).exists())
+        self.assertEqual(outra.saldo, Decimal('20.00'))
+        self.assertEqual(SaldoService.saldo_em(outra.id, date(2025, 1, 31)), Decimal('20.00'))
+    
+    def test_excluir_categoria_com_transacoes(self):
+        outra = Categoria.objects.create(nome='Salário')
+        self.criar_transacao('50.00', date(2025, 2, 20), categoria=outra)
+        
+        self.categoria.delete()
+        self.conta.refresh_from_db()
+        
+        # Só a transação da outra categoria continua na conta
+        self.assertEqual(self.conta.saldo, Decimal('50.00'))
+        self.assertEqual(SaldoService.saldo_em(self.conta.id, date(2025, 1, 31)), Decimal('0.00'))
+        self.assertEqual(SaldoService.saldo_em(self.conta.id, date(2025, 2, 28)), Decimal('50.00'))
+        self.assertEqual(
+            list(ResumoMensal._base_manager.filter(conta=self.conta).values_list('categoria_id', 'total')),
+            [(outra.id, Decimal('50.00'))]
+        )
+    
+    @override_settings(ROOT_URLCONF='financas.urls')
+    def test_view_excluir_conta(self):
+        usuario = CustomUser.objects.create_user(username='titular', password='senha-de-teste', id=self.tenant_id)
+        self.client.force_login(usuario)
+        
+        resposta = self.client.post(reverse('excluir_conta', args=[self.conta.id]), secure=True)
+        
+        self.assertEqual(resposta.status_code, 302)
+        self.assertFalse(Conta._base_manager.filter(pk=self.conta.pk).exists())
+        self.assertFalse(ResumoMensal._base_manager.filter(conta_id=self.conta.pk).exists())
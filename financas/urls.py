@@ -43,6 +43,7 @@ urlpatterns = [
     path('contas/excluir-segura/<int:conta_id>/', views.excluir_conta_segura, name='excluir_conta_segura'),
     path('contas/transferir-dados/<int:conta_origem_id>/', views.transferir_dados_conta, name='transferir_dados_conta'),
     path('relatorios/', views.relatorios, name='relatorios'),
+    path('api/relatorios/evolucao/', views.api_relatorio_evolucao, name='api_relatorio_evolucao'),
 
     # Rotas de fechamento mensal removidas - agora o fechamento é automático
     path('test-filter/', views.test_filter, name='test_filter'),
@@ -51,6 +52,8 @@ urlpatterns = [
     path('api/transacoes-por-categoria/', views.api_transacoes_por_categoria, name='api_transacoes_por_categoria'),
     path('api/evolucao-saldo/', views.api_evolucao_saldo, name='api_evolucao_saldo'),
     path('api/transacoes-recentes/', views.api_transacoes_recentes, name='api_transacoes_recentes'),
+    path('api/transacoes/busca/', views.api_buscar_transacoes, name='api_buscar_transacoes'),
+    path('api/dashboard/<str:widget>/', views.api_dashboard_widget, name='api_dashboard_widget'),
     path('compartilhar-whatsapp/', views.compartilhar_whatsapp, name='compartilhar_whatsapp'),
     # URLs de registro e autenticação
     path('registro/', views.registro_view, name='registro'),
@@ -91,10 +91,51 @@ def parse_currency_value(value_str):
     except InvalidOperation:
         raise ValueError(f"Valor inválido: {value_str}")
 
+def periodos_fechados(tenant_id):
+    """
+    Retorna o índice de períodos fechados de um tenant.
+    
+    O índice é carregado com uma única consulta e memorizado na conexão:
+    o TenantMiddleware o descarta a cada requisição e os signals de
+    FechamentoMensal o invalidam quando um fechamento é criado ou removido.
+    Fluxos em massa podem assim verificar milhares de datas sem consultas.
+    
+    Args:
+        tenant_id (int): Tenant das contas (None para contas sem tenant)
+    
+    Returns:
+        frozenset: Tuplas (conta_id, ano, mes) dos meses fechados
+    """
+    from django.db import connection
+    from .models import FechamentoMensal
+    
+    indices = getattr(connection, 'periodos_fechados', None)
+    if indices is None:
+        indices = connection.periodos_fechados = {}
+    
+    if tenant_id not in indices:
+        fechamentos = FechamentoMensal._base_manager.filter(fechado=True)
+        if tenant_id is None:
+            fechamentos = fechamentos.filter(conta__tenant_id__isnull=True)
+        else:
+            fechamentos = fechamentos.filter(conta__tenant_id=tenant_id)
+        indices[tenant_id] = frozenset(fechamentos.values_list('conta_id', 'ano', 'mes'))
+    
+    return indices[tenant_id]
+
+def invalidar_periodos_fechados():
+    """Descarta o índice de períodos fechados memorizado na conexão."""
+    from django.db import connection
+    
+    if hasattr(connection, 'periodos_fechados'):
+        delattr(connection, 'periodos_fechados')
+
 def verificar_mes_fechado(data, conta):
     """
     Verifica se uma data está em um mês que foi fechado para uma conta específica.
     
+    Consulta o índice memorizado de periodos_fechados(), sem uma consulta por chamada.
+    
     Args:
         data (date): Data a ser verificada
         conta (Conta): Conta para verificar o fechamento
@@ -102,18 +143,8 @@ def verificar_mes_fechado(data, conta):
     Returns:
         tuple: (bool, str) - (está_fechado, mensagem)
     """
-    from .models import FechamentoMensal
-    
     try:
-        # Busca fechamento para o ano/mês da data
-        fechamento = FechamentoMensal.objects.filter(
-            conta=conta,
-            ano=data.year,
-            mes=data.month,
-            fechado=True
-        ).first()
-        
-        if fechamento:
+        if (conta.id, data.year, data.month) in periodos_fechados(conta.tenant_id):
             return True, f"Mês {data.month}/{data.year} está fechado para a conta {conta.nome}"
         
         return False, "Mês não está fechado"
@@ -140,7 +171,8 @@ def verificar_fechamento_mensal(mes, ano):
 def verificar_e_executar_fechamento_automatico():
     """
     Verifica se é dia 1 do mês e executa o fechamento automático se necessário.
-    Esta função deve ser chamada em cada acesso ao dashboard.
+    Os dashboards não a chamam mais: o fechamento roda no comando
+    executar_fechamentos e as páginas leem FechamentoService.status_fechamento().
     
     Returns:
         tuple: (bool, str) - (True, mensagem) se o fechamento foi realizado, (False, mensagem) caso contrário
@@ -3,8 +3,9 @@ from django.db.models import Sum, Q
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.core.paginator import Paginator
 from django.http import JsonResponse, HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.views.decorators.http import require_http_methods
 from django.core.mail import send_mail
 from django.utils.crypto import get_random_string
@@ -15,6 +16,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import reverse
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import hashlib
 import json
 import pytz
 from decimal import Decimal
@@ -40,7 +42,7 @@ class TransacaoService:
     def criar_transacao(tipo, valor, descricao, categoria, conta, data=None):
         pass
 
-from .constants import TipoTransacao, SuccessMessages, ErrorMessages
+from .constants import TipoTransacao, SuccessMessages, ErrorMessages, CacheConfig, RelatorioConfig
 # Removendo importações de exceções que podem causar problemas
 # from .exceptions import ContaServiceError, TransacaoServiceError
 # Criar função get_logger local para evitar problemas de importação
@@ -74,7 +76,8 @@ def dashboard(request):
     """
     Dashboard principal com resumo financeiro.
     Utiliza services para centralizar a lógica de negócio.
-    Verifica e executa fechamento automático no dia 1 de cada mês.
+    O fechamento mensal é executado pelo comando executar_fechamentos; aqui
+    apenas o status em cache é consultado.
     """
     # Verificar se deve usar o layout moderno
     if request.GET.get('modern', False):
@@ -82,170 +85,144 @@ def dashboard(request):
     else:
         return dashboard_original(request)
         
+def _calcular_contexto_dashboard_modern(hoje):
+    """
+    Calcula os dados do dashboard moderno do tenant atual para o mês de hoje.
+    
+    O resultado é guardado em cache por CacheTenant, então não pode conter
+    querysets preguiçosos nem dados da requisição.
+    """
+    from .models import Transacao, Meta
+    
+    # Obter transações recentes ordenadas por data e horário de criação (mais recentes primeiro)
+    ultimas_transacoes = list(Transacao.objects.select_related('categoria').filter(
+        despesa_parcelada__isnull=True
+    ).order_by('-data', '-id')[:10])
+    
+    # Data atual para cálculos mensais
+    mes_atual = datetime(hoje.year, hoje.month, 1)
+    
+    # Obter resumo financeiro consolidado de todas as contas
+    total_receitas = Decimal('0.00')
+    total_despesas = Decimal('0.00')
+    saldo_anterior_total = Decimal('0.00')
+    saldo_atual_total = Decimal('0.00')
+    
+    # Resumo de todas as contas em uma única consulta agrupada
+    from .services import ContaService
+    resumos = ContaService.obter_resumos_financeiros(mes=hoje.month, ano=hoje.year)
+    contas = [resumo['conta'] for resumo in resumos.values()]
+    
+    for resumo in resumos.values():
+        # Somar totais
+        total_receitas += resumo['receitas']
+        total_despesas += resumo['despesas']
+        saldo_anterior_total += resumo['saldo_anterior']
+        saldo_atual_total += resumo['saldo_atual']
+    
+    # Percentuais para estatísticas
+    percentual_receitas = 100
+    percentual_despesas = 100
+    if total_receitas > 0:
+        percentual_receitas = 100
+    if total_despesas > 0:
+        percentual_despesas = 100
+    
+    # Dados para gráficos de categorias (apenas do mês atual), lidos do cubo
+    # mensal em uma única consulta; despesas parceladas ficam de fora
+    from .services import CategoriaService
+    fim_mes_atual = mes_atual.date() + relativedelta(months=1) - timedelta(days=1)
+    totais_categorias = CategoriaService.totais_por_categoria((mes_atual.date(), fim_mes_atual))
+    
+    despesas_por_categoria = [
+        {
+            'nome': categoria['nome'],
+            'total': float(categoria['total']),
+            'cor': categoria['cor'],
+            'percentual': categoria['percentual']
+        }
+        for categoria in totais_categorias['despesas']
+    ]
+    receitas_por_categoria = [
+        {
+            'nome': categoria['nome'],
+            'total': float(categoria['total']),
+            'cor': categoria['cor'],
+            'percentual': categoria['percentual']
+        }
+        for categoria in totais_categorias['receitas']
+    ]
+    
+    # Metas
+    metas = []
+    for meta in Meta.objects.all():
+        valor_atual = Decimal('0.00')
+        # Lógica para calcular progresso da meta
+        percentual = 0
+        if meta.valor_meta > 0:
+            percentual = (valor_atual / meta.valor_meta) * 100
+        
+        metas.append({
+            'nome': meta.descricao,
+            'atual': valor_atual,
+            'meta': meta.valor_meta,
+            'percentual': percentual,
+            'cor': 'success' if percentual >= 100 else 'primary'
+        })
+    
+    # Nomes dos meses em português
+    meses = [
+        'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+    ]
+    
+    # Determinar mês anterior para exibição
+    if hoje.month == 1:
+        mes_anterior_num = 12
+        ano_anterior = hoje.year - 1
+    else:
+        mes_anterior_num = hoje.month - 1
+        ano_anterior = hoje.year
+    
+    mes_anterior = datetime(ano_anterior, mes_anterior_num, 1)
+    
+    context = {
+        'ultimas_transacoes': ultimas_transacoes,
+        'total_receitas': total_receitas,
+        'total_despesas': total_despesas,
+        'saldo_atual': saldo_atual_total,
+        'saldo_anterior': saldo_anterior_total,
+        'mes_atual': mes_atual,
+        'mes_anterior': mes_anterior,
+        'percentual_receitas': percentual_receitas,
+        'percentual_despesas': percentual_despesas,
+        'despesas_por_categoria': despesas_por_categoria,
+        'receitas_por_categoria': receitas_por_categoria,
+        'metas': metas,
+        'contas': contas,
+    }
+    
+    return context
+
 @login_required
 def dashboard_modern(request):
     """
     Versão moderna do dashboard com layout repaginado.
     """
     try:
-        # Verificar e executar fechamento automático se for dia 1
-        from .utils import verificar_e_executar_fechamento_automatico
-        fechamento_realizado, mensagem_fechamento = verificar_e_executar_fechamento_automatico()
-        if fechamento_realizado:
-            messages.success(request, f"Fechamento automático realizado com sucesso: {mensagem_fechamento}")
-        
-        # Obter transações recentes ordenadas por data e horário de criação (mais recentes primeiro)
-        ultimas_transacoes = Transacao.objects.select_related('categoria').filter(
-            despesa_parcelada__isnull=True
-        ).order_by('-data', '-id')[:10]
+        # Status do fechamento do mês anterior (executado pelo comando executar_fechamentos)
+        from .services import FechamentoService
+        status_fechamento = FechamentoService.status_fechamento()
         
         # Data atual para cálculos mensais
         hoje = get_data_atual_brasil()
-        mes_atual = datetime(hoje.year, hoje.month, 1)
-        
-        # Obter resumo financeiro consolidado de todas as contas
-        total_receitas = Decimal('0.00')
-        total_despesas = Decimal('0.00')
-        saldo_anterior_total = Decimal('0.00')
-        saldo_atual_total = Decimal('0.00')
-        
-        contas = Conta.objects.all()
-        
-        for conta in contas:
-            try:
-                resumo = ContaService.obter_resumo_financeiro(
-                    conta.id, 
-                    mes=hoje.month, 
-                    ano=hoje.year
-                )
-                
-                # Somar totais
-                total_receitas += resumo['receitas']
-                total_despesas += resumo['despesas']
-                saldo_anterior_total += resumo['saldo_anterior']
-                saldo_atual_total += resumo['saldo_atual']
-                
-            except ContaServiceError as e:
-                logger.error(f"Erro ao obter resumo da conta {conta.nome}: {str(e)}")
-                messages.error(request, f"Erro ao carregar dados da conta {conta.nome}")
-        
-        # Percentuais para estatísticas
-        percentual_receitas = 100
-        percentual_despesas = 100
-        if total_receitas > 0:
-            percentual_receitas = 100
-        if total_despesas > 0:
-            percentual_despesas = 100
-    
-        # Dados para gráficos de categorias (apenas do mês atual)
-        despesas_por_categoria = []
-        receitas_por_categoria = []
-        
-        categorias = Categoria.objects.all()
-        
-        # Processar despesas por categoria
-        total_despesas_categorias = Decimal('0.00')
-        for categoria in categorias:
-            # Despesas por categoria
-            total_categoria = Transacao.objects.filter(
-                categoria=categoria, 
-                tipo__in=TipoTransacao.get_expense_types(),
-                despesa_parcelada__isnull=True,
-                data__month=hoje.month,
-                data__year=hoje.year
-            ).aggregate(total=Sum('valor'))
-            
-            if total_categoria['total']:
-                total_despesas_categorias += total_categoria['total']
-                despesas_por_categoria.append({
-                    'nome': categoria.nome,
-                    'total': float(total_categoria['total']),
-                    'icone': categoria.icone,
-                    'cor': categoria.cor
-                })
-        
-        # Calcular percentuais para despesas
-        for categoria in despesas_por_categoria:
-            if total_despesas_categorias > 0:
-                categoria['percentual'] = (categoria['total'] / float(total_despesas_categorias)) * 100
-            else:
-                categoria['percentual'] = 0
-        
-        # Processar receitas por categoria
-        total_receitas_categorias = Decimal('0.00')
-        for categoria in categorias:
-            # Receitas por categoria
-            total_categoria = Transacao.objects.filter(
-                categoria=categoria, 
-                tipo=TipoTransacao.RECEITA,
-                data__month=hoje.month,
-                data__year=hoje.year
-            ).aggregate(total=Sum('valor'))
-            
-            if total_categoria['total']:
-                total_receitas_categorias += total_categoria['total']
-                receitas_por_categoria.append({
-                    'nome': categoria.nome,
-                    'total': float(total_categoria['total']),
-                    'icone': categoria.icone,
-                    'cor': categoria.cor
-                })
-        
-        # Calcular percentuais para receitas
-        for categoria in receitas_por_categoria:
-            if total_receitas_categorias > 0:
-                categoria['percentual'] = (categoria['total'] / float(total_receitas_categorias)) * 100
-            else:
-                categoria['percentual'] = 0
-        
-        # Metas
-        metas = []
-        for meta in Meta.objects.all():
-            valor_atual = Decimal('0.00')
-            # Lógica para calcular progresso da meta
-            percentual = 0
-            if meta.valor_meta > 0:
-                percentual = (valor_atual / meta.valor_meta) * 100
-            
-            metas.append({
-                'nome': meta.descricao,
-                'atual': valor_atual,
-                'meta': meta.valor_meta,
-                'percentual': percentual,
-                'cor': 'success' if percentual >= 100 else 'primary'
-            })
-        
-        # Nomes dos meses em português
-        meses = [
-            'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-        ]
-        
-        # Determinar mês anterior para exibição
-        if hoje.month == 1:
-            mes_anterior_num = 12
-            ano_anterior = hoje.year - 1
-        else:
-            mes_anterior_num = hoje.month - 1
-            ano_anterior = hoje.year
         
-        mes_anterior = datetime(ano_anterior, mes_anterior_num, 1)
-        
-        context = {
-            'ultimas_transacoes': ultimas_transacoes,
-            'total_receitas': total_receitas,
-            'total_despesas': total_despesas,
-            'saldo_atual': saldo_atual_total,
-            'saldo_anterior': saldo_anterior_total,
-            'mes_atual': mes_atual,
-            'mes_anterior': mes_anterior,
-            'percentual_receitas': percentual_receitas,
-            'percentual_despesas': percentual_despesas,
-            'despesas_por_categoria': despesas_por_categoria,
-            'receitas_por_categoria': receitas_por_categoria,
-            'metas': metas,
-            'contas': contas,
-        }
+        # Dados do mês em cache por tenant, invalidados a cada escrita do tenant
+        from .services import CacheTenant
+        context = CacheTenant.obter_ou_calcular(
+            'dashboard_modern', lambda: _calcular_contexto_dashboard_modern(hoje), hoje.year, hoje.month
+        )
+        context['status_fechamento'] = status_fechamento
         
         return render(request, 'financas/dashboard_modern.html', context)
         
@@ -258,181 +235,104 @@ def dashboard_modern(request):
 def dashboard_original(request):
     """
     Dashboard principal com resumo financeiro.
-    Utiliza services para centralizar a lógica de negócio.
-    Verifica e executa fechamento automático no dia 1 de cada mês.
+    
+    Entrega apenas a estrutura da página, os rótulos do mês e a lista de
+    contas; resumo, categorias, transações recentes, fechamentos e metas são
+    carregados em paralelo pelo navegador a partir de api_dashboard_widget,
+    de modo que a resposta não espera pelo widget mais lento.
     """
-    try:
-        # Verificar e executar fechamento automático se for dia 1
-        from .utils import verificar_e_executar_fechamento_automatico
-        fechamento_realizado, mensagem_fechamento = verificar_e_executar_fechamento_automatico()
-        if fechamento_realizado:
-            messages.success(request, f"Fechamento automático realizado com sucesso: {mensagem_fechamento}")
-        
-        # Obter transações recentes ordenadas por data e horário de criação (mais recentes primeiro)
-        # EXCLUINDO despesas parceladas para isolamento completo
-        transacoes = Transacao.objects.select_related('categoria').filter(
-            despesa_parcelada__isnull=True
-        ).order_by('-data', '-id')[:10]
-        
-        # Data atual para cálculos mensais
-        hoje = get_data_atual_brasil()
-        
-        # Obter resumo financeiro consolidado de todas as contas
-        resumos_contas = []
-        total_receitas = Decimal('0.00')
-        total_despesas = Decimal('0.00')
-        saldo_anterior_total = Decimal('0.00')
-        saldo_atual_total = Decimal('0.00')
-        
-        contas = Conta.objects.all()
-        
-        for conta in contas:
-            try:
-                resumo = ContaService.obter_resumo_financeiro(
-                    conta.id, 
-                    mes=hoje.month, 
-                    ano=hoje.year
-                )
-                resumos_contas.append(resumo)
-                
-                # Somar totais
-                total_receitas += resumo['receitas']
-                total_despesas += resumo['despesas']
-                saldo_anterior_total += resumo['saldo_anterior']
-                saldo_atual_total += resumo['saldo_atual']
-                
-            except ContaServiceError as e:
-                logger.error(f"Erro ao obter resumo da conta {conta.nome}: {str(e)}")
-                messages.error(request, f"Erro ao carregar dados da conta {conta.nome}")
-        
-        # Movimentação do mês atual
-        movimentacao_mes = total_receitas - total_despesas
+    from .models import Conta
     
-        # Dados para gráficos de categorias (apenas do mês atual)
-        categorias = Categoria.objects.all()
-        dados_categorias = []
-        
-        logger.info(f"Processando {categorias.count()} categorias para o gráfico")
-        
-        for categoria in categorias:
-            # Excluir despesas parceladas dos gráficos de categorias e filtrar por mês atual
-            total_categoria = Transacao.objects.filter(
-                categoria=categoria, 
-                tipo__in=TipoTransacao.get_expense_types(),
-                despesa_parcelada__isnull=True,  # Excluir despesas parceladas
-                data__month=hoje.month,
-                data__year=hoje.year
-            ).aggregate(total=Sum('valor'))
-            
-            logger.info(f"Categoria {categoria.nome}: {total_categoria['total']} (mês {hoje.month}/{hoje.year})")
-            
-            if total_categoria['total']:
-                dados_categorias.append({
-                    'nome': categoria.nome,
-                    'valor': float(total_categoria['total']),
-                    'cor': categoria.cor
-                })
-        
-        logger.info(f"Total de categorias com dados: {len(dados_categorias)}")
-        
-        # Metas
-        metas = Meta.objects.all()
-        
-        # Nomes dos meses em português
-        meses = [
-            'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-        ]
-        
-        mes_atual = meses[hoje.month - 1]
-        ano_atual = hoje.year
-        
-        # Determinar mês anterior para exibição
-        if hoje.month == 1:
-            mes_anterior_num = 12
-            ano_anterior = hoje.year - 1
-        else:
-            mes_anterior_num = hoje.month - 1
-            ano_anterior = hoje.year
-        
-        mes_anterior = meses[mes_anterior_num - 1]
-        
-        # Verificar fechamentos do mês atual
-        fechamentos_mes_atual = FechamentoMensal.objects.filter(
-            mes=hoje.month,
-            ano=hoje.year
-        ).select_related('conta')
-        
-        # Obter saldo do mês anterior
-        from .utils import obter_fechamentos_por_periodo
-        fechamentos_mes_anterior = obter_fechamentos_por_periodo(mes_anterior_num, ano_anterior)
-        saldo_anterior = 0
-        if fechamentos_mes_anterior.exists():
-            saldo_anterior = fechamentos_mes_anterior.first().saldo_final
-        
-        # Preparar informações sobre fechamentos
-        info_fechamentos = {
-            'tem_fechamentos': fechamentos_mes_atual.exists(),
-            'contas_fechadas': list(fechamentos_mes_atual.values_list('conta__nome', flat=True)),
-            'total_contas_fechadas': fechamentos_mes_atual.count(),
-            'total_contas': contas.count(),
-            'eh_mes_atual': True,  # Sempre True no dashboard pois mostra mês atual
-        }
-        
-        # Serializar dados_categorias para JSON
-        dados_categorias_json = json.dumps(dados_categorias)
-        logger.info(f"Dados categorias JSON: {dados_categorias_json}")
-        
-        context = {
-            'transacoes': transacoes,
-            'total_receitas': total_receitas,
-            'total_despesas': total_despesas,
-            'saldo': saldo_atual_total,
-            'saldo_anterior': saldo_anterior_total,
-            'movimentacao_mes': movimentacao_mes,
-            'mes_atual': mes_atual,
-            'ano_atual': ano_atual,
-            'mes_anterior': mes_anterior,
-            'ano_anterior': ano_anterior,
-            'saldo_anterior': saldo_anterior,
-            'dados_categorias': dados_categorias,
-            'dados_categorias_json': dados_categorias_json,
-            'metas': metas,
-            'contas': contas,
-            'resumos_contas': resumos_contas,
-            'info_fechamentos': info_fechamentos,
-        }
-        
-        logger.info(f"Dashboard carregado com sucesso - {len(contas)} contas processadas")
-        return render(request, 'financas/dashboard.html', context)
-        
+    meses = [
+        'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+    ]
+    
+    hoje = get_data_atual_brasil()
+    mes_anterior = hoje.replace(day=1) - timedelta(days=1)
+    
+    try:
+        contas = list(Conta.objects.select_related('banco'))
     except Exception as e:
         logger.error(f"Erro inesperado no dashboard: {str(e)}")
         messages.error(request, "Erro ao carregar o dashboard. Tente novamente.")
+        contas = []
+    
+    context = {
+        'mes_atual': meses[hoje.month - 1],
+        'ano_atual': hoje.year,
+        'mes_anterior': meses[mes_anterior.month - 1],
+        'ano_anterior': mes_anterior.year,
+        'contas': contas,
+    }
+    
+    return render(request, 'financas/dashboard.html', context)
+
+@login_required
+def api_dashboard_widget(request, widget):
+    """
+    API endpoint com os dados de um widget do dashboard.
+    
+    Os dados do tenant vêm do cache compartilhado (CacheTenant). A resposta
+    leva ETag e Cache-Control privado: dentro de max-age o navegador nem
+    consulta o servidor e, depois, revalida com If-None-Match e recebe 304
+    enquanto os dados não mudarem.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+    
+    try:
+        from .services import CacheTenant, DashboardService, FechamentoService
         
-        # Contexto mínimo em caso de erro
-        context = {
-            'transacoes': [],
-            'total_receitas': 0,
-            'total_despesas': 0,
-            'saldo': 0,
-            'saldo_anterior': 0,
-            'movimentacao_mes': 0,
-            'mes_atual': 'N/A',
-            'ano_atual': timezone.now().year,
-            'dados_categorias': [],
-            'metas': [],
-            'contas': [],
+        hoje = get_data_atual_brasil()
+        widgets = {
+            'resumo': lambda: DashboardService.resumo(hoje),
+            'categorias': lambda: DashboardService.categorias(hoje),
+            'recentes': lambda: DashboardService.transacoes_recentes(),
+            'fechamento': lambda: DashboardService.fechamentos(hoje),
         }
         
-        return render(request, 'financas/dashboard.html', context)
+        if widget == 'metas':
+            # Metas não pertencem a um tenant, então não há versão que as invalide
+            dados = DashboardService.metas()
+        elif widget in widgets:
+            dados = CacheTenant.obter_ou_calcular(f'dashboard:{widget}', widgets[widget], hoje.isoformat())
+        else:
+            return JsonResponse({'error': 'Widget não encontrado'}, status=404)
+        
+        if widget == 'fechamento':
+            # Status global do job de fechamento, em cache próprio
+            dados = dict(dados, status=FechamentoService.status_fechamento())
+        
+        corpo = json.dumps(dados, cls=DjangoJSONEncoder)
+        etag = '"%s"' % hashlib.md5(corpo.encode()).hexdigest()
+        
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(corpo, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(
+            response,
+            private=True,
+            max_age=CacheConfig.DASHBOARD_WIDGET_MAX_AGE,
+            stale_while_revalidate=CacheConfig.DASHBOARD_WIDGET_STALE,
+        )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    except Exception as e:
+        logger.error(f"Erro na API do widget {widget} do dashboard: {e}")
+        return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
 
 @login_required
 def transacoes(request):
     """
     Lista transações com filtros usando TransacaoService.
-    Inclui paginação, totalizadores e filtro por mês/ano.
+    Inclui paginação por cursor, totalizadores e filtro por mês/ano.
     """
+    from .exceptions import TransacaoServiceError
+    from .models import Categoria
+    from .services import TransacaoService
+    
     try:
         # Obter parâmetros de filtro de mês/ano
         mes = request.GET.get('mes')
@@ -466,7 +366,10 @@ def transacoes(request):
         }
         
         # Se não há filtros de data, aplicar filtro padrão dos últimos 30 dias
-        if not filtros['data_inicio'] and not filtros['data_fim'] and not any(request.GET.values()):
+        # (o cursor só indica a página, não conta como filtro)
+        if not filtros['data_inicio'] and not filtros['data_fim'] and not any(
+            valor for chave, valor in request.GET.items() if chave != 'cursor'
+        ):
             data_fim = get_data_atual_brasil()
             data_inicio = data_fim - timedelta(days=30)
             filtros['data_inicio'] = data_inicio.strftime('%Y-%m-%d')
@@ -478,27 +381,36 @@ def transacoes(request):
         # Obter transações usando o service
         transacoes = TransacaoService.listar_transacoes_com_filtros(**filtros)
         
-        # Calcular totalizadores para as transações filtradas
-        totalizadores = TransacaoService.calcular_totalizadores(transacoes)
+        # Totais e quantidade em uma consulta, em cache por filtro e versão dos dados do tenant
+        totalizadores = TransacaoService.calcular_totalizadores(transacoes, filtros)
+        total = totalizadores['total_transacoes']
+        
+        # Paginação por cursor em (data, id): sem COUNT nem OFFSET, o custo de
+        # qualquer página é o da primeira
+        pagina = TransacaoService.paginar_por_cursor(transacoes, request.GET.get('cursor'))
         
-        # Paginação
-        paginator = Paginator(transacoes, 20)  # 20 transações por página
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        def url_pagina(cursor):
+            if not cursor:
+                return None
+            parametros = request.GET.copy()
+            parametros['cursor'] = cursor
+            return '?' + parametros.urlencode()
         
         # Obter categorias para o formulário de filtro
         categorias = Categoria.objects.all().order_by('nome')
         
         context = {
-            'page_obj': page_obj,
-            'transacoes': page_obj,  # Para compatibilidade com templates existentes
+            'transacoes': pagina['transacoes'],
+            'url_pagina_anterior': url_pagina(pagina['anterior']),
+            'url_proxima_pagina': url_pagina(pagina['proximo']),
+            'total_transacoes': total,
             'categorias': categorias,
             'filtros_aplicados': filtros,
             'tipos_transacao': TipoTransacao.CHOICES,
             'totalizadores': totalizadores,
         }
         
-        logger.info(f"Lista de transações carregada - {transacoes.count()} transações encontradas")
+        logger.info(f"Lista de transações carregada - {len(pagina['transacoes'])} de {total} transações")
         return render(request, 'financas/transacoes.html', context)
         
     except TransacaoServiceError as e:
@@ -507,7 +419,6 @@ def transacoes(request):
         
         # Contexto mínimo em caso de erro
         context = {
-            'page_obj': None,
             'transacoes': [],
             'categorias': [],
             'filtros_aplicados': {},
@@ -521,7 +432,6 @@ def transacoes(request):
         
         # Contexto mínimo em caso de erro
         context = {
-            'page_obj': None,
             'transacoes': [],
             'categorias': [],
             'filtros_aplicados': {},
@@ -563,6 +473,10 @@ def importar_transacoes(request):
     """
     Importa transações a partir de uma planilha Excel.
     """
+    from .exceptions import TransacaoServiceError
+    from .models import Categoria, Conta
+    from .services import TransacaoService
+    
     if request.method == 'POST':
         try:
             # Verificar se o arquivo foi enviado
@@ -658,97 +572,95 @@ def salvar_correcao_importacao(request):
     """Salva as correções de dados inválidos da importação."""
     if request.method == 'POST':
         try:
+            from .services import SaldoService
+            
             tenant_id = get_tenant_id(request.user)
             total_linhas = int(request.POST.get('total_linhas', 0))
             transacoes_salvas = 0
             erros = []
             
-            for i in range(total_linhas):
-                try:
-                    # Obter dados do formulário
-                    descricao = request.POST.get(f'descricao_{i}')
-                    valor_str = request.POST.get(f'valor_{i}')
-                    data_str = request.POST.get(f'data_{i}')
-                    tipo = request.POST.get(f'tipo_{i}')
-                    conta_id = request.POST.get(f'conta_{i}')
-                    categoria_id = request.POST.get(f'categoria_{i}')
-                    responsavel = request.POST.get(f'responsavel_{i}')
-                    linha = request.POST.get(f'linha_{i}')
-                    
-                    # Validar dados obrigatórios
-                    if not all([descricao, valor_str, data_str, tipo, conta_id]):
-                        erros.append(f"Linha {linha}: Campos obrigatórios não preenchidos")
-                        continue
-                    
-                    # Converter valor para decimal
-                    try:
-                        valor_str = valor_str.replace('.', '').replace(',', '.')
-                        valor = Decimal(valor_str)
-                    except:
-                        erros.append(f"Linha {linha}: Valor inválido")
-                        continue
-                    
-                    # Converter data
+            # Saldos ajustados uma única vez por conta ao final do lote
+            with SaldoService.lote():
+                for i in range(total_linhas):
                     try:
-                        # O campo input type="date" já retorna no formato YYYY-MM-DD
-                        data = datetime.strptime(data_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        # Tentar outros formatos possíveis
+                        # Obter dados do formulário
+                        descricao = request.POST.get(f'descricao_{i}')
+                        valor_str = request.POST.get(f'valor_{i}')
+                        data_str = request.POST.get(f'data_{i}')
+                        tipo = request.POST.get(f'tipo_{i}')
+                        conta_id = request.POST.get(f'conta_{i}')
+                        categoria_id = request.POST.get(f'categoria_{i}')
+                        responsavel = request.POST.get(f'responsavel_{i}')
+                        linha = request.POST.get(f'linha_{i}')
+                        
+                        # Validar dados obrigatórios
+                        if not all([descricao, valor_str, data_str, tipo, conta_id]):
+                            erros.append(f"Linha {linha}: Campos obrigatórios não preenchidos")
+                            continue
+                        
+                        # Converter valor para decimal
                         try:
-                            formatos = ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%d.%m.%Y', '%Y/%m/%d', '%Y.%m.%d']
-                            data = None
-                            for formato in formatos:
-                                try:
-                                    data = datetime.strptime(data_str, formato).date()
-                                    break
-                                except ValueError:
+                            valor_str = valor_str.replace('.', '').replace(',', '.')
+                            valor = Decimal(valor_str)
+                        except:
+                            erros.append(f"Linha {linha}: Valor inválido")
+                            continue
+                        
+                        # Converter data
+                        try:
+                            # O campo input type="date" já retorna no formato YYYY-MM-DD
+                            data = datetime.strptime(data_str, '%Y-%m-%d').date()
+                        except ValueError:
+                            # Tentar outros formatos possíveis
+                            try:
+                                formatos = ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%d.%m.%Y', '%Y/%m/%d', '%Y.%m.%d']
+                                data = None
+                                for formato in formatos:
+                                    try:
+                                        data = datetime.strptime(data_str, formato).date()
+                                        break
+                                    except ValueError:
+                                        continue
+                                if data is None:
+                                    erros.append(f"Linha {linha}: Data inválida. Use o formato YYYY-MM-DD")
                                     continue
-                            if data is None:
+                            except Exception:
                                 erros.append(f"Linha {linha}: Data inválida. Use o formato YYYY-MM-DD")
                                 continue
-                        except Exception:
-                            erros.append(f"Linha {linha}: Data inválida. Use o formato YYYY-MM-DD")
-                            continue
-                    
-                    # Obter conta e categoria
-                    try:
-                        conta = Conta.objects.get(id=conta_id, tenant_id=tenant_id)
-                    except:
-                        erros.append(f"Linha {linha}: Conta não encontrada")
-                        continue
-                    
-                    categoria = None
-                    if categoria_id:
+                        
+                        # Obter conta e categoria
                         try:
-                            categoria = Categoria.objects.get(id=categoria_id, tenant_id=tenant_id)
+                            conta = Conta.objects.get(id=conta_id, tenant_id=tenant_id)
                         except:
-                            erros.append(f"Linha {linha}: Categoria não encontrada")
+                            erros.append(f"Linha {linha}: Conta não encontrada")
                             continue
+                        
+                        categoria = None
+                        if categoria_id:
+                            try:
+                                categoria = Categoria.objects.get(id=categoria_id, tenant_id=tenant_id)
+                            except:
+                                erros.append(f"Linha {linha}: Categoria não encontrada")
+                                continue
+                        
+                        # Criar transação
+                        transacao = Transacao(
+                            descricao=descricao,
+                            valor=valor,
+                            data=data,
+                            tipo=tipo,
+                            conta=conta,
+                            categoria=categoria,
+                            responsavel=responsavel,
+                            tenant_id=tenant_id
+                        )
+                        # O signal de post_save acumula o delta no lote de saldo
+                        transacao.save()
+                        
+                        transacoes_salvas += 1
                     
-                    # Criar transação
-                    transacao = Transacao(
-                        descricao=descricao,
-                        valor=valor,
-                        data=data,
-                        tipo=tipo,
-                        conta=conta,
-                        categoria=categoria,
-                        responsavel=responsavel,
-                        tenant_id=tenant_id
-                    )
-                    transacao.save()
-                    
-                    # Atualizar saldo da conta
-                    if tipo == 'R':
-                        conta.saldo += valor
-                    else:
-                        conta.saldo -= valor
-                    conta.save()
-                    
-                    transacoes_salvas += 1
-                    
-                except Exception as e:
-                    erros.append(f"Linha {linha}: Erro ao salvar - {str(e)}")
+                    except Exception as e:
+                        erros.append(f"Linha {linha}: Erro ao salvar - {str(e)}")
             
             # Limpar dados inválidos da sessão
             if 'dados_invalidos' in request.session:
@@ -1601,6 +1513,8 @@ def editar_conta(request, conta_id):
     return render(request, 'financas/editar_conta.html', context)
 
 def excluir_conta(request, conta_id):
+    from .models import Conta
+    
     conta = get_object_or_404(Conta.objects, id=conta_id)
     
     if request.method == 'POST':
@@ -1616,6 +1530,8 @@ def excluir_conta(request, conta_id):
 
 @login_required
 def excluir_conta_segura(request, conta_id):
+    from .models import Conta, DespesaParcelada, Transacao
+    
     conta = get_object_or_404(Conta.objects, id=conta_id)
     
     # Verificações de segurança
@@ -1678,23 +1594,28 @@ def transferir_dados_conta(request, conta_origem_id):
         conta_destino = get_object_or_404(Conta.objects, id=conta_destino_id)
         
         try:
-            # Transferir transações
-            transacoes = Transacao.objects.filter(conta=conta_origem)
-            qtd_transacoes = transacoes.count()
-            transacoes.update(conta=conta_destino)
-            
-            # Transferir despesas parceladas
-            despesas = DespesaParcelada.objects.filter(conta=conta_origem)
-            qtd_despesas = despesas.count()
-            despesas.update(conta=conta_destino)
-            
-            # Atualizar saldos
-            conta_destino.atualizar_saldo()
-            
-            # Excluir conta origem
-            nome_conta_origem = conta_origem.nome
-            nome_conta_destino = conta_destino.nome
-            conta_origem.delete()
+            from django.db import transaction
+            from .services import SaldoService
+            
+            # O update em massa não dispara signals: a conta destino é recalculada
+            # uma única vez quando o lote é confirmado
+            with transaction.atomic(), SaldoService.lote() as lote:
+                # Transferir transações
+                transacoes = Transacao.objects.filter(conta=conta_origem)
+                qtd_transacoes = transacoes.count()
+                transacoes.update(conta=conta_destino)
+                
+                # Transferir despesas parceladas
+                despesas = DespesaParcelada.objects.filter(conta=conta_origem)
+                qtd_despesas = despesas.count()
+                despesas.update(conta=conta_destino)
+                
+                lote.recalcular(conta_destino.id)
+                
+                # Excluir conta origem
+                nome_conta_origem = conta_origem.nome
+                nome_conta_destino = conta_destino.nome
+                conta_origem.delete()
             
             messages.success(request, 
                 f'Dados transferidos com sucesso! {qtd_transacoes} transação(ões) e {qtd_despesas} despesa(s) parcelada(s) '
@@ -1712,21 +1633,24 @@ def transferir_dados_conta(request, conta_origem_id):
     }
     return render(request, 'financas/transferir_dados_conta.html', context)
 
-@login_required
-def relatorios(request):
-    from datetime import datetime, timedelta
-    from django.db.models import Q
-    from .utils import get_data_atual_brasil
+def _periodo_relatorio(request, hoje):
+    """
+    Resolve o período e a janela da evolução pedidos nos parâmetros GET de relatórios.
+    
+    Args:
+        request: Requisição com periodo, tipo_exibicao, data_inicio e data_fim
+        hoje (date): Data atual no fuso do Brasil
+    
+    Returns:
+        tuple: (periodo, tipo_exibicao, data_inicio, data_fim, inicio_evolucao)
+    """
+    from .services import RelatorioService
     
-    # Obter parâmetros dos filtros
     periodo = request.GET.get('periodo', 'mes_atual')
     tipo_exibicao = request.GET.get('tipo_exibicao', 'mensal')
     data_inicio_param = request.GET.get('data_inicio')
     data_fim_param = request.GET.get('data_fim')
     
-    # Definir datas baseadas no período selecionado usando fuso horário do Brasil
-    hoje = get_data_atual_brasil()
-    
     if periodo == 'hoje':
         data_inicio = hoje
         data_fim = hoje
@@ -1745,286 +1669,75 @@ def relatorios(request):
         # Data atual (não incluir datas futuras)
         data_fim = hoje
     
-    # Filtrar transações pelo período
-    filtro_periodo = Q(data__gte=data_inicio, data__lte=data_fim)
+    if tipo_exibicao not in RelatorioService.GRANULARIDADES:
+        tipo_exibicao = 'mensal'
     
-    # Dados para relatórios baseados no período filtrado
-    # Usando objects.filter já aplica o TenantManager automaticamente
-    receitas = Transacao.objects.filter(tipo='receita').filter(filtro_periodo).aggregate(total=Sum('valor'))
-    despesas = Transacao.objects.filter(tipo__in=['despesa', 'saida']).filter(filtro_periodo).aggregate(total=Sum('valor'))
+    # Na visão mensal de períodos curtos a evolução mostra os últimos 12 meses
+    inicio_evolucao = data_inicio
+    if tipo_exibicao == 'mensal' and periodo in ['mes_atual', 'ultimos_30_dias']:
+        inicio_evolucao = data_fim.replace(day=1) - relativedelta(months=11)
     
-    total_receitas = receitas['total'] if receitas['total'] else 0
-    total_despesas = despesas['total'] if despesas['total'] else 0
-    saldo = total_receitas - total_despesas
+    return periodo, tipo_exibicao, data_inicio, data_fim, inicio_evolucao
+
+def _dados_evolucao(serie, limite):
+    """Reduz a série da evolução a no máximo `limite` pontos e a formata para o gráfico."""
+    from .services import RelatorioService
     
-    # Dados por categoria para gráfico (filtrado pelo período)
-    # Usando objects.all() já aplica o TenantManager automaticamente
-    categorias = Categoria.objects.all()
-    dados_categorias = []
-    
-    for categoria in categorias:
-        # TenantManager já é aplicado automaticamente
-        total_categoria = Transacao.objects.filter(categoria=categoria, tipo='despesa').filter(filtro_periodo).aggregate(total=Sum('valor'))
-        if total_categoria['total']:
-            dados_categorias.append({
-                'nome': categoria.nome,
-                'cor': categoria.cor,
-                'valor': float(total_categoria['total']),
-                'percentual': round((float(total_categoria['total']) / float(total_despesas)) * 100, 1) if total_despesas > 0 else 0
-            })
+    return [
+        {
+            'data': ponto['rotulo'],
+            'saldo': float(ponto['saldo'])
+        }
+        for ponto in RelatorioService.reduzir_serie(serie, limite)
+    ]
+
+@login_required
+def relatorios(request):
+    from django.db.models import Q
+    from .models import Transacao
+    from .services import RelatorioService
+    from .utils import get_data_atual_brasil
     
-    # Ordenar categorias do maior para menor valor
-    dados_categorias.sort(key=lambda x: x['valor'], reverse=True)
+    # Definir datas baseadas no período selecionado usando fuso horário do Brasil
+    hoje = get_data_atual_brasil()
+    periodo, tipo_exibicao, data_inicio, data_fim, inicio_evolucao = _periodo_relatorio(request, hoje)
     
-    # Dados de evolução do saldo baseado no tipo de exibição
-    dados_evolucao = []
+    # Série temporal da evolução: uma consulta agrupada para todo o período,
+    # qualquer que seja a granularidade (TenantManager já é aplicado automaticamente)
+    serie = RelatorioService.serie_temporal(inicio_evolucao, data_fim, tipo_exibicao)
     
-    if tipo_exibicao == 'diario':
-        # Evolução diária no período selecionado
-        saldo_acumulado = 0
-        data_atual = data_inicio
-        
-        while data_atual <= data_fim:
-            # Calcular receitas e despesas do dia
-            # TenantManager já é aplicado automaticamente
-            receitas_dia = Transacao.objects.filter(
-                tipo='receita',
-                data=data_atual
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            despesas_dia = Transacao.objects.filter(
-                tipo='despesa',
-                data=data_atual
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            saldo_acumulado += float(receitas_dia) - float(despesas_dia)
-            
-            dados_evolucao.append({
-                'data': data_atual.strftime('%d/%m'),
-                'saldo': saldo_acumulado
-            })
-            
-            data_atual += timedelta(days=1)
-            
-    elif tipo_exibicao == 'semanal':
-        # Evolução semanal no período selecionado
-        saldo_acumulado = 0
-        data_atual = data_inicio
-        
-        while data_atual <= data_fim:
-            # Início e fim da semana
-            inicio_semana = data_atual - timedelta(days=data_atual.weekday())
-            fim_semana = inicio_semana + timedelta(days=6)
-            
-            # Ajustar para não ultrapassar o período
-            if fim_semana > data_fim:
-                fim_semana = data_fim
-            
-            # Calcular receitas e despesas da semana
-            # TenantManager já é aplicado automaticamente
-            receitas_semana = Transacao.objects.filter(
-                tipo='receita',
-                data__gte=inicio_semana,
-                data__lte=fim_semana
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            despesas_semana = Transacao.objects.filter(
-                tipo='despesa',
-                data__gte=inicio_semana,
-                data__lte=fim_semana
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            saldo_acumulado += float(receitas_semana) - float(despesas_semana)
-            
-            dados_evolucao.append({
-                'data': f"{inicio_semana.strftime('%d/%m')} - {fim_semana.strftime('%d/%m')}",
-                'saldo': saldo_acumulado
-            })
-            
-            data_atual = fim_semana + timedelta(days=1)
-            
-    else:  # mensal (padrão)
-        # CORREÇÃO: Sempre incluir o mês atual, mesmo quando há fechamentos
-        # TenantManager já é aplicado automaticamente
-        try:
-            fechamentos = FechamentoMensal.objects.filter(fechado=True).order_by('ano', 'mes')
-            
-            # Data atual para cálculos
-            hoje = get_data_atual_brasil()
-            mes_atual = hoje.month
-            ano_atual = hoje.year
-            
-            # Tratamento para o caso da coluna tenant_id não existir ainda
-            # Isso é uma solução temporária até que a migração seja aplicada
-            fechamentos_existem = False
-            try:
-                fechamentos_existem = fechamentos.exists()
-            except Exception as e:
-                logger.error(f"Erro ao verificar fechamentos: {str(e)}")
-                fechamentos_existem = False
-            
-            if fechamentos_existem and periodo in ['mes_atual', 'ultimos_30_dias']:
-                # Usar fechamentos até o mês anterior + calcular mês atual
-                try:
-                    fechamentos_anteriores = fechamentos.filter(
-                        Q(ano__lt=ano_atual) | Q(ano=ano_atual, mes__lt=mes_atual)
-                    ).order_by('ano', 'mes')
-                    
-                    # Pegar os últimos 11 fechamentos para deixar espaço para o mês atual
-                    if fechamentos_anteriores.count() > 11:
-                        fechamentos_anteriores = fechamentos_anteriores[fechamentos_anteriores.count()-11:]
-                    
-                    # Adicionar fechamentos anteriores
-                    for fechamento in fechamentos_anteriores:
-                        meses = [
-                            '', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
-                            'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez'
-                        ]
-                        dados_evolucao.append({
-                            'data': f"{meses[fechamento.mes]}/{fechamento.ano}",
-                            'saldo': float(fechamento.saldo_final)
-                        })
-                except Exception as e:
-                    logger.error(f"Erro ao processar fechamentos anteriores: {str(e)}")
-                    # Continuar sem os dados de fechamentos anteriores
-            
-            # SEMPRE calcular e incluir o mês atual
-            data_inicio_mes = hoje.replace(day=1)
-            
-            # Saldo inicial do mês (último fechamento ou saldo das contas)
-            saldo_inicial_mes = 0
-            try:
-                if 'fechamentos_anteriores' in locals() and hasattr(fechamentos_anteriores, 'exists') and fechamentos_anteriores.exists():
-                    # Somar saldos finais de todas as contas do último fechamento
-                    ultimo_fechamento_mes = fechamentos_anteriores.last().mes
-                    ultimo_fechamento_ano = fechamentos_anteriores.last().ano
-                    try:
-                        fechamentos_ultimo_mes = FechamentoMensal.objects.filter(
-                            ano=ultimo_fechamento_ano,
-                            mes=ultimo_fechamento_mes,
-                            fechado=True
-                        )
-                        saldo_inicial_mes = sum(float(f.saldo_final) for f in fechamentos_ultimo_mes)
-                    except Exception as e:
-                        logger.error(f"Erro ao buscar fechamentos do último mês: {str(e)}")
-                        # Usar saldo das contas como alternativa
-                        saldo_inicial_mes = sum(float(conta.saldo) for conta in Conta.objects.all())
-            except Exception as e:
-                logger.error(f"Erro ao calcular saldo inicial do mês: {str(e)}")
-                # Usar zero como fallback
-            else:
-                # Se não há fechamentos, usar saldo atual das contas
-                # TenantManager já é aplicado automaticamente
-                contas = Conta.objects.all()
-                saldo_inicial_mes = sum(float(conta.saldo) for conta in contas)
-        except Exception as e:
-            logger.error(f"Erro ao processar fechamentos: {str(e)}")
-            # Continuar sem os dados de fechamentos
-            # TenantManager já é aplicado automaticamente
-            contas = Conta.objects.all()
-            saldo_inicial_mes = sum(float(conta.saldo) for conta in contas)
-            
-            # Transações do mês atual
-            # TenantManager já é aplicado automaticamente
-            receitas_mes_atual = Transacao.objects.filter(
-                tipo='receita',
-                data__gte=data_inicio_mes,
-                data__lte=hoje
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            despesas_mes_atual = Transacao.objects.filter(
-                tipo='despesa',
-                data__gte=data_inicio_mes,
-                data__lte=hoje
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            saldo_mes_atual = saldo_inicial_mes + float(receitas_mes_atual) - float(despesas_mes_atual)
-            
-            # Adicionar mês atual
-            meses = [
-                '', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
-                'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez'
-            ]
-            
-            dados_evolucao.append({
-                'data': f"{meses[mes_atual]}/{ano_atual}",
-                'saldo': saldo_mes_atual
-            })
-        else:
-            # Evolução mensal baseada em transações
-            saldo_acumulado = 0
-            data_atual = data_inicio.replace(day=1)  # Primeiro dia do mês
-            
-            # Criar um conjunto para rastrear meses já processados
-            meses_processados = set()
-            
-            while data_atual <= data_fim:
-                # Gerar uma chave única para o mês/ano
-                mes_ano_key = f"{data_atual.month}-{data_atual.year}"
-                
-                # Verificar se este mês já foi processado
-                if mes_ano_key in meses_processados:
-                    # Se já processamos este mês, avançamos para o próximo
-                    if data_atual.month == 12:
-                        data_atual = data_atual.replace(year=data_atual.year + 1, month=1)
-                    else:
-                        data_atual = data_atual.replace(month=data_atual.month + 1)
-                    continue
-                
-                # Marcar este mês como processado
-                meses_processados.add(mes_ano_key)
-                
-                # Último dia do mês
-                if data_atual.month == 12:
-                    fim_mes = data_atual.replace(year=data_atual.year + 1, month=1, day=1) - timedelta(days=1)
-                else:
-                    fim_mes = data_atual.replace(month=data_atual.month + 1, day=1) - timedelta(days=1)
-                
-                # Ajustar para não ultrapassar o período
-                if fim_mes > data_fim:
-                    fim_mes = data_fim
-                
-                # Calcular receitas e despesas do mês
-                # TenantManager já é aplicado automaticamente
-                receitas_mes = Transacao.objects.filter(
-                    tipo='receita',
-                    data__gte=data_atual,
-                    data__lte=fim_mes
-                ).aggregate(total=Sum('valor'))['total'] or 0
-                
-                despesas_mes = Transacao.objects.filter(
-                    tipo='despesa',
-                    data__gte=data_atual,
-                    data__lte=fim_mes
-                ).aggregate(total=Sum('valor'))['total'] or 0
-                
-                saldo_acumulado += float(receitas_mes) - float(despesas_mes)
-                
-                meses = [
-                    '', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
-                    'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez'
-                ]
-                
-                dados_evolucao.append({
-                    'data': f"{meses[data_atual.month]}/{data_atual.year}",
-                    'saldo': saldo_acumulado
-                })
-                
-                # Próximo mês
-                if data_atual.month == 12:
-                    data_atual = data_atual.replace(year=data_atual.year + 1, month=1)
-                else:
-                    data_atual = data_atual.replace(month=data_atual.month + 1)
-                
-                if data_atual > data_fim:
-                    break
+    # Totais do período: somados da própria série quando ela cobre exatamente o
+    # período; senão, agregação condicional em uma única consulta
+    if inicio_evolucao == data_inicio:
+        total_receitas = sum((ponto['receitas'] for ponto in serie), Decimal('0.00'))
+        total_despesas = sum((ponto['despesas'] for ponto in serie), Decimal('0.00'))
+    else:
+        totais = Transacao.objects.filter(data__gte=data_inicio, data__lte=data_fim).aggregate(
+            receitas=Sum('valor', filter=Q(tipo=TipoTransacao.RECEITA)),
+            despesas=Sum('valor', filter=Q(tipo__in=TipoTransacao.get_expense_types())),
+        )
+        total_receitas = totais['receitas'] or 0
+        total_despesas = totais['despesas'] or 0
+    saldo = total_receitas - total_despesas
     
-    # Adicionar log para depuração do problema de duplicação de meses
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Dados de evolução gerados: {len(dados_evolucao)} pontos")
-    for i, item in enumerate(dados_evolucao):
-        logger.info(f"Ponto {i+1}: {item['data']} = {item['saldo']}")
+    # Dados por categoria para gráfico (filtrado pelo período), em uma consulta agrupada
+    from .services import CategoriaService
+    totais_categorias = CategoriaService.totais_por_categoria(
+        (data_inicio, data_fim), tipos=TipoTransacao.get_expense_types(), excluir_parceladas=False
+    )
+    dados_categorias = [
+        {
+            'nome': categoria['nome'],
+            'cor': categoria['cor'],
+            'valor': float(categoria['total']),
+            'percentual': round(categoria['percentual'], 1)
+        }
+        for categoria in totais_categorias['despesas']
+    ]
+    
+    # Séries longas (ex.: anos em visão diária) são reduzidas preservando a forma;
+    # os totais acima já foram calculados sobre a série completa
+    dados_evolucao = _dados_evolucao(serie, RelatorioConfig.PONTOS_EVOLUCAO_PADRAO)
     
     # Serializar dados para JSON (necessário para os gráficos)
     dados_categorias_json = json.dumps(dados_categorias)
@@ -2040,18 +1753,69 @@ def relatorios(request):
         'dados_evolucao_json': dados_evolucao_json,
         'periodo': periodo,
         'tipo_exibicao': tipo_exibicao,
-        'data_inicio': data_inicio_param or '',
-        'data_fim': data_fim_param or '',
+        'data_inicio': request.GET.get('data_inicio') or '',
+        'data_fim': request.GET.get('data_fim') or '',
     }
     return render(request, 'financas/relatorios.html', context)
 
+@login_required
+def api_relatorio_evolucao(request):
+    """
+    API endpoint com a série de evolução do saldo dos relatórios.
+    
+    Aceita os mesmos filtros da página (periodo, tipo_exibicao, data_inicio,
+    data_fim) e um orçamento de pontos em `pontos`: a série é reduzida no
+    servidor com LTTB, de modo que períodos longos em visão diária chegam
+    ao gráfico com o tamanho pedido sem perder picos e vales.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+    
+    try:
+        from .services import CacheTenant, RelatorioService
+        
+        try:
+            pontos = int(request.GET.get('pontos', RelatorioConfig.PONTOS_EVOLUCAO_PADRAO))
+        except ValueError:
+            return JsonResponse({'error': 'Parâmetro pontos inválido'}, status=400)
+        pontos = max(RelatorioConfig.PONTOS_EVOLUCAO_MINIMO, min(pontos, RelatorioConfig.PONTOS_EVOLUCAO_MAXIMO))
+        
+        try:
+            _, tipo_exibicao, _, data_fim, inicio_evolucao = _periodo_relatorio(request, get_data_atual_brasil())
+        except ValueError:
+            return JsonResponse({'error': 'Data inválida'}, status=400)
+        
+        serie = CacheTenant.obter_ou_calcular(
+            'relatorios:evolucao',
+            lambda: RelatorioService.serie_temporal(inicio_evolucao, data_fim, tipo_exibicao),
+            tipo_exibicao, inicio_evolucao.isoformat(), data_fim.isoformat()
+        )
+        
+        corpo = json.dumps({
+            'granularidade': tipo_exibicao,
+            'pontos_originais': len(serie),
+            'dados': _dados_evolucao(serie, pontos),
+        }, cls=DjangoJSONEncoder)
+        etag = '"%s"' % hashlib.md5(corpo.encode()).hexdigest()
+        
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(corpo, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    except Exception as e:
+        logger.error(f"Erro na API de evolução dos relatórios: {e}")
+        return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
+
 
 
 def fechamento_mensal(request):
     from datetime import datetime
     from django.db.models import Sum
     from django.contrib import messages
-    from .models import ConfiguracaoFechamento
+    from .models import Conta, Transacao, FechamentoMensal, ConfiguracaoFechamento
     
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -2125,9 +1889,11 @@ def fechamento_mensal(request):
                         mes__lt=mes
                     ).order_by('-mes').first()
                 
-                # CORREÇÃO: Se não há fechamento anterior, saldo inicial deve ser 0
-                # porque as transações já estão refletidas no saldo atual da conta
-                saldo_inicial = fechamento_anterior.saldo_final if fechamento_anterior else Decimal('0.00')
+                # Sem fechamento anterior, o saldo inicial é o do snapshot diário na véspera do período
+                from .services import SaldoService
+                saldo_inicial = fechamento_anterior.saldo_final if fechamento_anterior else SaldoService.saldo_em(
+                    conta.id, data_inicio - timedelta(days=1)
+                )
                 saldo_final = saldo_inicial + receitas - despesas
                 
                 # Desabilitar atualização automática de saldo durante fechamento
@@ -2151,10 +1917,6 @@ def fechamento_mensal(request):
                         data_fechamento=datetime.now(pytz.timezone('America/Sao_Paulo'))
                     )
                     
-                    # Atualizar saldo da conta manualmente após fechamento
-                    conta.saldo = saldo_final
-                    conta.save()
-                    
                 finally:
                     # Reabilitar atualização automática de saldo
                     habilitar_atualizacao_saldo()
@@ -2164,7 +1926,11 @@ def fechamento_mensal(request):
         return redirect('fechamento_mensal')
     
     # GET request - mostrar página
-    contas = Conta.objects.all()
+    from django.db.models import F, Q, OuterRef, Subquery, Window
+    from django.db.models.functions import RowNumber
+    from .services import SaldoService, ResumoMensalService
+    
+    contas = list(Conta.objects.all())
     
     # Obter configurações de fechamento
     config = ConfiguracaoFechamento.get_configuracao()
@@ -2228,108 +1994,121 @@ def fechamento_mensal(request):
         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
     ]
     
+    # Período considerado nas prévias das contas ainda abertas
+    data_inicio = datetime(ano_fechamento, mes_fechamento, 1).date()
+    if eh_fechamento_antecipado:
+        data_fim_real = hoje.date()  # Se fechamento antecipado, até hoje
+    else:
+        data_fim_real = data_inicio.replace(day=ultimo_dia_mes)  # Último dia do mês
+    
+    periodo_fechamento = {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim_real,
+        'eh_antecipado': eh_fechamento_antecipado,
+        'dias_considerados': (data_fim_real - data_inicio).days + 1,
+        'total_dias_mes': ultimo_dia_mes
+    }
+    
+    # Fechamentos do mês exibido (uma consulta)
+    fechamentos_atuais = {
+        fechamento.conta_id: fechamento
+        for fechamento in FechamentoMensal.objects.filter(mes=mes_fechamento, ano=ano_fechamento)
+    }
+    
+    # Histórico: fechamentos mais recentes de todas as contas com uma função de janela.
+    # Os 7 primeiros garantem o último fechamento e 6 meses além do mês exibido.
+    historicos = {}
+    ultimos_fechamentos = {}
+    recentes = FechamentoMensal.objects.annotate(
+        posicao=Window(RowNumber(), partition_by=[F('conta_id')], order_by=[F('ano').desc(), F('mes').desc()])
+    ).filter(posicao__lte=7).order_by('conta_id', 'posicao')
+    for fechamento in recentes:
+        ultimos_fechamentos.setdefault(fechamento.conta_id, fechamento)
+        if (fechamento.mes, fechamento.ano) != (mes_fechamento, ano_fechamento):
+            historico = historicos.setdefault(fechamento.conta_id, [])
+            if len(historico) < 6:
+                historico.append(fechamento)
+    
+    # Prévias das contas abertas: receitas/despesas de todas as contas em uma agregação
+    # agrupada (cubo mensal para o mês completo, transações para o fechamento antecipado)
+    contas_abertas = [conta.id for conta in contas if conta.id not in fechamentos_atuais]
+    movimentos = {}
+    if contas_abertas:
+        if eh_fechamento_antecipado:
+            linhas = Transacao.objects.filter(
+                conta_id__in=contas_abertas,
+                data__gte=data_inicio,
+                data__lte=data_fim_real,
+                tipo__in=['receita', 'despesa'],
+            ).values('conta_id', 'tipo').annotate(total=Sum('valor')).order_by()
+        else:
+            linhas = ResumoMensalService.totais(
+                ('conta_id', 'tipo'), inicio=data_inicio, fim=data_inicio,
+                tipos=['receita', 'despesa'], conta_ids=contas_abertas, excluir_parceladas=False
+            )
+        movimentos = {(linha['conta_id'], linha['tipo']): linha['total'] for linha in linhas}
+    
+    # Saldo inicial das prévias: último fechamento antes do mês (janela) ou, sem ele,
+    # o snapshot diário na véspera do mês
+    saldos_iniciais = {
+        fechamento.conta_id: fechamento.saldo_final
+        for fechamento in FechamentoMensal.objects.filter(
+            conta_id__in=contas_abertas
+        ).filter(
+            Q(ano__lt=ano_fechamento) | Q(ano=ano_fechamento, mes__lt=mes_fechamento)
+        ).annotate(
+            posicao=Window(RowNumber(), partition_by=[F('conta_id')], order_by=[F('ano').desc(), F('mes').desc()])
+        ).filter(posicao=1)
+    } if contas_abertas else {}
+    sem_fechamento_anterior = [conta_id for conta_id in contas_abertas if conta_id not in saldos_iniciais]
+    if sem_fechamento_anterior:
+        saldos_iniciais.update(
+            SaldoService.saldos_em(data_inicio - timedelta(days=1), conta_ids=sem_fechamento_anterior)
+        )
+    
+    # Transações após o último fechamento de cada conta (até 10 por conta, uma consulta)
+    fim_ultimo_fechamento = FechamentoMensal.objects.filter(
+        conta_id=OuterRef('conta_id')
+    ).order_by('-ano', '-mes').values('data_fim_periodo')[:1]
+    transacoes_pos = {}
+    for transacao in Transacao.objects.select_related('categoria').annotate(
+        fim_ultimo_fechamento=Subquery(fim_ultimo_fechamento)
+    ).filter(
+        data__gt=F('fim_ultimo_fechamento')
+    ).annotate(
+        posicao=Window(RowNumber(), partition_by=[F('conta_id')], order_by=[F('data').desc(), F('id').desc()])
+    ).filter(posicao__lte=10).order_by('conta_id', 'posicao'):
+        transacoes_pos.setdefault(transacao.conta_id, []).append(transacao)
+    
     # Preparar dados das contas com status de fechamento
     contas_dados = []
     for conta in contas:
-        # Verificar se já foi fechada no mês de fechamento
-        fechamento_atual = FechamentoMensal.objects.filter(
-            conta=conta,
-            mes=mes_fechamento,
-            ano=ano_fechamento
-        ).first()
-        
+        fechamento_atual = fechamentos_atuais.get(conta.id)
         status = 'Fechado' if fechamento_atual else 'Aberto'
         
-        # Calcular valores do mês de fechamento (para mostrar o que seria fechado)
+        # Valores do mês de fechamento (para mostrar o que seria fechado)
         valores_mes_fechamento = None
-        periodo_fechamento = None
-        if not fechamento_atual:  # Só calcular se ainda não foi fechado
-            data_inicio = datetime(ano_fechamento, mes_fechamento, 1).date()
-            if mes_fechamento == 12:
-                data_fim = datetime(ano_fechamento + 1, 1, 1).date()
-            else:
-                data_fim = datetime(ano_fechamento, mes_fechamento + 1, 1).date()
-            
-            # Definir período considerado no fechamento
-            if eh_fechamento_antecipado:
-                data_fim_real = hoje.date()  # Se fechamento antecipado, até hoje
-            else:
-                data_fim_real = data_fim - timedelta(days=1)  # Último dia do mês
-            
-            periodo_fechamento = {
-                'data_inicio': data_inicio,
-                'data_fim': data_fim_real,
-                'eh_antecipado': eh_fechamento_antecipado,
-                'dias_considerados': (data_fim_real - data_inicio).days + 1,
-                'total_dias_mes': ultimo_dia_mes
-            }
-            
-            transacoes_mes = Transacao.objects.filter(
-                data__gte=data_inicio,
-                data__lte=data_fim_real,
-                conta=conta
-            )
-            
-            receitas_mes = transacoes_mes.filter(tipo='receita').aggregate(
-                total=Sum('valor')
-            )['total'] or 0
-            
-            despesas_mes = transacoes_mes.filter(tipo='despesa').aggregate(
-                total=Sum('valor')
-            )['total'] or 0
-            
-            # Calcular saldo inicial (fechamento anterior ou saldo da conta)
-            fechamento_anterior = FechamentoMensal.objects.filter(
-                conta=conta,
-                ano__lt=ano_fechamento
-            ).order_by('-ano', '-mes').first()
-            
-            if not fechamento_anterior:
-                fechamento_anterior = FechamentoMensal.objects.filter(
-                    conta=conta,
-                    ano=ano_fechamento, 
-                    mes__lt=mes_fechamento
-                ).order_by('-mes').first()
-            
-            saldo_inicial_calculado = fechamento_anterior.saldo_final if fechamento_anterior else conta.saldo
-            saldo_final_calculado = saldo_inicial_calculado + receitas_mes - despesas_mes
+        if not fechamento_atual:
+            receitas_mes = movimentos.get((conta.id, 'receita')) or 0
+            despesas_mes = movimentos.get((conta.id, 'despesa')) or 0
+            saldo_inicial_calculado = saldos_iniciais.get(conta.id) or Decimal('0.00')
             
             valores_mes_fechamento = {
                 'saldo_inicial': saldo_inicial_calculado,
                 'receitas': receitas_mes,
                 'despesas': despesas_mes,
-                'saldo_final': saldo_final_calculado
+                'saldo_final': saldo_inicial_calculado + receitas_mes - despesas_mes
             }
         
-        # Buscar histórico de fechamentos desta conta (excluindo o mês de fechamento se existir)
-        historico = FechamentoMensal.objects.filter(
-            conta=conta
-        ).exclude(
-            mes=mes_fechamento, ano=ano_fechamento
-        ).order_by('-ano', '-mes')[:6]  # Últimos 6 fechamentos
-        
-        # Verificar se há transações após o último fechamento
-        transacoes_pos_fechamento = []
-        ultimo_fechamento = FechamentoMensal.objects.filter(
-            conta=conta
-        ).order_by('-ano', '-mes').first()
-        
-        if ultimo_fechamento and ultimo_fechamento.data_fim_periodo:
-            # Buscar transações após a data de fim do último fechamento
-            transacoes_pos_fechamento = Transacao.objects.filter(
-                conta=conta,
-                data__gt=ultimo_fechamento.data_fim_periodo
-            ).order_by('-data')[:10]  # Últimas 10 transações pós-fechamento
-        
         contas_dados.append({
             'conta': conta,
             'status': status,
             'fechamento_atual': fechamento_atual,
             'valores_mes_fechamento': valores_mes_fechamento,
-            'periodo_fechamento': periodo_fechamento,
-            'historico': historico,
-            'transacoes_pos_fechamento': transacoes_pos_fechamento,
-            'ultimo_fechamento': ultimo_fechamento
+            'periodo_fechamento': None if fechamento_atual else periodo_fechamento,
+            'historico': historicos.get(conta.id, []),
+            'transacoes_pos_fechamento': transacoes_pos.get(conta.id, []),
+            'ultimo_fechamento': ultimos_fechamentos.get(conta.id)
         })
     
     # Verificar se pode fechar baseado nas configurações
@@ -2464,7 +2243,11 @@ def executar_fechamento_automatico(request):
                     mes__lt=mes_fechamento
                 ).order_by('-mes').first()
             
-            saldo_inicial = fechamento_anterior.saldo_final if fechamento_anterior else conta.saldo
+            # Sem fechamento anterior, usar o snapshot diário na véspera do período
+            from .services import SaldoService
+            saldo_inicial = fechamento_anterior.saldo_final if fechamento_anterior else SaldoService.saldo_em(
+                conta.id, data_inicio - timedelta(days=1)
+            )
             saldo_final = saldo_inicial + receitas_mes - despesas_mes
             
             # Desabilitar atualização automática de saldo durante fechamento
@@ -2485,10 +2268,6 @@ def executar_fechamento_automatico(request):
                     fechamento_antecipado=eh_fechamento_antecipado
                 )
                 
-                # Atualizar saldo da conta manualmente após fechamento
-                conta.saldo = saldo_final
-                conta.save()
-                
             finally:
                 # Reabilitar atualização automática de saldo
                 habilitar_atualizacao_saldo()
@@ -2529,21 +2308,13 @@ def compartilhar_whatsapp(request):
         total_despesas = Decimal('0.00')
         saldo_atual_total = Decimal('0.00')
         
-        contas = Conta.objects.all()
+        from .services import ContaService
+        resumos = ContaService.obter_resumos_financeiros(mes=hoje.month, ano=hoje.year)
         
-        for conta in contas:
-            try:
-                resumo = ContaService.obter_resumo_financeiro(
-                    conta.id, 
-                    mes=hoje.month, 
-                    ano=hoje.year
-                )
-                total_receitas += resumo['receitas']
-                total_despesas += resumo['despesas']
-                saldo_atual_total += resumo['saldo_atual']
-            except Exception as e:
-                logger.error(f"Erro ao obter resumo da conta {conta.id}: {e}")
-                continue
+        for resumo in resumos.values():
+            total_receitas += resumo['receitas']
+            total_despesas += resumo['despesas']
+            saldo_atual_total += resumo['saldo_atual']
         
         # Obter transações recentes (últimos 7 dias)
         data_inicio = hoje - timedelta(days=7)
@@ -3374,12 +3145,11 @@ def api_transacoes_por_categoria(request):
     try:
         hoje = get_data_atual_brasil()
         
-        # Obter transações do mês atual agrupadas por categoria
-        transacoes = Transacao.objects.filter(
-            data__year=hoje.year,
-            data__month=hoje.month
-        ).values('categoria__nome', 'categoria__cor').annotate(
-            total=Sum('valor')
+        # Totais do mês atual por categoria lidos do cubo mensal
+        from .services import ResumoMensalService
+        transacoes = ResumoMensalService.totais(
+            ('categoria__nome', 'categoria__cor'), inicio=hoje, fim=hoje,
+            excluir_parceladas=False
         ).order_by('-total')
         
         data = [
@@ -3402,43 +3172,24 @@ def api_evolucao_saldo(request):
         return JsonResponse({'error': 'Método não permitido'}, status=405)
     
     try:
+        from .models import Conta
+        from .services import CachePeriodoFechado
+        
         hoje = get_data_atual_brasil()
         
-        # Obter dados dos últimos 6 meses
-        dados_evolucao = []
+        # Saldo total de todas as contas no final de cada um dos últimos 6 meses.
+        # Meses fechados vêm do cache imutável; só o mês aberto consulta o snapshot diário.
+        saldos = CachePeriodoFechado.saldos_fim_mes(
+            list(Conta.objects.all()), hoje - relativedelta(months=5), hoje
+        )
         
-        for i in range(6):
-            data_mes = hoje - relativedelta(months=i)
-            
-            # Calcular saldo total de todas as contas no final do mês
-            saldo_total = Decimal('0.00')
-            contas = Conta.objects.all()
-            
-            for conta in contas:
-                # Saldo inicial da conta
-                saldo_conta = Decimal('0.00')
-                
-                # Somar todas as transações até o final do mês
-                transacoes = Transacao.objects.filter(
-                    conta=conta,
-                    data__lte=data_mes.replace(day=calendar.monthrange(data_mes.year, data_mes.month)[1])
-                )
-                
-                for transacao in transacoes:
-                    if transacao.tipo == 'receita':
-                        saldo_conta += transacao.valor
-                    else:
-                        saldo_conta -= transacao.valor
-                
-                saldo_total += saldo_conta
-            
-            dados_evolucao.append({
-                'data': data_mes.strftime('%m/%Y'),
+        dados_evolucao = [
+            {
+                'data': f'{mes:02d}/{ano}',
                 'saldo': float(saldo_total)
-            })
-        
-        # Inverter para ordem cronológica
-        dados_evolucao.reverse()
+            }
+            for (ano, mes), saldo_total in saldos.items()
+        ]
         
         return JsonResponse(dados_evolucao, safe=False)
     except Exception as e:
@@ -3477,6 +3228,48 @@ def api_transacoes_recentes(request):
         logger.error(f"Erro na API transações recentes: {e}")
         return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
 
+@login_required
+def api_buscar_transacoes(request):
+    """
+    API endpoint de busca de transações por descrição ou responsável (busca enquanto digita).
+    
+    Usa o índice de busca do banco (FTS5 ou GIN) e devolve os resultados
+    mais relevantes primeiro.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+    
+    try:
+        from .constants import BuscaConfig
+        from .services import BuscaTransacaoService
+        
+        try:
+            limite = min(int(request.GET.get('limit', BuscaConfig.LIMITE_RESULTADOS)), BuscaConfig.LIMITE_RESULTADOS)
+        except (ValueError, TypeError):
+            limite = BuscaConfig.LIMITE_RESULTADOS
+        
+        transacoes = BuscaTransacaoService.buscar(request.GET.get('q', ''), limite=limite)
+        
+        data = [
+            {
+                'id': t.id,
+                'descricao': t.descricao,
+                'responsavel': t.responsavel or '',
+                'valor': float(t.valor),
+                'tipo': t.tipo,
+                'data': t.data.strftime('%d/%m/%Y'),
+                'categoria': t.categoria.nome if t.categoria else 'Sem categoria',
+                'conta': t.conta.nome if t.conta else 'Sem conta',
+                'relevancia': round(t.relevancia or 0, 4),
+            }
+            for t in transacoes
+        ]
+        
+        return JsonResponse(data, safe=False)
+    except Exception as e:
+        logger.error(f"Erro na API de busca de transações: {e}")
+        return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
+
 def excluir_transacao(request, transacao_id):
     """
     Exclui uma transação específica.
@@ -255,12 +255,29 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Configurações de cache para melhorar o desempenho
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# O cache é compartilhado entre os workers do gunicorn: por padrão um arquivo
+# SQLite local; com REDIS_URL, qualquer servidor compatível com Redis
+REDIS_URL = config('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'financas',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'financas.cache.SQLiteCache',
+            'LOCATION': config('CACHE_PATH', default=str(BASE_DIR / 'cache' / 'cache.sqlite3')),
+            'KEY_PREFIX': 'financas',
+            'OPTIONS': {
+                'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=100000, cast=int),
+            },
+        }
     }
-}
 
 # Configurações para otimizar o desempenho
 SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'